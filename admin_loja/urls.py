@@ -16,6 +16,7 @@ urlpatterns = [
     path('pedidos/<uuid:pedido_id>/', views.admin_loja_cupom_pedido, name='cupom_pedido'),
     path('pedidos/<uuid:pedido_id>/avancar/', views.admin_loja_avancar_status_pedido, name='avancar_status_pedido'),
     path('configurar-frete/', views.admin_loja_configurar_frete, name='configurar_frete'),
+    path('configurar-frete/cotacao-lote/', views.admin_loja_cotar_frete_lote, name='cotar_frete_lote'),
     path('personalizar-loja/', views.admin_loja_personalizar_loja, name='personalizar_loja'),
     
     # URLs para impressoras
@@ -16,7 +16,7 @@ from .views_planos import (planos_meu_plano, planos_comparar, planos_solicitar_u
 from datetime import timedelta
 from django.db.models import Sum, F
 from django.db import models
-from core.models import Pedido, ItemPedido
+from core.models import Pedido, ItemPedido, TermoBuscado
 
 
 # ==================== VIEWS DE PERSONALIZAÇÃO AVANÇADA ====================
@@ -154,6 +154,33 @@ def admin_loja_configurar_frete(request):
         valor_frete_padrao = forms.DecimalField(label='Valor do Frete Padrão', max_digits=7, decimal_places=2, required=False)
         valor_adicional_km = forms.DecimalField(label='Valor Adicional por Km', max_digits=7, decimal_places=2, required=False)
         raio_limite_km = forms.DecimalField(label='Raio Máximo de Entrega (km)', max_digits=5, decimal_places=2, required=False, help_text='Deixe em branco para sem limite')
+        precos_bairro = forms.CharField(
+            label='Preço por Bairro',
+            required=False,
+            widget=forms.Textarea(attrs={'rows': 5}),
+            help_text='Um bairro por linha, ex.: "Centro: 5,00". Use "Bairro: bloqueado" para não entregar. Vale para bairros da cidade da loja, dentro do raio limite.'
+        )
+
+        def clean_precos_bairro(self):
+            from decimal import Decimal, InvalidOperation
+            precos = {}
+            for numero_linha, linha in enumerate(self.cleaned_data.get('precos_bairro', '').splitlines(), start=1):
+                if not linha.strip():
+                    continue
+                bairro, separador, valor = linha.rpartition(':')
+                bairro, valor = bairro.strip(), valor.strip().lower()
+                if not separador or not bairro:
+                    raise forms.ValidationError(f'Linha {numero_linha}: use o formato "Bairro: valor".')
+                if valor == 'bloqueado':
+                    precos[bairro] = None
+                    continue
+                try:
+                    precos[bairro] = Decimal(valor.replace('R$', '').replace(',', '.').strip())
+                except InvalidOperation:
+                    raise forms.ValidationError(f'Linha {numero_linha}: valor inválido "{valor}".')
+                if precos[bairro] < 0:
+                    raise forms.ValidationError(f'Linha {numero_linha}: o valor não pode ser negativo.')
+            return precos
 
         def clean(self):
             cleaned_data = super().clean()
@@ -178,9 +205,11 @@ def admin_loja_configurar_frete(request):
 
     # Aqui futuramente vamos buscar/salvar as configurações reais do banco
     from core.models import Restaurante
+    from core.zonas_entrega import definir_precos_bairro
     restaurante = Restaurante.objects.filter(proprietario=request.user).first()
     initial = {}
     if restaurante:
+        zonas_bairro = restaurante.zonas_entrega.filter(tipo='bairro').order_by('bairro')
         initial = {
             'frete_fixo': restaurante.frete_fixo,
             'valor_frete_fixo': restaurante.valor_frete_fixo,
@@ -188,6 +217,10 @@ def admin_loja_configurar_frete(request):
             'valor_frete_padrao': restaurante.valor_frete_padrao,
             'valor_adicional_km': restaurante.valor_adicional_km,
             'raio_limite_km': restaurante.raio_limite_km,
+            'precos_bairro': '\n'.join(
+                f"{zona.bairro}: {zona.valor if zona.entrega_permitida else 'bloqueado'}"
+                for zona in zonas_bairro
+            ),
         }
 
     if request.method == 'POST':
@@ -201,6 +234,7 @@ def admin_loja_configurar_frete(request):
                 restaurante.valor_adicional_km = form.cleaned_data['valor_adicional_km'] if not form.cleaned_data['frete_fixo'] else None
                 restaurante.raio_limite_km = form.cleaned_data['raio_limite_km']
                 restaurante.save()
+                definir_precos_bairro(restaurante, form.cleaned_data['precos_bairro'])
             msg = 'Configurações salvas com sucesso!'
             return render(request, 'admin_loja/configurar_frete.html', {'form': form, 'msg': msg})
         else:
@@ -210,6 +244,71 @@ def admin_loja_configurar_frete(request):
     return render(request, 'admin_loja/configurar_frete.html', {'form': form})
 
 
+@login_required
+def admin_loja_cotar_frete_lote(request):
+    """
+    Cotação de frete em lote (JSON). Recebe uma lista de CEPs em "ceps"
+    (um por linha ou separados por vírgula); sem CEPs, usa os CEPs dos
+    pedidos já recebidos pela loja.
+    Responde só com o cache de geocodificação; os CEPs ainda não resolvidos
+    são enviados à task ``geocodificar_ceps`` e entram numa próxima simulação.
+    """
+    import logging
+    import re
+    from django.core.cache import cache
+    from django.db.models import Value
+    from django.db.models.functions import Replace
+    from django.http import JsonResponse
+    from core.models import Restaurante
+    from core.services import FreteService
+    from core.tasks import geocodificar_ceps
+
+    restaurante = Restaurante.objects.filter(proprietario=request.user).first()
+    if not restaurante:
+        return JsonResponse({'success': False, 'error': 'Restaurante não encontrado'}, status=404)
+
+    ceps = [cep for cep in re.split(r'[\s,;]+', request.POST.get('ceps', '') or request.GET.get('ceps', '')) if cep]
+    if not ceps:
+        # Normaliza no banco para o DISTINCT (sem a ordenação padrão de Pedido) juntar "01001-000" e "01001000"
+        ceps = list(
+            Pedido.objects.filter(restaurante=restaurante)
+            .exclude(endereco_cep='')
+            .annotate(cep=Replace(Replace('endereco_cep', Value('-'), Value('')), Value(' '), Value('')))
+            .order_by()
+            .values_list('cep', flat=True)
+            .distinct()[:FreteService.LIMITE_COTACAO_LOTE]
+        )
+
+    cotacoes = FreteService.cotar_lote(restaurante, ceps, apenas_cache=True)
+    pendentes = [cep for cep, cotacao in cotacoes.items() if cotacao['erro'] == FreteService.ERRO_CEP_PENDENTE]
+    if pendentes:
+        # Uma geocodificação em andamento por loja (a origem também pode faltar no cache)
+        chave_agendamento = f"frete:geocodificar_lote:{restaurante.pk}"
+        if cache.add(chave_agendamento, 1, timeout=5 * 60):
+            try:
+                geocodificar_ceps.delay([re.sub(r'\D', '', restaurante.cep or '')] + pendentes)
+            except Exception as e:
+                cache.delete(chave_agendamento)
+                logging.getLogger(__name__).warning(f"Não foi possível agendar a geocodificação em lote: {e}")
+    resultados = [
+        {
+            'cep': cep,
+            'valor': float(cotacao['valor']) if cotacao['valor'] is not None else None,
+            'entrega_permitida': cotacao['entrega_permitida'],
+            'distancia_km': cotacao['distancia_km'],
+            'erro': cotacao['erro'],
+        }
+        for cep, cotacao in cotacoes.items()
+    ]
+    return JsonResponse({
+        'success': True,
+        'total': len(resultados),
+        'cobertos': sum(1 for item in resultados if item['entrega_permitida'] and not item['erro']),
+        'pendentes': len(pendentes),
+        'resultados': resultados,
+    })
+
+
 # Avançar status do pedido
 @painel_loja_required
 def admin_loja_avancar_status_pedido(request, pedido_id):
@@ -891,6 +990,14 @@ def admin_loja_relatorios(request):
         status='finalizado'
     ).values('forma_pagamento').annotate(total=Sum('total')).order_by('-total')
 
+    # O que os clientes buscaram na loja nos últimos 30 dias (e não encontraram)
+    buscas = TermoBuscado.objects.filter(
+        restaurante=restaurante,
+        data__gte=hoje - timedelta(days=30)
+    ).values('termo').annotate(total_buscas=Sum('buscas'), total_sem_resultado=Sum('sem_resultado'))
+    termos_mais_buscados = buscas.order_by('-total_buscas', 'termo')[:10]
+    termos_sem_resultado = buscas.filter(total_sem_resultado__gt=0).order_by('-total_sem_resultado', 'termo')[:10]
+
     context = {
         'vendas_hoje': vendas_hoje,
         'vendas_semana': vendas_semana,
@@ -899,6 +1006,8 @@ def admin_loja_relatorios(request):
         'labels_ultimos_7_dias': labels_ultimos_7_dias,
         'produtos_mais_vendidos': produtos_mais_vendidos,
         'recebimentos_por_forma': recebimentos_por_forma,
+        'termos_mais_buscados': termos_mais_buscados,
+        'termos_sem_resultado': termos_sem_resultado,
         'relatorios_avancados': relatorios_avancados,
         'restaurante': restaurante,
     }
@@ -1023,6 +1132,7 @@ def admin_loja_impressora_testar(request, impressora_id):
     """Testar impressora"""
     import requests
     import json
+    from core import http_client
     
     impressora = get_object_or_404(
         Impressora, 
@@ -1057,10 +1167,9 @@ está funcionando corretamente.
     try:
         # Endpoint local para teste de impressão (simulado)
         # Em um cenário real, você faria uma requisição para um serviço local
-        response = requests.post(
+        response = http_client.post(
             'http://localhost:8080/api/print-test',
-            json=dados_teste,
-            timeout=5
+            json=dados_teste
         )
         
         if response.status_code == 200:
@@ -13,7 +13,8 @@ from .models import (
     Usuario, Endereco, Plano, Restaurante, HorarioFuncionamento,
     Categoria, Produto, ImagemProduto, OpcaoPersonalizacao, ItemPersonalizacao,
     Pedido, ItemPedido, PersonalizacaoItemPedido, HistoricoStatusPedido, AvaliacaoPedido,
-    Entregador, AceitePedido, AvaliacaoEntregador, OcorrenciaEntrega, Notificacao
+    Entregador, AceitePedido, AvaliacaoEntregador, OcorrenciaEntrega, Notificacao,
+    CacheGeocodificacao, ZonaEntrega, UsoAPIExterna, PopularidadeProduto, AlteracaoCardapio, TermoBuscado
 )
 
 
@@ -123,13 +124,20 @@ class PlanoAdmin(admin.ModelAdmin):
     )
 
 
+class ZonaEntregaInline(admin.TabularInline):
+    model = ZonaEntrega
+    extra = 0
+    fields = ('tipo', 'distancia_max_km', 'bairro', 'valor', 'entrega_permitida', 'origem')
+
+
 @admin.register(Restaurante)
 class RestauranteAdmin(admin.ModelAdmin):
     list_display = ('nome', 'proprietario', 'plano_info', 'status_plano', 'cidade', 'status', 'esta_aberto')
-    list_filter = ('status', 'tipo_servico', PlanoFilter, 'plano', 'cidade', 'estado')
+    list_filter = ('status', 'tipo_servico', PlanoFilter, 'plano', 'cidade', 'estado', 'geocode_status')
     search_fields = ('nome', 'proprietario__username', 'cidade', 'plano__titulo')
     prepopulated_fields = {'slug': ('nome',)}
-    inlines = [HorarioFuncionamentoInline]
+    readonly_fields = ('latitude', 'longitude', 'geocode_status', 'geocodificado_em')
+    inlines = [HorarioFuncionamentoInline, ZonaEntregaInline]
     actions = ['atribuir_plano_personalizado', 'atribuir_plano_starter', 'atribuir_plano_pro', 'renovar_plano_30_dias', 'remover_plano']
     
     def plano_info(self, obj):
@@ -317,9 +325,10 @@ class RestauranteAdmin(admin.ModelAdmin):
 
 @admin.register(Endereco)
 class EnderecoAdmin(admin.ModelAdmin):
-    list_display = ('usuario', 'nome', 'cidade', 'bairro', 'principal')
-    list_filter = ('cidade', 'estado', 'principal')
+    list_display = ('usuario', 'nome', 'cidade', 'bairro', 'principal', 'geocode_status')
+    list_filter = ('cidade', 'estado', 'principal', 'geocode_status')
     search_fields = ('usuario__username', 'nome', 'logradouro', 'bairro', 'cidade')
+    readonly_fields = ('latitude', 'longitude', 'geocode_status', 'geocodificado_em')
 
 
 @admin.register(Categoria)
@@ -529,3 +538,63 @@ class NotificacaoAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('restaurante')
+
+
+
+@admin.register(CacheGeocodificacao)
+class CacheGeocodificacaoAdmin(admin.ModelAdmin):
+    list_display = ('consulta', 'tipo', 'latitude', 'longitude', 'expira_em', 'updated_at')
+    list_filter = ('tipo',)
+    search_fields = ('consulta', 'chave')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(ZonaEntrega)
+class ZonaEntregaAdmin(admin.ModelAdmin):
+    list_display = ('restaurante', 'tipo', 'distancia_max_km', 'bairro', 'valor', 'entrega_permitida', 'origem')
+    list_filter = ('tipo', 'origem', 'entrega_permitida', 'restaurante')
+    search_fields = ('restaurante__nome', 'bairro')
+    readonly_fields = ('bairro_normalizado', 'created_at', 'updated_at')
+
+
+@admin.register(UsoAPIExterna)
+class UsoAPIExternaAdmin(admin.ModelAdmin):
+    list_display = ('data', 'api', 'requisicoes', 'acertos_cache', 'taxa_cache', 'bloqueadas', 'erros')
+    list_filter = ('api', 'data')
+    date_hierarchy = 'data'
+    readonly_fields = ('api', 'data', 'requisicoes', 'acertos_cache', 'bloqueadas', 'erros', 'updated_at')
+
+    def taxa_cache(self, obj):
+        return f"{obj.taxa_acerto_cache}%"
+    taxa_cache.short_description = 'Taxa de Cache'
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(PopularidadeProduto)
+class PopularidadeProdutoAdmin(admin.ModelAdmin):
+    list_display = ('produto', 'restaurante', 'pontuacao', 'total_vendido', 'ultima_venda')
+    list_filter = ('restaurante',)
+    search_fields = ('produto__nome', 'restaurante__nome')
+    readonly_fields = ('restaurante', 'produto', 'pontuacao', 'total_vendido', 'ultima_venda', 'updated_at')
+    list_select_related = ('produto', 'restaurante')
+
+
+
+@admin.register(AlteracaoCardapio)
+class AlteracaoCardapioAdmin(admin.ModelAdmin):
+    list_display = ('id', 'restaurante', 'tipo', 'objeto_id', 'removido', 'created_at')
+    list_filter = ('tipo', 'removido', 'restaurante')
+    search_fields = ('objeto_id', 'restaurante__nome')
+    readonly_fields = ('restaurante', 'tipo', 'objeto_id', 'removido', 'created_at')
+    list_select_related = ('restaurante',)
+
+
+@admin.register(TermoBuscado)
+class TermoBuscadoAdmin(admin.ModelAdmin):
+    list_display = ('termo', 'restaurante', 'data', 'buscas', 'sem_resultado')
+    list_filter = ('data', 'restaurante')
+    search_fields = ('termo', 'restaurante__nome')
+    readonly_fields = ('restaurante', 'data', 'termo', 'buscas', 'sem_resultado', 'updated_at')
+    list_select_related = ('restaurante',)
@@ -0,0 +1,37 @@
+"""
+Termos buscados nas lojas, agregados por dia (``TermoBuscado``).
+
+A busca só soma o termo normalizado num ``ContadorEmLote``; a gravação
+acontece fora da requisição. O lojista vê nos relatórios o que os clientes
+mais procuram e o que procuram sem encontrar.
+"""
+
+from django.utils import timezone
+
+from .busca import normalizar
+from .contadores import ContadorEmLote
+
+TAMANHO_MAXIMO_TERMO = 100
+
+_SEGUNDOS_POR_LOTE = 60
+
+_contador = ContadorEmLote(
+    'core.TermoBuscado', ('restaurante', 'data', 'termo'), ('buscas', 'sem_resultado'), _SEGUNDOS_POR_LOTE
+)
+
+
+def registrar(restaurante_id, consulta, total_resultados):
+    """Conta uma busca da consulta no restaurante, no dia corrente"""
+    termo = normalizar(consulta)[:TAMANHO_MAXIMO_TERMO].strip()
+    if not termo:
+        return
+    _contador.somar(
+        (restaurante_id, timezone.localdate(), termo),
+        buscas=1,
+        sem_resultado=0 if total_resultados else 1,
+    )
+
+
+def descarregar():
+    """Grava no banco as buscas acumuladas neste processo"""
+    _contador.descarregar()
@@ -9,3 +9,4 @@ class CoreConfig(AppConfig):
     def ready(self):
         """Registra os signals quando a aplicação estiver pronta"""
         import core.signals  # noqa
+        import core.checks  # noqa
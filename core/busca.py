@@ -0,0 +1,676 @@
+"""
+Busca de produtos da loja com índice invertido em memória, por restaurante.
+
+Os textos (nome, categoria, descrição e ingredientes) são normalizados sem
+acentos, divididos em termos, sem palavras vazias, e reduzidos a um radical
+simples do português (plurais e diminutivos), de modo que "pizzas",
+"Pizza" e "pizzinha" caem no mesmo termo. Cada termo aponta para os produtos
+que o contêm, com o peso do campo (o nome pesa mais que a descrição).
+
+O índice é montado a partir do snapshot do cardápio (``cardapio_cache``) e
+fica na memória do processo. Quando a geração do cardápio muda, ou quando o
+registro de alterações (``AlteracaoCardapio``, verificado no banco a cada
+``INTERVALO_VERIFICACAO_INDICE`` segundos) passa da versão do índice, apenas
+os produtos e categorias alterados são reindexados. Cada processo guarda os
+índices de no máximo ``BUSCA_INDICES_MAXIMO`` restaurantes (os usados há mais
+tempo saem primeiro), e a atualização de um restaurante não bloqueia a dos
+demais.
+
+A consulta exige todos os termos (cada um também casa com o início de uma
+palavra, com peso menor) e devolve os ids dos produtos ordenados por
+relevância; a view pagina esses ids e só então carrega os produtos da página.
+
+Quando a busca exata traz poucos resultados, ``buscar_aproximado`` troca os
+termos sem correspondência pelos termos do vocabulário a uma ou duas edições
+de distância, encontrados por um índice de trigramas ("pizsa" -> "pizza").
+
+A view usa a interface ``ServicoBusca`` (``servico()``): o índice em memória
+é o backend padrão; ``BUSCA_BACKEND = 'fulltext'`` usa os índices FULLTEXT do
+MySQL (``busca_fulltext``), para catálogos grandes.
+
+O autocompletar usa ``SugestoesBusca``: os nomes dos produtos e categorias
+indexados, em um arranjo ordenado de chaves (o nome a partir de cada palavra),
+consultado por busca binária e ordenado pela popularidade dos produtos.
+"""
+
+import hashlib
+import heapq
+import logging
+import re
+import time
+import unicodedata
+import weakref
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict, namedtuple
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+
+from . import cardapio_cache, cardapio_delta
+from .models import AlteracaoCardapio, PopularidadeProduto, Produto
+from .popularidade import versao_ranking
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada campo no termo do documento
+PESO_NOME = 4.0
+PESO_CATEGORIA = 2.0
+PESO_DESCRICAO = 1.0
+PESO_INGREDIENTES = 1.0
+
+# Termos que casam só pelo prefixo valem menos que o termo completo
+FATOR_PREFIXO = 0.6
+TAMANHO_MINIMO_PREFIXO = 2
+
+# Busca aproximada: termos corrigidos valem menos, e no máximo estas correções por termo
+FATOR_APROXIMADO = 0.5
+CORRECOES_POR_TERMO = 3
+
+# Acima disso, mais barato remontar o índice do que aplicar as alterações
+LIMITE_ALTERACOES_INCREMENTAIS = 200
+
+# Intervalo (segundos) entre consultas ao registro de alterações por índice
+INTERVALO_VERIFICACAO_INDICE = 5
+
+PALAVRAS_VAZIAS = frozenset({
+    'a', 'o', 'as', 'os', 'e', 'de', 'da', 'do', 'das', 'dos', 'com', 'em', 'no', 'na',
+    'nos', 'nas', 'para', 'pra', 'por', 'um', 'uma', 'uns', 'umas', 'ao', 'aos', 'ou',
+})
+
+# Sugestões: no máximo este número de nomes examinados por prefixo, e
+# intervalo entre verificações de mudança no cardápio/ranking
+LIMITE_VARREDURA_SUGESTOES = 500
+INTERVALO_VERIFICACAO_SUGESTOES = 2
+
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+Documento = namedtuple('Documento', 'nome nome_normalizado categoria_id categoria_slug categoria_nome termos')
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e só com letras, números e espaços"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return _NAO_ALFANUMERICO.sub(' ', texto).strip()
+
+
+def radical(palavra):
+    """Radical leve do português: remove plurais e diminutivos (palavra já normalizada)"""
+    if len(palavra) <= 3 or palavra.isdigit():
+        return palavra
+
+    # Plurais
+    if palavra.endswith(('oes', 'aes')):
+        palavra = palavra[:-3] + 'ao'
+    elif palavra.endswith('ais') and len(palavra) > 4:
+        palavra = palavra[:-3] + 'al'
+    elif palavra.endswith('eis') and len(palavra) > 4:
+        palavra = palavra[:-3] + 'el'
+    elif palavra.endswith('ois'):
+        palavra = palavra[:-3] + 'ol'
+    elif palavra.endswith('ns'):
+        palavra = palavra[:-2] + 'm'
+    elif palavra.endswith(('res', 'zes', 'ses')) and len(palavra) > 4:
+        palavra = palavra[:-2]
+    elif palavra.endswith('s') and not palavra.endswith(('ss', 'us', 'is')):
+        palavra = palavra[:-1]
+
+    # Diminutivos
+    if palavra.endswith(('zinho', 'zinha')) and len(palavra) > 6 and palavra[-6] in 'aeiou':
+        palavra = palavra[:-5]
+    elif palavra.endswith(('inho', 'inha')) and len(palavra) > 5:
+        palavra = palavra[:-4] + palavra[-1]
+    return palavra
+
+
+def termos(texto):
+    """Termos indexáveis do texto, na ordem em que aparecem"""
+    return [radical(palavra) for palavra in normalizar(texto).split() if palavra not in PALAVRAS_VAZIAS]
+
+
+def trigramas(termo):
+    """Trigramas do termo, com bordas marcadas ("  pi", " piz", ..., "za ")"""
+    termo = f"  {termo} "
+    return {termo[i:i + 3] for i in range(len(termo) - 2)}
+
+
+def erros_tolerados(termo):
+    """Edições aceitas na busca aproximada, pelo tamanho do termo"""
+    if len(termo) <= 3:
+        return 0
+    return 1 if len(termo) <= 7 else 2
+
+
+def distancia_edicao(a, b, limite):
+    """
+    Distância de edição (com transposição de letras vizinhas) entre ``a`` e
+    ``b``, ou ``limite + 1`` assim que ela certamente passar de ``limite``.
+    """
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        atual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            custo = 0 if a[i - 1] == b[j - 1] else 1
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if anterior2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                atual[j] = min(atual[j], anterior2[j - 2] + 1)
+        if min(atual) > limite:
+            return limite + 1
+        anterior2, anterior = anterior, atual
+    return anterior[-1]
+
+
+class IndiceBusca:
+    """Índice invertido dos produtos de um restaurante"""
+
+    def __init__(self, versao=0, geracao=None):
+        self.versao = versao
+        self.geracao = geracao
+        # Próxima consulta ao registro de alterações (time.monotonic)
+        self.verificar_em = 0.0
+        # termo -> {produto_id: peso}
+        self.postings = defaultdict(dict)
+        # produto_id -> Documento
+        self.documentos = {}
+        # trigrama -> termos do vocabulário que o contêm (busca aproximada)
+        self.trigramas = defaultdict(set)
+        self._vocabulario = None
+
+    def __len__(self):
+        return len(self.documentos)
+
+    def copia(self):
+        """Cópia independente, para atualizar sem afetar buscas em andamento"""
+        outro = IndiceBusca(versao=self.versao, geracao=self.geracao)
+        outro.postings = defaultdict(dict, {termo: dict(produtos) for termo, produtos in self.postings.items()})
+        outro.documentos = dict(self.documentos)
+        outro.trigramas = defaultdict(set, {trigrama: set(lista) for trigrama, lista in self.trigramas.items()})
+        return outro
+
+    def adicionar(self, produto):
+        """Indexa (ou reindexa) o produto; a categoria deve estar carregada"""
+        self.remover(produto.pk)
+        pesos = {}
+        campos = (
+            (produto.nome, PESO_NOME),
+            (produto.categoria.nome, PESO_CATEGORIA),
+            (produto.descricao, PESO_DESCRICAO),
+            (produto.ingredientes, PESO_INGREDIENTES),
+        )
+        for texto, peso in campos:
+            for termo in termos(texto):
+                if peso > pesos.get(termo, 0):
+                    pesos[termo] = peso
+        for termo, peso in pesos.items():
+            if termo not in self.postings:
+                for trigrama in trigramas(termo):
+                    self.trigramas[trigrama].add(termo)
+            self.postings[termo][produto.pk] = peso
+        self.documentos[produto.pk] = Documento(
+            nome=produto.nome,
+            nome_normalizado=normalizar(produto.nome),
+            categoria_id=produto.categoria_id,
+            categoria_slug=produto.categoria.slug,
+            categoria_nome=produto.categoria.nome,
+            termos=tuple(pesos),
+        )
+        self._vocabulario = None
+
+    def remover(self, produto_id):
+        documento = self.documentos.pop(produto_id, None)
+        if documento is None:
+            return
+        for termo in documento.termos:
+            produtos = self.postings.get(termo)
+            if produtos is not None:
+                produtos.pop(produto_id, None)
+                if not produtos:
+                    del self.postings[termo]
+                    for trigrama in trigramas(termo):
+                        self.trigramas[trigrama].discard(termo)
+                        if not self.trigramas[trigrama]:
+                            del self.trigramas[trigrama]
+        self._vocabulario = None
+
+    def _com_prefixo(self, prefixo):
+        if self._vocabulario is None:
+            self._vocabulario = sorted(self.postings)
+        inicio = bisect_left(self._vocabulario, prefixo)
+        for termo in self._vocabulario[inicio:]:
+            if not termo.startswith(prefixo):
+                break
+            yield termo
+
+    def _pontuar(self, termo):
+        """{produto_id: pontuação} dos produtos que casam com o termo da consulta"""
+        pontuacao = dict(self.postings.get(termo, {}))
+        if len(termo) >= TAMANHO_MINIMO_PREFIXO:
+            for termo_indice in self._com_prefixo(termo):
+                if termo_indice == termo:
+                    continue
+                for produto_id, peso in self.postings[termo_indice].items():
+                    peso *= FATOR_PREFIXO
+                    if peso > pontuacao.get(produto_id, 0):
+                        pontuacao[produto_id] = peso
+        return pontuacao
+
+    def _ordenar(self, pontuacao, categoria, limite=None):
+        if categoria:
+            pontuacao = {pk: p for pk, p in pontuacao.items() if self.documentos[pk].categoria_slug == categoria}
+
+        def chave(pk):
+            return (-pontuacao[pk], self.documentos[pk].nome_normalizado)
+
+        if limite is not None:
+            return heapq.nsmallest(limite, pontuacao, key=chave)
+        return sorted(pontuacao, key=chave)
+
+    def buscar(self, consulta, categoria=None):
+        """Ids dos produtos que contêm todos os termos da consulta, por relevância"""
+        pontuacao = None
+        for termo in dict.fromkeys(termos(consulta)):
+            parcial = self._pontuar(termo)
+            if pontuacao is None:
+                pontuacao = parcial
+            else:
+                pontuacao = {pk: p + parcial[pk] for pk, p in pontuacao.items() if pk in parcial}
+            if not pontuacao:
+                return []
+        if pontuacao is None:
+            return []
+        return self._ordenar(pontuacao, categoria)
+
+    def similares(self, consulta, excluir=(), limite=6):
+        """Produtos que contêm qualquer um dos termos da consulta (para sugestões)"""
+        pontuacao = defaultdict(float)
+        for termo in dict.fromkeys(termos(consulta)):
+            if len(termo) <= 2:
+                continue
+            for produto_id, peso in self._pontuar(termo).items():
+                pontuacao[produto_id] += peso
+        for produto_id in excluir:
+            pontuacao.pop(produto_id, None)
+        return self._ordenar(pontuacao, None, limite)
+
+    def correcoes(self, termo):
+        """
+        Termos do vocabulário a poucas edições de ``termo``: ``[(termo, distância)]``,
+        os mais próximos primeiro. Candidatos vêm dos trigramas em comum; só os
+        que compartilham trigramas suficientes têm a distância calculada.
+        """
+        limite = erros_tolerados(termo)
+        if not limite:
+            return []
+        trigramas_termo = trigramas(termo)
+        comuns = Counter()
+        for trigrama in trigramas_termo:
+            comuns.update(self.trigramas.get(trigrama, ()))
+        # Cada edição desfaz no máximo três trigramas
+        minimo = max(1, len(trigramas_termo) - 3 * limite)
+        encontrados = []
+        for candidato, quantidade in comuns.items():
+            if quantidade < minimo or candidato == termo:
+                continue
+            distancia = distancia_edicao(termo, candidato, limite)
+            if distancia <= limite:
+                encontrados.append((distancia, -quantidade, candidato))
+        encontrados.sort()
+        return [(candidato, distancia) for distancia, _, candidato in encontrados[:CORRECOES_POR_TERMO]]
+
+    def buscar_aproximado(self, consulta, excluir=(), limite=6):
+        """
+        Como ``buscar``, mas termos sem correspondência são trocados pelos mais
+        próximos do vocabulário ("pizsa" -> "pizza"). Uma passada pelos termos.
+        """
+        pontuacao = None
+        for termo in dict.fromkeys(termos(consulta)):
+            parcial = self._pontuar(termo)
+            for correcao, distancia in ([] if termo in self.postings else self.correcoes(termo)):
+                fator = FATOR_APROXIMADO / distancia
+                for produto_id, peso in self.postings[correcao].items():
+                    if peso * fator > parcial.get(produto_id, 0):
+                        parcial[produto_id] = peso * fator
+            if not parcial and len(termo) <= 2:
+                # Termo curto sem correspondência (ex.: "x" de "x-burguer"): ignorado
+                continue
+            if pontuacao is None:
+                pontuacao = parcial
+            else:
+                pontuacao = {pk: p + parcial[pk] for pk, p in pontuacao.items() if pk in parcial}
+            if not pontuacao:
+                return []
+        if not pontuacao:
+            return []
+        for produto_id in excluir:
+            pontuacao.pop(produto_id, None)
+        return self._ordenar(pontuacao, None, limite)
+
+    def categorias(self, produto_ids):
+        """Ids das categorias dos produtos informados"""
+        return {self.documentos[pk].categoria_id for pk in produto_ids if pk in self.documentos}
+
+
+class _MapaLRU:
+    """Dicionário thread-safe limitado; descarta a entrada usada há mais tempo"""
+
+    def __init__(self, tamanho_maximo):
+        self.tamanho_maximo = tamanho_maximo
+        self._itens = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, chave):
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+
+def _tamanho_maximo():
+    return getattr(settings, 'BUSCA_INDICES_MAXIMO', 500)
+
+
+_indices = _MapaLRU(_tamanho_maximo())
+
+# Um lock por restaurante, vivo só enquanto alguma thread o usa
+_locks = weakref.WeakValueDictionary()
+_locks_lock = Lock()
+
+
+def _lock_restaurante(restaurante_id):
+    with _locks_lock:
+        lock = _locks.get(restaurante_id)
+        if lock is None:
+            lock = _locks[restaurante_id] = Lock()
+        return lock
+
+
+def _montar(restaurante, geracao):
+    snapshot = cardapio_cache.obter_snapshot(restaurante)
+    versao = snapshot.get('versao')
+    if versao is None:
+        # Snapshot anterior ao registro de alterações: sem versão confiável
+        return _montar_do_banco(restaurante, geracao)
+
+    indice = IndiceBusca(versao=versao, geracao=geracao)
+    for categoria in snapshot['categorias_menu']:
+        for produto in categoria.produtos.all():
+            produto.categoria = categoria
+            indice.adicionar(produto)
+    logger.debug(f"Índice de busca de {restaurante.slug} montado: {len(indice)} produtos (v{versao})")
+    return indice
+
+
+def _montar_do_banco(restaurante, geracao):
+    indice = IndiceBusca(versao=cardapio_delta.versao_atual(restaurante.pk), geracao=geracao)
+    for produto in _produtos_visiveis(restaurante):
+        indice.adicionar(produto)
+    return indice
+
+
+def _produtos_visiveis(restaurante):
+    """Os mesmos produtos que o snapshot exibe: disponíveis, de categorias ativas"""
+    return Produto.objects.filter(
+        restaurante=restaurante, disponivel=True, categoria__ativo=True
+    ).select_related('categoria')
+
+
+def _atualizar(indice, restaurante, geracao):
+    """Reindexa só o que mudou desde a versão do índice; False se for melhor remontar"""
+    registros = list(
+        AlteracaoCardapio.objects.filter(
+            restaurante=restaurante, id__gt=indice.versao, tipo__in=('produto', 'categoria')
+        ).order_by('id').values_list('id', 'created_at', 'tipo', 'objeto_id')[:LIMITE_ALTERACOES_INCREMENTAIS + 1]
+    )
+    if len(registros) > LIMITE_ALTERACOES_INCREMENTAIS:
+        return False
+
+    if registros:
+        produtos_alterados = {objeto_id for _, _, tipo, objeto_id in registros if tipo == 'produto'}
+        categorias_alteradas = {objeto_id for _, _, tipo, objeto_id in registros if tipo == 'categoria'}
+        produtos_afetados = set(produtos_alterados)
+        produtos_afetados.update(
+            pk for pk, documento in indice.documentos.items() if documento.categoria_id in categorias_alteradas
+        )
+
+        visiveis = _produtos_visiveis(restaurante).filter(
+            Q(pk__in=produtos_alterados) | Q(categoria_id__in=categorias_alteradas)
+        )
+        for produto in visiveis:
+            indice.adicionar(produto)
+            produtos_afetados.discard(produto.pk)
+        # Excluídos, indisponíveis ou em categoria desativada
+        for produto_id in produtos_afetados:
+            indice.remover(produto_id)
+        # Registros ainda não confirmados são reaplicados na próxima atualização
+        indice.versao = cardapio_delta.versao_confirmada(registros, indice.versao)
+
+    indice.geracao = geracao
+    return True
+
+
+def indice_restaurante(restaurante):
+    """
+    Índice de busca atualizado do restaurante. Em regime, uma leitura de cache
+    por chamada e uma consulta ao registro de alterações a cada
+    ``INTERVALO_VERIFICACAO_INDICE`` segundos.
+    """
+    geracao = cardapio_cache.geracao(restaurante.pk)
+    indice = _indices.get(restaurante.pk)
+    if indice is not None and indice.geracao == geracao and time.monotonic() < indice.verificar_em:
+        return indice
+
+    with _lock_restaurante(restaurante.pk):
+        indice = _indices.get(restaurante.pk)
+        agora = time.monotonic()
+        if indice is not None and indice.geracao == geracao:
+            if agora < indice.verificar_em:
+                return indice
+            # Mesma geração: só reindexa se o registro de alterações avançou
+            if cardapio_delta.ultima_versao(restaurante.pk) <= indice.versao:
+                indice.verificar_em = agora + INTERVALO_VERIFICACAO_INDICE
+                return indice
+        # Atualiza uma cópia: outras threads seguem buscando no índice anterior
+        novo = indice.copia() if indice is not None else None
+        if novo is None or not _atualizar(novo, restaurante, geracao):
+            novo = _montar(restaurante, geracao)
+        novo.verificar_em = agora + INTERVALO_VERIFICACAO_INDICE
+        _indices.set(restaurante.pk, novo)
+    return novo
+
+
+class ServicoBusca:
+    """
+    Interface dos backends de busca usados pela loja. ``BUSCA_BACKEND`` escolhe
+    o backend da instalação: ``memoria`` (padrão) ou ``fulltext`` (MySQL).
+    """
+
+    def buscar(self, restaurante, consulta, categoria=None):
+        """Ids dos produtos que casam com a consulta, por relevância"""
+        raise NotImplementedError
+
+    def sugestoes(self, restaurante, consulta, excluir=(), limite=6):
+        """Ids de produtos próximos da consulta, para quando há poucos resultados"""
+        raise NotImplementedError
+
+    def categorias(self, restaurante, produto_ids):
+        """Ids das categorias dos produtos informados"""
+        return set(Produto.objects.filter(pk__in=list(produto_ids)).values_list('categoria_id', flat=True))
+
+
+class BuscaMemoria(ServicoBusca):
+    """Índice invertido em memória por processo (``IndiceBusca``)"""
+
+    def buscar(self, restaurante, consulta, categoria=None):
+        return indice_restaurante(restaurante).buscar(consulta, categoria=categoria)
+
+    def sugestoes(self, restaurante, consulta, excluir=(), limite=6):
+        # Primeiro tolerando erros de digitação, depois com qualquer termo da consulta
+        indice = indice_restaurante(restaurante)
+        return (
+            indice.buscar_aproximado(consulta, excluir=excluir, limite=limite)
+            or indice.similares(consulta, excluir=excluir, limite=limite)
+        )
+
+    def categorias(self, restaurante, produto_ids):
+        return indice_restaurante(restaurante).categorias(produto_ids)
+
+
+_servico = None
+
+
+def servico():
+    """Backend de busca configurado em ``BUSCA_BACKEND``"""
+    global _servico
+    if _servico is None:
+        nome = getattr(settings, 'BUSCA_BACKEND', 'memoria')
+        if nome == 'fulltext' and connection.vendor == 'mysql':
+            from .busca_fulltext import BuscaFullText
+            _servico = BuscaFullText()
+        else:
+            if nome != 'memoria':
+                logger.warning(f"Backend de busca '{nome}' indisponível com o banco {connection.vendor}; usando 'memoria'")
+            _servico = BuscaMemoria()
+    return _servico
+
+
+def buscar(restaurante, consulta, categoria=None):
+    """Ids dos produtos do restaurante que casam com a consulta, por relevância"""
+    return servico().buscar(restaurante, consulta, categoria=categoria)
+
+
+def _chave_resultado(restaurante_id, geracao, consulta, categoria):
+    assinatura = hashlib.sha1(f"{type(servico()).__name__}|{consulta}|{categoria or ''}".encode()).hexdigest()
+    return f"busca:{restaurante_id}:v{geracao}:{assinatura}"
+
+
+def resultado(restaurante, consulta, categoria=None):
+    """
+    ``{'produtos', 'categorias', 'sugestoes'}`` (ids) da consulta no restaurante.
+    Guardado no cache por ``BUSCA_CACHE_TTL`` segundos, com a consulta
+    normalizada e a geração do cardápio na chave: mudanças no catálogo valem na hora.
+    """
+    ttl = getattr(settings, 'BUSCA_CACHE_TTL', 60)
+    chave = None
+    if ttl > 0:
+        chave = _chave_resultado(restaurante.pk, cardapio_cache.geracao(restaurante.pk), normalizar(consulta), categoria)
+        dados = cache.get(chave)
+        if dados is not None:
+            return dados
+
+    servico_busca = servico()
+    produto_ids = servico_busca.buscar(restaurante, consulta, categoria=categoria)
+    dados = {
+        'produtos': produto_ids,
+        'categorias': servico_busca.categorias(restaurante, produto_ids) if produto_ids else set(),
+        # Poucos resultados: sugere produtos próximos
+        'sugestoes': (
+            servico_busca.sugestoes(restaurante, consulta, excluir=produto_ids, limite=6)
+            if len(produto_ids) < 3 else []
+        ),
+    }
+    if chave is not None:
+        cache.set(chave, dados, timeout=ttl)
+    return dados
+
+
+def carregar_produtos(produto_ids):
+    """Produtos dos ids informados, na mesma ordem"""
+    produtos = Produto.objects.in_bulk(list(produto_ids))
+    return [produtos[pk] for pk in produto_ids if pk in produtos]
+
+
+class SugestoesBusca:
+    """Nomes de produtos e categorias em arranjo ordenado, para autocompletar por prefixo"""
+
+    def __init__(self, produtos, categorias):
+        # produtos: [(nome, peso)]; categorias: [nome]
+        self.entradas = [(nome, 'produto', peso) for nome, peso in produtos]
+        self.entradas += [(nome, 'categoria', 0) for nome in categorias]
+        chaves = []
+        for posicao_entrada, (nome, _, _) in enumerate(self.entradas):
+            palavras = normalizar(nome).split()
+            # Uma chave por palavra: "calabresa especial" e "especial"
+            for inicio in range(len(palavras)):
+                chaves.append((' '.join(palavras[inicio:]), inicio == 0, posicao_entrada))
+        chaves.sort()
+        self._chaves = [chave for chave, _, _ in chaves]
+        self._referencias = [(do_inicio, posicao) for _, do_inicio, posicao in chaves]
+
+    @classmethod
+    def do_indice(cls, indice, pesos):
+        produtos = [(documento.nome, pesos.get(pk, 0)) for pk, documento in indice.documentos.items()]
+        categorias = {documento.categoria_nome for documento in indice.documentos.values()}
+        return cls(produtos, sorted(categorias))
+
+    def sugerir(self, consulta, limite=8, limite_categorias=2):
+        """Nomes que começam com a consulta (ou têm palavra que começa), os mais pedidos primeiro"""
+        prefixo = normalizar(consulta)
+        if not prefixo:
+            return []
+
+        encontrados = {}
+        posicao = bisect_left(self._chaves, prefixo)
+        fim = min(len(self._chaves), posicao + LIMITE_VARREDURA_SUGESTOES)
+        while posicao < fim and self._chaves[posicao].startswith(prefixo):
+            do_inicio, entrada = self._referencias[posicao]
+            encontrados[entrada] = encontrados.get(entrada, False) or do_inicio
+            posicao += 1
+
+        def ordem(entrada):
+            nome, _, peso = self.entradas[entrada]
+            # Nome que começa com a consulta antes de palavra no meio do nome
+            return (not encontrados[entrada], -peso, nome)
+
+        produtos, categorias = [], []
+        for entrada in sorted(encontrados, key=ordem):
+            nome, tipo, _ = self.entradas[entrada]
+            (produtos if tipo == 'produto' else categorias).append(nome)
+        categorias = categorias[:limite_categorias]
+        sugestoes = list(dict.fromkeys(produtos[:limite - len(categorias)] + categorias))
+        return sugestoes[:limite]
+
+
+_sugestoes = _MapaLRU(_tamanho_maximo())
+
+
+def sugestoes_restaurante(restaurante):
+    """
+    Sugestões do restaurante, remontadas quando o cardápio ou o ranking mudam.
+    As versões são verificadas no máximo a cada ``INTERVALO_VERIFICACAO_SUGESTOES`` segundos.
+    """
+    agora = time.monotonic()
+    entrada = _sugestoes.get(restaurante.pk)
+    if entrada is not None and entrada[1] > agora:
+        return entrada[2]
+
+    # Cada atualização do índice gera um objeto novo: a identidade serve de versão
+    indice = indice_restaurante(restaurante)
+    versao = (indice, versao_ranking(restaurante.pk))
+    if entrada is not None and entrada[0] == versao:
+        sugestoes = entrada[2]
+    else:
+        pesos = dict(
+            PopularidadeProduto.objects.filter(restaurante_id=restaurante.pk).values_list('produto_id', 'pontuacao')
+        )
+        sugestoes = SugestoesBusca.do_indice(indice, pesos)
+    _sugestoes.set(restaurante.pk, (versao, agora + INTERVALO_VERIFICACAO_SUGESTOES, sugestoes))
+    return sugestoes
+
+
+def sugerir(restaurante, consulta, limite=8):
+    """Nomes de produtos e categorias para autocompletar a consulta"""
+    return sugestoes_restaurante(restaurante).sugerir(consulta, limite=limite)
@@ -0,0 +1,69 @@
+"""
+Backend de busca com os índices FULLTEXT do MySQL (``BUSCA_BACKEND = 'fulltext'``).
+
+Para catálogos grandes e para a busca entre restaurantes (marketplace), em vez
+do índice em memória por processo. Usa ``MATCH ... AGAINST`` em modo de
+linguagem natural sobre os índices criados pela migração
+``0023_fulltext_busca``:
+
+- ``ft_produtos_nome``: ``produtos(nome)``
+- ``ft_produtos_texto``: ``produtos(nome, descricao, ingredientes)``
+- ``ft_categorias_nome``: ``categorias(nome)``
+
+A relevância soma as três correspondências, com o nome do produto e da
+categoria pesando mais. Acentos e maiúsculas seguem a collation das colunas
+(``utf8mb4_*_ci`` já as ignora); palavras menores que
+``innodb_ft_min_token_size`` (3 por padrão) e as stopwords do InnoDB não são
+indexadas.
+"""
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .busca import PESO_CATEGORIA, PESO_NOME, ServicoBusca
+from .models import Categoria, Produto
+
+# Máximo de ids devolvidos por busca (a view pagina sobre eles)
+LIMITE_RESULTADOS = 1000
+
+MODO_NATURAL = 'IN NATURAL LANGUAGE MODE'
+MODO_EXPANSAO = 'IN NATURAL LANGUAGE MODE WITH QUERY EXPANSION'
+
+
+def _relevancia(consulta, modo):
+    """Expressão de relevância; usa a tabela de categorias da junção de ``categoria__ativo``"""
+    q = connection.ops.quote_name
+    produtos = q(Produto._meta.db_table)
+    categorias = q(Categoria._meta.db_table)
+    nome, descricao, ingredientes = q('nome'), q('descricao'), q('ingredientes')
+    sql = (
+        f"MATCH({produtos}.{nome}) AGAINST (%s {modo}) * {PESO_NOME}"
+        f" + MATCH({produtos}.{nome}, {produtos}.{descricao}, {produtos}.{ingredientes}) AGAINST (%s {modo})"
+        f" + MATCH({categorias}.{nome}) AGAINST (%s {modo}) * {PESO_CATEGORIA}"
+    )
+    return RawSQL(sql, [consulta, consulta, consulta])
+
+
+class BuscaFullText(ServicoBusca):
+    """Busca no banco com ``MATCH ... AGAINST``; ``restaurante=None`` busca em todos"""
+
+    def _produtos(self, restaurante, consulta, modo):
+        produtos = Produto.objects.filter(disponivel=True, categoria__ativo=True)
+        if restaurante is not None:
+            produtos = produtos.filter(restaurante=restaurante)
+        return produtos.annotate(relevancia=_relevancia(consulta, modo)).filter(relevancia__gt=0)
+
+    def buscar(self, restaurante, consulta, categoria=None):
+        if not consulta.strip():
+            return []
+        produtos = self._produtos(restaurante, consulta, MODO_NATURAL)
+        if categoria:
+            produtos = produtos.filter(categoria__slug=categoria)
+        return list(produtos.order_by('-relevancia', 'nome').values_list('pk', flat=True)[:LIMITE_RESULTADOS])
+
+    def sugestoes(self, restaurante, consulta, excluir=(), limite=6):
+        # A expansão da consulta traz produtos relacionados aos primeiros resultados
+        if not consulta.strip():
+            return []
+        produtos = self._produtos(restaurante, consulta, MODO_EXPANSAO).exclude(pk__in=list(excluir))
+        return list(produtos.order_by('-relevancia', 'nome').values_list('pk', flat=True)[:limite])
@@ -0,0 +1,172 @@
+"""
+Cache em dois níveis para as consultas de CEP (ViaCEP) e coordenadas (OpenCage).
+
+Nível 1: LRU em memória do processo (rápido, perdido a cada restart).
+Nível 2: tabela ``cache_geocodificacao`` no banco (compartilhada entre workers).
+
+Ambos respeitam o TTL configurado em ``GEOCODIFICACAO_CACHE_TTL_DIAS``.
+"""
+
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _ttl_segundos() -> int:
+    return int(getattr(settings, 'GEOCODIFICACAO_CACHE_TTL_DIAS', 90)) * 86400
+
+
+class _LRUCache:
+    """LRU thread-safe com expiração por item"""
+
+    def __init__(self, tamanho_maximo: int = 2048):
+        self.tamanho_maximo = tamanho_maximo
+        self._itens = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em <= time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor, ttl: int):
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+
+
+_lru = _LRUCache(getattr(settings, 'GEOCODIFICACAO_CACHE_LRU_TAMANHO', 2048))
+
+
+def normalizar_cep(cep: str) -> str:
+    """Mantém apenas os dígitos do CEP"""
+    return re.sub(r'\D', '', str(cep or ''))
+
+
+def normalizar_endereco(endereco: str) -> str:
+    """Normaliza o endereço: sem acentos, minúsculo e com espaços colapsados"""
+    texto = unicodedata.normalize('NFKD', str(endereco or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', texto).strip().lower()
+
+
+def _chave_endereco(endereco: str) -> str:
+    return hashlib.sha256(normalizar_endereco(endereco).encode('utf-8')).hexdigest()
+
+
+def _buscar_banco(tipo: str, chave: str):
+    from .models import CacheGeocodificacao
+    try:
+        return CacheGeocodificacao.objects.filter(
+            tipo=tipo, chave=chave, expira_em__gt=timezone.now()
+        ).first()
+    except DatabaseError as e:
+        logger.warning(f"Cache de geocodificação indisponível: {e}")
+        return None
+
+
+def _salvar_banco(tipo: str, chave: str, consulta: str, **campos):
+    from .models import CacheGeocodificacao
+    try:
+        CacheGeocodificacao.objects.update_or_create(
+            tipo=tipo,
+            chave=chave,
+            defaults={
+                'consulta': consulta[:300],
+                'expira_em': timezone.now() + timedelta(seconds=_ttl_segundos()),
+                **campos,
+            },
+        )
+    except DatabaseError as e:
+        logger.warning(f"Não foi possível gravar cache de geocodificação: {e}")
+
+
+def buscar_cep(cep: str) -> Optional[dict]:
+    """Retorna o payload ViaCEP em cache para o CEP, ou None"""
+    chave = normalizar_cep(cep)
+    if not chave:
+        return None
+
+    dados = _lru.get(('cep', chave))
+    if dados is not None:
+        return dict(dados)
+
+    registro = _buscar_banco('cep', chave)
+    if registro is None:
+        return None
+    _lru.set(('cep', chave), registro.dados, _ttl_segundos())
+    return dict(registro.dados)
+
+
+def guardar_cep(cep: str, dados: dict) -> None:
+    """Guarda o payload ViaCEP do CEP nos dois níveis de cache"""
+    chave = normalizar_cep(cep)
+    if not chave:
+        return
+    _lru.set(('cep', chave), dict(dados), _ttl_segundos())
+    _salvar_banco('cep', chave, chave, dados=dados)
+
+
+def buscar_coordenadas(endereco: str) -> Optional[Tuple[float, float]]:
+    """Retorna as coordenadas (lat, lng) em cache para o endereço, ou None"""
+    chave = _chave_endereco(endereco)
+
+    coordenadas = _lru.get(('endereco', chave))
+    if coordenadas is not None:
+        return coordenadas
+
+    registro = _buscar_banco('endereco', chave)
+    if registro is None or registro.latitude is None or registro.longitude is None:
+        return None
+    coordenadas = (registro.latitude, registro.longitude)
+    _lru.set(('endereco', chave), coordenadas, _ttl_segundos())
+    return coordenadas
+
+
+def guardar_coordenadas(endereco: str, latitude: float, longitude: float,
+                        dados: Optional[dict] = None) -> None:
+    """Guarda as coordenadas do endereço nos dois níveis de cache"""
+    chave = _chave_endereco(endereco)
+    coordenadas = (float(latitude), float(longitude))
+    _lru.set(('endereco', chave), coordenadas, _ttl_segundos())
+    _salvar_banco(
+        'endereco', chave, normalizar_endereco(endereco),
+        latitude=coordenadas[0], longitude=coordenadas[1], dados=dados or {},
+    )
+
+
+def limpar_cache_memoria() -> None:
+    """Esvazia o nível em memória (útil em testes e após importações)"""
+    _lru.clear()
+
+
+def remover_expirados() -> int:
+    """Remove do banco os registros expirados e retorna quantos foram apagados"""
+    from .models import CacheGeocodificacao
+    removidos, _ = CacheGeocodificacao.objects.filter(expira_em__lte=timezone.now()).delete()
+    return removidos
@@ -0,0 +1,189 @@
+"""
+Snapshot do cardápio por restaurante, guardado no cache do Django.
+
+O snapshot (categorias ativas com os produtos disponíveis pré-carregados e os
+produtos em destaque) é indexado por um contador de geração por restaurante.
+Os signals de ``Produto``, ``Categoria``, ``OpcaoPersonalizacao`` e
+``ItemPersonalizacao`` incrementam o contador; o snapshot antigo simplesmente
+deixa de ser lido e expira pelo TTL. Em regime, cada página da loja obtém o
+cardápio com duas leituras de cache e nenhuma consulta ao catálogo.
+
+O JSON de produtos usado pelo carrinho no navegador (com a versão do registro
+de alterações, ver ``cardapio_delta``) também é gerado uma vez por geração e
+guardado comprimido (gzip), com um ETag forte derivado do conteúdo, para ser
+servido com revalidação (304) em vez de embutido na página.
+
+O contador de geração precisa estar num cache compartilhado entre os
+workers (``CACHE_REDIS_URL``): com o cache local, o incremento só vale para o
+processo que gravou e os demais servem o cardápio antigo. Fora do DEBUG o
+``check`` falha nessa configuração (``core.checks``).
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from . import cardapio_delta
+from .models import Produto
+
+logger = logging.getLogger(__name__)
+
+PRODUTOS_DESTAQUE_LIMITE = 6
+
+
+def _ttl():
+    return getattr(settings, 'CARDAPIO_CACHE_TTL', 60 * 60 * 24)
+
+
+def _chave_geracao(restaurante_id):
+    return f"cardapio:{restaurante_id}:geracao"
+
+
+def _chave_snapshot(restaurante_id, geracao):
+    return f"cardapio:{restaurante_id}:v{geracao}"
+
+
+def _chave_modificado(restaurante_id):
+    return f"cardapio:{restaurante_id}:modificado"
+
+
+def _semente():
+    # Contador perdido (evicção, cache reiniciado) recomeça num valor nunca usado:
+    # snapshots, JSON e ETags de gerações antigas podem continuar no cache
+    return int(time.time() * 1000)
+
+
+def geracao(restaurante_id):
+    """Geração atual do cardápio do restaurante (semeada com o timestamp em ms)"""
+    chave = _chave_geracao(restaurante_id)
+    valor = cache.get(chave)
+    if valor is None:
+        semente = _semente()
+        cache.add(chave, semente, timeout=None)
+        valor = cache.get(chave, semente)
+    return valor
+
+
+def invalidar(restaurante_id):
+    """Avança a geração do cardápio após o commit da transação corrente"""
+    if not restaurante_id:
+        return
+
+    def _incrementar():
+        chave = _chave_geracao(restaurante_id)
+        try:
+            cache.incr(chave)
+        except ValueError:
+            # Chave ausente: recomeça num valor que nenhuma geração anterior usou
+            cache.set(chave, _semente(), timeout=None)
+        cache.set(_chave_modificado(restaurante_id), int(time.time()), timeout=None)
+        logger.debug(f"Cardápio do restaurante {restaurante_id} invalidado")
+
+    transaction.on_commit(_incrementar)
+
+
+def versao(restaurante_id):
+    """
+    ``(geracao, modificado_em)`` do cardápio numa única leitura de cache;
+    ``modificado_em`` (timestamp) é None se a última mudança não é conhecida.
+    """
+    valores = cache.get_many([_chave_geracao(restaurante_id), _chave_modificado(restaurante_id)])
+    geracao_atual = valores.get(_chave_geracao(restaurante_id))
+    if geracao_atual is None:
+        return geracao(restaurante_id), None
+    return geracao_atual, valores.get(_chave_modificado(restaurante_id))
+
+
+def _montar_snapshot(restaurante):
+    # Toda alteração registrada até esta versão já está nos dados lidos abaixo
+    versao = cardapio_delta.versao_atual(restaurante.pk)
+    categorias = list(
+        restaurante.categorias.filter(ativo=True).prefetch_related(
+            Prefetch('produtos', queryset=Produto.objects.filter(disponivel=True).order_by('ordem', 'nome'))
+        ).order_by('ordem', 'nome')
+    )
+    produtos_destaque = list(
+        restaurante.produtos.filter(
+            destaque=True,
+            disponivel=True
+        ).select_related('categoria')[:PRODUTOS_DESTAQUE_LIMITE]
+    )
+    return {
+        'versao': versao,
+        'categorias_menu': categorias,
+        'produtos_destaque': produtos_destaque,
+    }
+
+
+def obter_snapshot(restaurante):
+    """
+    Retorna ``{'versao', 'categorias_menu': [...], 'produtos_destaque': [...]}``
+    do cache, montando e guardando o snapshot da geração atual quando ausente.
+    ``versao`` é a versão do registro de alterações refletida no snapshot.
+    """
+    chave = _chave_snapshot(restaurante.pk, geracao(restaurante.pk))
+    snapshot = cache.get(chave)
+    if snapshot is None:
+        snapshot = _montar_snapshot(restaurante)
+        cache.set(chave, snapshot, timeout=_ttl())
+    return snapshot
+
+
+def _chave_artefato(restaurante_id, geracao_atual):
+    return f"cardapio:{restaurante_id}:v{geracao_atual}:json"
+
+
+def dados_produto(produto):
+    """Dados do produto como os clientes do cardápio (JSON e sincronização) os recebem"""
+    preco_final = produto.preco_promocional if produto.tem_promocao else produto.preco
+    return {
+        'id': str(produto.id),
+        'nome': produto.nome,
+        'preco': float(preco_final),
+        'categoria': produto.categoria.slug if produto.categoria else '',
+        'imagem': produto.imagem_principal.url if produto.imagem_principal else '/static/img/placeholder.jpg',
+        'disponivel': produto.disponivel,
+    }
+
+
+def _montar_artefato(restaurante):
+    # Versão do registro de alterações antes da leitura: a partir dela o cliente
+    # pede os deltas (reaplicar uma alteração já incluída não tem efeito)
+    versao = cardapio_delta.versao_atual(restaurante.pk)
+    produtos = restaurante.produtos.filter(disponivel=True).select_related('categoria').order_by('ordem', 'nome')
+    # Só o conteúdo entra no ETag: gerações sem mudança visível mantêm o mesmo ETag
+    conteudo = json.dumps(
+        {'versao': versao, 'produtos': {str(produto.id): dados_produto(produto) for produto in produtos}},
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+    return {
+        'etag': hashlib.sha256(conteudo).hexdigest()[:32],
+        'gzip': gzip.compress(conteudo, compresslevel=9, mtime=0),
+        'tamanho': len(conteudo),
+    }
+
+
+def obter_artefato_json(restaurante):
+    """
+    Retorna ``{'etag', 'gzip', 'tamanho'}`` com o JSON de produtos do
+    cardápio da geração atual, comprimido; monta e guarda quando ausente.
+    """
+    geracao_atual = geracao(restaurante.pk)
+    chave = _chave_artefato(restaurante.pk, geracao_atual)
+    artefato = cache.get(chave)
+    if artefato is None:
+        artefato = _montar_artefato(restaurante)
+        cache.set(chave, artefato, timeout=_ttl())
+        logger.info(
+            f"JSON do cardápio de {restaurante.nome} (v{geracao_atual}) gerado: "
+            f"{artefato['tamanho']} bytes, {len(artefato['gzip'])} comprimido"
+        )
+    return artefato
@@ -0,0 +1,217 @@
+"""
+Sincronização incremental do cardápio (``AlteracaoCardapio``).
+
+Os signals de ``Produto``, ``Categoria``, ``OpcaoPersonalizacao`` e
+``ItemPersonalizacao`` registram cada objeto alterado ou excluído, após o
+commit. O id do registro é a versão: cada objeto mantém só o registro mais
+recente, então o log cresce com o número de objetos (e exclusões), não com o de
+edições.
+
+Clientes de longa duração (tablets de autoatendimento, carrinho no navegador)
+carregam o cardápio completo uma vez (``cardapio.json`` traz a ``versao``) e
+depois pedem apenas o que mudou desde a versão que têm::
+
+    GET /<slug>/cardapio/alteracoes/?desde=<versao>
+
+Reaplicar uma alteração já conhecida não tem efeito, então sobreposições entre
+o cardápio completo e o primeiro delta são inofensivas.
+
+O id é atribuído no INSERT mas só fica visível no commit: com dois workers
+gravando ao mesmo tempo, o id N+1 pode aparecer antes do N. Por isso a versão
+entregue aos clientes nunca é o ``MAX(id)``, e sim o maior id entre os
+registros com mais de ``JANELA_CONFIRMACAO`` (já confirmados, e todos os ids
+menores também). Os registros mais novos são enviados mesmo assim e voltam na
+próxima chamada, o que é inofensivo.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from itertools import takewhile
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import AlteracaoCardapio, Categoria, ItemPersonalizacao, OpcaoPersonalizacao, Produto
+
+logger = logging.getLogger(__name__)
+
+# Registros devolvidos por chamada; o cliente continua pedindo enquanto ``mais``
+LIMITE_POR_PAGINA = 500
+
+# Registros mais novos que isto ainda podem ter ids menores não confirmados
+# (a gravação em ``registrar`` é uma transação curta, após o commit)
+JANELA_CONFIRMACAO = timedelta(seconds=10)
+
+TIPOS = {
+    Produto: 'produto',
+    Categoria: 'categoria',
+    OpcaoPersonalizacao: 'opcao',
+    ItemPersonalizacao: 'item',
+}
+
+# Nome da lista no JSON de resposta para cada tipo
+_LISTAS = {
+    'produto': 'produtos',
+    'categoria': 'categorias',
+    'opcao': 'opcoes_personalizacao',
+    'item': 'itens_personalizacao',
+}
+
+
+def registrar(restaurante_id, instancia, removido=False):
+    """Registra, após o commit, que ``instancia`` foi alterada ou excluída"""
+    tipo = TIPOS.get(type(instancia))
+    if not restaurante_id or tipo is None:
+        return
+    objeto_id = instancia.pk
+
+    def _gravar():
+        try:
+            with transaction.atomic():
+                AlteracaoCardapio.objects.filter(
+                    restaurante_id=restaurante_id, tipo=tipo, objeto_id=objeto_id
+                ).delete()
+                AlteracaoCardapio.objects.create(
+                    restaurante_id=restaurante_id, tipo=tipo, objeto_id=objeto_id, removido=removido
+                )
+        except Exception as e:
+            logger.warning(f"Não foi possível registrar a alteração de {tipo} {objeto_id}: {e}")
+
+    transaction.on_commit(_gravar)
+
+
+def _limite_confirmacao():
+    return timezone.now() - JANELA_CONFIRMACAO
+
+
+def versao_confirmada(registros, desde):
+    """
+    Maior id de ``registros`` (ordenados por id, com ``created_at`` na segunda
+    posição) até o qual todos estão confirmados; ``desde`` se nenhum estiver.
+    """
+    limite = _limite_confirmacao()
+    confirmados = list(takewhile(lambda registro: registro[1] < limite, registros))
+    return confirmados[-1][0] if confirmados else desde
+
+
+def versao_atual(restaurante_id):
+    """
+    Versão segura do cardápio do restaurante (0 se nunca houve alteração): todas
+    as alterações com id até ela já estão visíveis.
+    """
+    return AlteracaoCardapio.objects.filter(
+        restaurante_id=restaurante_id, created_at__lt=_limite_confirmacao()
+    ).aggregate(versao=Max('id'))['versao'] or 0
+
+
+def ultima_versao(restaurante_id):
+    """Maior id registrado, confirmado ou não (só para detectar novidades)"""
+    return AlteracaoCardapio.objects.filter(restaurante_id=restaurante_id).aggregate(
+        versao=Max('id')
+    )['versao'] or 0
+
+
+def _dados_categoria(categoria):
+    return {
+        'id': str(categoria.id),
+        'nome': categoria.nome,
+        'slug': categoria.slug,
+        'ordem': categoria.ordem,
+        'ativo': categoria.ativo,
+    }
+
+
+def _dados_opcao(opcao):
+    return {
+        'id': str(opcao.id),
+        'produto': str(opcao.produto_id),
+        'nome': opcao.nome,
+        'tipo': opcao.tipo,
+        'obrigatorio': opcao.obrigatorio,
+        'quantidade_minima': opcao.quantidade_minima,
+        'quantidade_maxima': opcao.quantidade_maxima,
+        'ordem': opcao.ordem,
+        'ativo': opcao.ativo,
+    }
+
+
+def _dados_item(item):
+    return {
+        'id': str(item.id),
+        'opcao': str(item.opcao_id),
+        'nome': item.nome,
+        'preco_adicional': float(item.preco_adicional),
+        'ordem': item.ordem,
+        'ativo': item.ativo,
+    }
+
+
+def _carregar(restaurante, tipo, ids):
+    """Estado atual dos objetos alterados, serializado, por id"""
+    from .cardapio_cache import dados_produto
+
+    if tipo == 'produto':
+        objetos = Produto.objects.filter(restaurante=restaurante, pk__in=ids).select_related('categoria')
+        serializar = dados_produto
+    elif tipo == 'categoria':
+        objetos = Categoria.objects.filter(restaurante=restaurante, pk__in=ids)
+        serializar = _dados_categoria
+    elif tipo == 'opcao':
+        objetos = OpcaoPersonalizacao.objects.filter(produto__restaurante=restaurante, pk__in=ids)
+        serializar = _dados_opcao
+    else:
+        objetos = ItemPersonalizacao.objects.filter(opcao__produto__restaurante=restaurante, pk__in=ids)
+        serializar = _dados_item
+    return {str(objeto.pk): serializar(objeto) for objeto in objetos}
+
+
+def alteracoes_desde(restaurante, desde, limite=LIMITE_POR_PAGINA):
+    """
+    Objetos alterados (estado atual) e ids removidos após a versão ``desde``.
+    ``versao`` é a versão que o cliente deve enviar na próxima chamada e
+    ``mais`` indica que há outra página. ``recarregar`` pede que o cliente
+    descarte o cardápio local (versão desconhecida pelo servidor).
+    """
+    registros = list(
+        AlteracaoCardapio.objects.filter(restaurante=restaurante, id__gt=desde)
+        .order_by('id')
+        .values_list('id', 'created_at', 'tipo', 'objeto_id', 'removido')[:limite + 1]
+    )
+    mais = len(registros) > limite
+    registros = registros[:limite]
+    versao = versao_confirmada(registros, desde)
+
+    resposta = {
+        'versao': versao,
+        # Só pede a próxima página na hora se esta já estiver toda confirmada
+        'mais': mais and registros[-1][0] == versao,
+        'recarregar': False,
+        'removidos': {lista: [] for lista in _LISTAS.values()},
+        **{lista: [] for lista in _LISTAS.values()},
+    }
+    if not registros:
+        # Versão maior que qualquer registro: o servidor perdeu o histórico
+        atual = ultima_versao(restaurante.pk)
+        if desde > atual:
+            resposta.update(versao=versao_atual(restaurante.pk), recarregar=True)
+        return resposta
+
+    alterados = defaultdict(list)
+    for _, _, tipo, objeto_id, removido in registros:
+        if removido:
+            resposta['removidos'][_LISTAS[tipo]].append(str(objeto_id))
+        else:
+            alterados[tipo].append(objeto_id)
+
+    for tipo, ids in alterados.items():
+        dados = _carregar(restaurante, tipo, ids)
+        for objeto_id in ids:
+            objeto = dados.get(str(objeto_id))
+            if objeto is None:
+                # Excluído depois do registro; o marcador de exclusão vem numa próxima página
+                resposta['removidos'][_LISTAS[tipo]].append(str(objeto_id))
+            else:
+                resposta[_LISTAS[tipo]].append(objeto)
+    return resposta
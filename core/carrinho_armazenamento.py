@@ -0,0 +1,651 @@
+"""
+Estado quente do carrinho fora do banco, com gravação posterior (write-behind).
+
+Com ``CARRINHO_ARMAZENAMENTO = 'redis'`` cada carrinho é um hash compacto no
+Redis (``carrinho:<id>``), uma linha por combinação produto + personalização:
+
+- ``d:<linha>``: ``[produto_id, preco_unitario, observacoes, dados_personalizacao]`` em JSON
+- ``q:<linha>``: quantidade (``HINCRBY``, então cliques repetidos somam sem disputa)
+- ``_c``: marca de carrinho carregado do banco
+- ``_b``: ``Carrinho.updated_at`` (µs) do banco no carregamento ou na última
+  gravação; se o banco estiver mais novo, o hash é obsoleto e é recarregado
+- ``_v``: versão, usada na chave do resumo em cache (começa no instante do
+  carregamento, em ms, e soma 1 a cada alteração)
+
+O id da linha é derivado do carrinho e da assinatura da linha
+(``carrinho_assinatura``), então adicionar o mesmo item de novo cai na mesma
+linha e o id é o mesmo do ``CarrinhoItem`` gravado depois (o caminho pelo
+banco também usa ``id_linha`` como pk). Cada alteração marca o carrinho como
+pendente; a task ``persistir_carrinhos`` grava os pendentes em
+``Carrinho``/``CarrinhoItem`` e o checkout grava o carrinho na hora
+(``materializar``) antes de criar o pedido.
+
+Um carrinho ausente do armazenamento (expirado, Redis reiniciado) é
+recarregado do banco no próximo acesso. Alterações ainda não gravadas se
+perdem se o Redis perder a chave antes da task rodar.
+
+Redis fora do ar: a operação que falhou levanta ``ArmazenamentoIndisponivel``
+e o ``CarrinhoService`` a refaz pelo banco; por ``_PAUSA_REDIS_SEGUNDOS``
+``obter()`` devolve None e o processo usa só o banco. Cada gravação pelo banco
+avança ``Carrinho.updated_at``, então ao voltar o Redis os hashes desses
+carrinhos (em qualquer worker) ficam obsoletos e são recarregados do banco,
+descartando alterações do Redis que não tinham sido gravadas.
+
+``'memoria'`` é o equivalente local, por processo, para testes e
+desenvolvimento; ``'banco'`` (padrão) mantém o carrinho só no banco.
+"""
+
+import functools
+import json
+import logging
+import time
+import uuid
+from collections import namedtuple
+from decimal import Decimal
+from threading import Lock
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .carrinho_assinatura import assinatura_linha
+from .models import Carrinho, CarrinhoItem, CarrinhoItemPersonalizacao, ItemPersonalizacao, Produto
+
+logger = logging.getLogger(__name__)
+
+Linha = namedtuple('Linha', 'produto_id preco_unitario observacoes dados_personalizacao quantidade')
+
+CHAVE_PENDENTES = 'carrinho:pendentes'
+
+# Após uma falha do Redis, usa só o banco por este tempo antes de tentar de novo
+_PAUSA_REDIS_SEGUNDOS = 30
+
+_redis_pausado_ate = 0.0
+
+
+class ArmazenamentoIndisponivel(Exception):
+    """O Redis do carrinho não respondeu; a operação deve seguir pelo banco"""
+
+# Carrega as linhas do banco só se o carrinho ainda não estiver no hash
+_SCRIPT_CARREGAR = """
+if redis.call('HEXISTS', KEYS[1], '_c') == 1 then
+    return 0
+end
+for i = 2, #ARGV - 3, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i - 1], ARGV[i])
+end
+redis.call('HSET', KEYS[1], '_c', 1, '_v', ARGV[#ARGV - 2], '_b', ARGV[#ARGV - 1])
+redis.call('EXPIRE', KEYS[1], ARGV[#ARGV])
+return 1
+"""
+
+# Esvazia o hash mantendo a marca do banco
+_SCRIPT_LIMPAR = """
+local marca = redis.call('HGET', KEYS[1], '_b') or 0
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], '_c', 1, '_v', ARGV[1], '_b', marca)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+"""
+
+# As alterações abaixo devolvem -1 se o hash expirou depois do carregamento
+# (sem ``_c``), em vez de criar um hash parcial sem as marcas
+
+# Soma a quantidade da linha, criando-a se necessário
+_SCRIPT_SOMAR = """
+if redis.call('HEXISTS', KEYS[1], '_c') == 0 then
+    return -1
+end
+redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[2])
+local total = redis.call('HINCRBY', KEYS[1], ARGV[3], ARGV[4])
+redis.call('HINCRBY', KEYS[1], '_v', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return total
+"""
+
+# Define a quantidade só se a linha existir
+_SCRIPT_DEFINIR = """
+if redis.call('HEXISTS', KEYS[1], '_c') == 0 then
+    return -1
+end
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('HINCRBY', KEYS[1], '_v', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# Remove a linha, se existir
+_SCRIPT_REMOVER = """
+if redis.call('HEXISTS', KEYS[1], '_c') == 0 then
+    return -1
+end
+local removidos = redis.call('HDEL', KEYS[1], ARGV[1], ARGV[2])
+if removidos > 0 then
+    redis.call('HINCRBY', KEYS[1], '_v', 1)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return removidos > 0 and 1 or 0
+"""
+
+
+def _ttl():
+    return getattr(settings, 'CARRINHO_ARMAZENAMENTO_TTL', 60 * 60 * 24 * 7)
+
+
+def _versao_inicial():
+    # Um carrinho recarregado não repete versões de resumos ainda em cache
+    return int(time.time() * 1000)
+
+
+def marca_banco(momento):
+    """``updated_at`` em µs inteiros (sem arredondamento de float)"""
+    return int(momento.replace(microsecond=0).timestamp()) * 1_000_000 + momento.microsecond
+
+
+def id_linha(carrinho_id, produto_id, dados_personalizacao):
+    """Id estável da linha: o mesmo produto com a mesma personalização cai na mesma linha"""
+    return uuid.uuid5(uuid.UUID(str(carrinho_id)), assinatura_linha(produto_id, dados_personalizacao))
+
+
+def _codificar(linha):
+    return json.dumps(
+        [str(linha.produto_id), str(linha.preco_unitario), linha.observacoes, linha.dados_personalizacao],
+        separators=(',', ':'),
+        default=str,
+    )
+
+
+def _decodificar(dados, quantidade):
+    produto_id, preco, observacoes, personalizacao = json.loads(dados)
+    return Linha(uuid.UUID(produto_id), Decimal(preco), observacoes, personalizacao, int(quantidade))
+
+
+class ArmazenamentoMemoria:
+    """Carrinhos em dicionários do processo (testes e desenvolvimento)"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._carrinhos = {}
+        self._versoes = {}
+        self._marcas = {}
+        self._pendentes = set()
+
+    def linhas(self, carrinho_id):
+        with self._lock:
+            carrinho = self._carrinhos.get(str(carrinho_id))
+            if carrinho is None:
+                return None
+            return {linha_id: linha for linha_id, linha in carrinho.items()}
+
+    def marca(self, carrinho_id):
+        if str(carrinho_id) not in self._carrinhos:
+            return None
+        return self._marcas.get(str(carrinho_id), 0)
+
+    def definir_marca(self, carrinho_id, marca):
+        with self._lock:
+            self._marcas[str(carrinho_id)] = marca
+
+    def versao(self, carrinho_id):
+        return self._versoes.get(str(carrinho_id))
+
+    def _alterar(self, carrinho_id):
+        self._versoes[str(carrinho_id)] = self._versoes.get(str(carrinho_id), 0) + 1
+
+    def carregar(self, carrinho_id, linhas, marca):
+        with self._lock:
+            if str(carrinho_id) not in self._carrinhos:
+                self._carrinhos[str(carrinho_id)] = dict(linhas)
+                self._versoes[str(carrinho_id)] = _versao_inicial()
+                self._marcas[str(carrinho_id)] = marca
+
+    def somar(self, carrinho_id, linha_id, linha):
+        with self._lock:
+            carrinho = self._carrinhos.get(str(carrinho_id))
+            if carrinho is None:
+                return None
+            atual = carrinho.get(linha_id)
+            if atual is not None:
+                linha = atual._replace(quantidade=atual.quantidade + linha.quantidade)
+            carrinho[linha_id] = linha
+            self._alterar(carrinho_id)
+            return linha.quantidade
+
+    def definir_quantidade(self, carrinho_id, linha_id, quantidade):
+        with self._lock:
+            carrinho = self._carrinhos.get(str(carrinho_id))
+            if carrinho is None:
+                return None
+            if linha_id not in carrinho:
+                return False
+            carrinho[linha_id] = carrinho[linha_id]._replace(quantidade=quantidade)
+            self._alterar(carrinho_id)
+            return True
+
+    def remover(self, carrinho_id, linha_id):
+        with self._lock:
+            carrinho = self._carrinhos.get(str(carrinho_id))
+            if carrinho is None:
+                return None
+            removida = carrinho.pop(linha_id, None) is not None
+            if removida:
+                self._alterar(carrinho_id)
+            return removida
+
+    def limpar(self, carrinho_id):
+        with self._lock:
+            self._carrinhos[str(carrinho_id)] = {}
+            self._versoes[str(carrinho_id)] = _versao_inicial()
+
+    def descartar(self, carrinho_id):
+        with self._lock:
+            self._carrinhos.pop(str(carrinho_id), None)
+            self._versoes.pop(str(carrinho_id), None)
+            self._marcas.pop(str(carrinho_id), None)
+            self._pendentes.discard(str(carrinho_id))
+
+    def marcar_pendente(self, carrinho_id):
+        with self._lock:
+            self._pendentes.add(str(carrinho_id))
+
+    def retirar_pendentes(self, limite):
+        with self._lock:
+            retirados = list(self._pendentes)[:limite]
+            self._pendentes.difference_update(retirados)
+            return retirados
+
+
+def _pausar(erro):
+    global _redis_pausado_ate
+    logger.warning(f"Carrinho: Redis indisponível, usando o banco por {_PAUSA_REDIS_SEGUNDOS}s ({erro})")
+    _redis_pausado_ate = time.monotonic() + _PAUSA_REDIS_SEGUNDOS
+
+
+def _protegido(metodo):
+    """Converte falhas do Redis em ``ArmazenamentoIndisponivel`` e pausa o uso do Redis"""
+    @functools.wraps(metodo)
+    def executar(self, *args, **kwargs):
+        try:
+            return metodo(self, *args, **kwargs)
+        except self._erros as e:
+            _pausar(e)
+            raise ArmazenamentoIndisponivel(str(e)) from e
+    return executar
+
+
+class ArmazenamentoRedis:
+    """Um hash por carrinho no Redis, compartilhado entre workers"""
+
+    def __init__(self, url):
+        import redis
+
+        self._erros = (redis.RedisError,)
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._carregar = self._redis.register_script(_SCRIPT_CARREGAR)
+        self._somar = self._redis.register_script(_SCRIPT_SOMAR)
+        self._definir = self._redis.register_script(_SCRIPT_DEFINIR)
+        self._remover = self._redis.register_script(_SCRIPT_REMOVER)
+        self._limpar = self._redis.register_script(_SCRIPT_LIMPAR)
+
+    @staticmethod
+    def _chave(carrinho_id):
+        return f"carrinho:{carrinho_id}"
+
+    @_protegido
+    def linhas(self, carrinho_id):
+        campos = self._redis.hgetall(self._chave(carrinho_id))
+        if b'_c' not in campos:
+            return None
+        linhas = {}
+        for campo, valor in campos.items():
+            if campo.startswith(b'd:'):
+                quantidade = campos.get(b'q:' + campo[2:])
+                if quantidade is not None:
+                    linhas[uuid.UUID(campo[2:].decode())] = _decodificar(valor, quantidade)
+        return linhas
+
+    @_protegido
+    def marca(self, carrinho_id):
+        carregado, marca = self._redis.hmget(self._chave(carrinho_id), '_c', '_b')
+        if carregado is None:
+            return None
+        return int(marca or 0)
+
+    @_protegido
+    def definir_marca(self, carrinho_id, marca):
+        self._redis.hset(self._chave(carrinho_id), '_b', marca)
+
+    @_protegido
+    def versao(self, carrinho_id):
+        valor = self._redis.hget(self._chave(carrinho_id), '_v')
+        return int(valor) if valor is not None else None
+
+    @_protegido
+    def carregar(self, carrinho_id, linhas, marca):
+        argumentos = []
+        for linha_id, linha in linhas.items():
+            argumentos += [f"d:{linha_id}", _codificar(linha), f"q:{linha_id}", linha.quantidade]
+        self._carregar(keys=[self._chave(carrinho_id)], args=argumentos + [_versao_inicial(), marca, _ttl()])
+
+    @staticmethod
+    def _resultado(valor, tipo):
+        # -1: hash expirado depois do carregamento (ver ``_no_hash``)
+        return None if int(valor) < 0 else tipo(valor)
+
+    @_protegido
+    def somar(self, carrinho_id, linha_id, linha):
+        return self._resultado(self._somar(
+            keys=[self._chave(carrinho_id)],
+            args=[f"d:{linha_id}", _codificar(linha), f"q:{linha_id}", linha.quantidade, _ttl()],
+        ), int)
+
+    @_protegido
+    def definir_quantidade(self, carrinho_id, linha_id, quantidade):
+        return self._resultado(self._definir(
+            keys=[self._chave(carrinho_id)],
+            args=[f"d:{linha_id}", f"q:{linha_id}", quantidade, _ttl()],
+        ), bool)
+
+    @_protegido
+    def remover(self, carrinho_id, linha_id):
+        return self._resultado(self._remover(
+            keys=[self._chave(carrinho_id)],
+            args=[f"d:{linha_id}", f"q:{linha_id}", _ttl()],
+        ), bool)
+
+    @_protegido
+    def limpar(self, carrinho_id):
+        self._limpar(keys=[self._chave(carrinho_id)], args=[_versao_inicial(), _ttl()])
+
+    @_protegido
+    def descartar(self, carrinho_id):
+        pipe = self._redis.pipeline()
+        pipe.delete(self._chave(carrinho_id))
+        pipe.srem(CHAVE_PENDENTES, str(carrinho_id))
+        pipe.execute()
+
+    @_protegido
+    def marcar_pendente(self, carrinho_id):
+        self._redis.sadd(CHAVE_PENDENTES, str(carrinho_id))
+
+    @_protegido
+    def retirar_pendentes(self, limite):
+        return [valor.decode() for valor in self._redis.spop(CHAVE_PENDENTES, limite) or []]
+
+
+_armazenamento = None
+_armazenamento_lock = Lock()
+
+
+def obter():
+    """
+    Armazenamento configurado em ``CARRINHO_ARMAZENAMENTO``; None para ``'banco'``
+    e durante a pausa após uma falha do Redis.
+    """
+    global _armazenamento
+    tipo = getattr(settings, 'CARRINHO_ARMAZENAMENTO', 'banco')
+    if tipo not in ('redis', 'memoria'):
+        return None
+    if tipo == 'redis' and time.monotonic() < _redis_pausado_ate:
+        return None
+    if _armazenamento is None:
+        with _armazenamento_lock:
+            if _armazenamento is None:
+                if tipo == 'redis':
+                    _armazenamento = ArmazenamentoRedis(settings.CARRINHO_REDIS_URL)
+                else:
+                    _armazenamento = ArmazenamentoMemoria()
+    return _armazenamento
+
+
+def _linhas_do_banco(carrinho):
+    linhas = {}
+    for item in carrinho.itens.all():
+        linha_id = id_linha(carrinho.pk, item.produto_id, item.dados_personalizacao)
+        anterior = linhas.get(linha_id)
+        if anterior is not None:
+            linhas[linha_id] = anterior._replace(quantidade=anterior.quantidade + item.quantidade)
+        else:
+            linhas[linha_id] = Linha(
+                item.produto_id, item.preco_unitario, item.observacoes,
+                item.dados_personalizacao, item.quantidade,
+            )
+    return linhas
+
+
+def garantir_carregado(carrinho):
+    """
+    Carrega o carrinho do banco se não estiver no armazenamento, ou se o banco
+    foi alterado depois do carregamento (gravações pelo banco com o Redis fora).
+    """
+    armazenamento = obter()
+    marca = armazenamento.marca(carrinho.pk)
+    atual = marca_banco(carrinho.updated_at)
+    if marca is not None and marca >= atual:
+        return armazenamento
+    if marca is not None:
+        logger.info(f"Carrinho {carrinho.pk} alterado no banco: recarregando o armazenamento")
+        armazenamento.descartar(carrinho.pk)
+    armazenamento.carregar(carrinho.pk, _linhas_do_banco(carrinho), atual)
+    return armazenamento
+
+
+def linhas(carrinho):
+    """Linhas do carrinho no armazenamento, carregando do banco quando necessário"""
+    return garantir_carregado(carrinho).linhas(carrinho.pk) or {}
+
+
+def versao(carrinho):
+    """Versão atual do carrinho no armazenamento, carregando do banco quando necessário"""
+    return garantir_carregado(carrinho).versao(carrinho.pk)
+
+
+def _no_hash(carrinho, operacao):
+    """
+    Executa ``operacao(armazenamento)`` no carrinho carregado. Se o hash expirou
+    entre o carregamento e a operação (resultado None), recarrega e tenta de novo.
+    """
+    for _ in range(2):
+        resultado = operacao(garantir_carregado(carrinho))
+        if resultado is not None:
+            return resultado
+    raise ArmazenamentoIndisponivel(f"Carrinho {carrinho.pk} expirou no armazenamento durante a alteração")
+
+
+def somar(carrinho, linha_id, linha):
+    """Soma a linha no carrinho; retorna a quantidade total da linha"""
+    return _no_hash(carrinho, lambda armazenamento: armazenamento.somar(carrinho.pk, linha_id, linha))
+
+
+def definir_quantidade(carrinho, linha_id, quantidade):
+    """Define a quantidade da linha; False se a linha não existir"""
+    return _no_hash(
+        carrinho, lambda armazenamento: armazenamento.definir_quantidade(carrinho.pk, linha_id, quantidade)
+    )
+
+
+def remover(carrinho, linha_id):
+    """Remove a linha do carrinho; False se ela não existir"""
+    return _no_hash(carrinho, lambda armazenamento: armazenamento.remover(carrinho.pk, linha_id))
+
+
+def limpar(carrinho):
+    """Esvazia o carrinho no armazenamento (gravado no banco depois)"""
+    armazenamento = garantir_carregado(carrinho)
+    armazenamento.limpar(carrinho.pk)
+    armazenamento.marcar_pendente(carrinho.pk)
+
+
+def descartar(carrinho_id):
+    """Remove o carrinho do armazenamento; com o Redis fora, a chave expira sozinha"""
+    armazenamento = obter()
+    if armazenamento is None:
+        return
+    try:
+        armazenamento.descartar(carrinho_id)
+    except ArmazenamentoIndisponivel:
+        pass
+
+
+def itens(carrinho):
+    """``CarrinhoItem`` (não gravados) montados das linhas, com produto e categoria"""
+    atuais = linhas(carrinho)
+    produtos = Produto.objects.select_related('categoria').in_bulk(
+        {linha.produto_id for linha in atuais.values()}
+    )
+    resultado = []
+    for linha_id, linha in atuais.items():
+        produto = produtos.get(linha.produto_id)
+        if produto is None:
+            continue
+        resultado.append(CarrinhoItem(
+            id=linha_id,
+            carrinho=carrinho,
+            produto=produto,
+            quantidade=linha.quantidade,
+            preco_unitario=linha.preco_unitario,
+            observacoes=linha.observacoes,
+            dados_personalizacao=linha.dados_personalizacao,
+        ))
+    return resultado
+
+
+def alterado(carrinho_id):
+    """Marca o carrinho para a próxima gravação no banco"""
+    obter().marcar_pendente(carrinho_id)
+
+
+def uuid_valido(valor):
+    try:
+        return uuid.UUID(str(valor))
+    except (TypeError, ValueError):
+        return None
+
+
+def _personalizacoes(novos):
+    """``CarrinhoItemPersonalizacao`` das linhas novas (ids inexistentes são ignorados)"""
+    ids = {
+        uuid_valido(perso.get('item_id'))
+        for item in novos
+        for perso in item.dados_personalizacao.get('personalizacoes', [])
+    } - {None}
+    if not ids:
+        return []
+    disponiveis = ItemPersonalizacao.objects.select_related('opcao').in_bulk(ids)
+    registros = []
+    for item in novos:
+        for perso in item.dados_personalizacao.get('personalizacoes', []):
+            item_personalizacao = disponiveis.get(uuid_valido(perso.get('item_id')))
+            if item_personalizacao is None:
+                continue
+            registros.append(CarrinhoItemPersonalizacao(
+                carrinho_item=item,
+                item_personalizacao=item_personalizacao,
+                opcao_nome=item_personalizacao.opcao.nome,
+                item_nome=item_personalizacao.nome,
+                preco_adicional=item_personalizacao.preco_adicional,
+            ))
+    return registros
+
+
+def materializar(carrinho):
+    """
+    Grava no banco o estado do carrinho no armazenamento (síncrono).
+    Sem armazenamento, ou com o carrinho fora dele, o banco já está atualizado.
+    """
+    armazenamento = obter()
+    if armazenamento is None:
+        return
+    with transaction.atomic():
+        # Serializa com outras gravações do mesmo carrinho (task x checkout)
+        gravado_em = Carrinho.objects.select_for_update().filter(pk=carrinho.pk).values_list(
+            'updated_at', flat=True
+        ).first()
+        if gravado_em is None:
+            armazenamento.descartar(carrinho.pk)
+            return
+        marca = armazenamento.marca(carrinho.pk)
+        if marca is None:
+            return
+        if marca < marca_banco(gravado_em):
+            # Banco alterado depois do carregamento (Redis fora): o hash é obsoleto
+            armazenamento.descartar(carrinho.pk)
+            return
+        atuais = armazenamento.linhas(carrinho.pk)
+        if atuais is None:
+            return
+
+        # Pelo id da linha, não pela pk: itens gravados antes com uuid4 também casam
+        existentes = {
+            id_linha(carrinho.pk, item.produto_id, item.dados_personalizacao): item
+            for item in carrinho.itens.all()
+        }
+        CarrinhoItem.objects.filter(
+            pk__in=[item.pk for linha_id, item in existentes.items() if linha_id not in atuais]
+        ).delete()
+
+        novos = []
+        for linha_id, linha in atuais.items():
+            item = existentes.get(linha_id)
+            if item is None:
+                novos.append(CarrinhoItem(
+                    id=linha_id,
+                    carrinho=carrinho,
+                    produto_id=linha.produto_id,
+                    quantidade=linha.quantidade,
+                    preco_unitario=linha.preco_unitario,
+                    observacoes=linha.observacoes,
+                    dados_personalizacao=linha.dados_personalizacao,
+                    assinatura=assinatura_linha(linha.produto_id, linha.dados_personalizacao),
+                ))
+            elif item.quantidade != linha.quantidade:
+                item.quantidade = linha.quantidade
+                item.save(update_fields=['quantidade', 'updated_at'])
+
+        CarrinhoItem.objects.bulk_create(novos)
+        CarrinhoItemPersonalizacao.objects.bulk_create(_personalizacoes(novos))
+        # A marca vai antes do banco: quem ler o novo updated_at já encontra o hash em dia
+        carrinho.updated_at = timezone.now()
+        armazenamento.definir_marca(carrinho.pk, marca_banco(carrinho.updated_at))
+        Carrinho.objects.filter(pk=carrinho.pk).update(updated_at=carrinho.updated_at)
+
+
+# Carrinhos retirados da fila do Redis e não gravados (falha do Redis no meio da execução)
+_adiados = set()
+
+
+def persistir_pendentes(limite=500):
+    """Grava no banco os carrinhos alterados desde a última execução"""
+    armazenamento = obter()
+    if armazenamento is None:
+        return 0
+    # Retirados antes da leitura: uma alteração durante a gravação marca o carrinho de novo
+    try:
+        pendentes = list(_adiados) + armazenamento.retirar_pendentes(limite)
+    except ArmazenamentoIndisponivel:
+        return 0
+    _adiados.clear()
+    carrinhos = Carrinho.objects.in_bulk(pendentes)
+    gravados = 0
+    for posicao, carrinho_id in enumerate(pendentes):
+        carrinho = carrinhos.get(uuid.UUID(carrinho_id))
+        try:
+            if carrinho is None:
+                armazenamento.descartar(carrinho_id)
+                continue
+            materializar(carrinho)
+            gravados += 1
+        except ArmazenamentoIndisponivel:
+            # Ficam para a próxima execução, depois da pausa do Redis
+            _adiados.update(pendentes[posicao:])
+            logger.warning(f"Carrinho: {len(pendentes) - posicao} gravações adiadas, Redis indisponível")
+            break
+        except Exception as e:
+            logger.error(f"Erro ao gravar o carrinho {carrinho_id}: {e}")
+            try:
+                armazenamento.marcar_pendente(carrinho_id)
+            except ArmazenamentoIndisponivel:
+                _adiados.add(carrinho_id)
+    return gravados
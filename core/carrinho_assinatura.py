@@ -0,0 +1,37 @@
+"""
+Assinatura canônica de uma linha do carrinho.
+
+Duas adições do mesmo produto com as mesmas personalizações (em qualquer
+ordem) e o mesmo meio-a-meio têm a mesma assinatura e viram uma linha só.
+``CarrinhoItem.assinatura`` é única por carrinho, então juntar linhas é uma
+busca indexada seguida de incremento, segura com cliques duplos simultâneos.
+
+Sem dependência dos models: também é usada pela migração que preenche a
+coluna nos itens existentes.
+"""
+
+import hashlib
+import json
+
+
+def _personalizacao(perso):
+    # O item escolhido identifica a personalização; nome e preço derivam dele
+    if perso.get('item_id'):
+        return str(perso['item_id'])
+    return f"{perso.get('opcao_id') or ''}:{perso.get('nome') or ''}"
+
+
+def assinatura_linha(produto_id, dados_personalizacao):
+    """sha256 de produto + ids das personalizações ordenados + meio-a-meio"""
+    dados = dados_personalizacao or {}
+    conteudo = json.dumps(
+        [
+            str(produto_id),
+            sorted(_personalizacao(perso) for perso in dados.get('personalizacoes') or []),
+            dados.get('meio_a_meio') or None,
+        ],
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str,
+    )
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
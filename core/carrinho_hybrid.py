@@ -24,8 +24,17 @@ class CarrinhoHybridService:
     def obter_carrinho_ativo(request, restaurante):
         """
         Obtém o carrinho ativo priorizando o novo sistema,
-        mas mantendo compatibilidade com sessões
+        mas mantendo compatibilidade com sessões.
+        O resultado é guardado no request: chamadas seguintes no mesmo
+        request (adicionar e depois resumir) não consultam o carrinho de novo.
         """
+        ativos = request.__dict__.setdefault('_carrinhos_ativos', {})
+        if restaurante.pk not in ativos:
+            ativos[restaurante.pk] = CarrinhoHybridService._resolver_carrinho_ativo(request, restaurante)
+        return ativos[restaurante.pk]
+    
+    @staticmethod
+    def _resolver_carrinho_ativo(request, restaurante):
         usuario = request.user if request.user.is_authenticated else None
         sessao_id = request.session.session_key
         
@@ -38,7 +47,7 @@ class CarrinhoHybridService:
             )
             
             # Se tem itens no carrinho persistente, usar ele
-            if not carrinho_persistente.esta_vazio():
+            if not CarrinhoService.esta_vazio(carrinho_persistente):
                 return {
                     'carrinho': carrinho_persistente,
                     'tipo': 'persistente',
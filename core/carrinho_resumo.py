@@ -0,0 +1,164 @@
+"""
+Resumo do carrinho (itens, quantidades e totais) montado uma vez por versão.
+
+O resumo é montado com uma consulta: itens com produto e categoria
+(``select_related``), ou só produtos e categorias quando as linhas vêm do
+armazenamento (``carrinho_armazenamento``). As personalizações já estão nos
+dados de cada linha, então não há consulta por item. Os preços são
+calculados uma vez por linha.
+
+O objeto resultante é imutável e fica no cache do Django, indexado pela
+versão do carrinho (``updated_at`` no banco, ``_v`` no armazenamento) e pela
+geração do cardápio (nome, categoria e imagem dos produtos). A página do
+carrinho, o checkout e a API do carrinho reutilizam o mesmo resumo até a
+próxima alteração.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import carrinho_armazenamento, cardapio_cache
+
+
+def _ttl():
+    return getattr(settings, 'CARRINHO_RESUMO_CACHE_TTL', 60 * 30)
+
+
+def _congelar(valor):
+    if isinstance(valor, dict):
+        return MappingProxyType({chave: _congelar(item) for chave, item in valor.items()})
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(item) for item in valor)
+    return valor
+
+
+def _descongelar(valor):
+    if isinstance(valor, MappingProxyType):
+        return {chave: _descongelar(item) for chave, item in valor.items()}
+    if isinstance(valor, tuple):
+        return [_descongelar(item) for item in valor]
+    return valor
+
+
+def _restaurar(itens, total_itens, subtotal):
+    return ResumoCarrinho(itens=_congelar(itens), total_itens=total_itens, subtotal=subtotal)
+
+
+@dataclass(frozen=True)
+class ResumoCarrinho:
+    """
+    Resumo imutável do carrinho. Aceita ``resumo['itens']`` como o dicionário
+    devolvido antes por ``CarrinhoService.calcular_resumo``.
+    """
+    itens: tuple
+    total_itens: int
+    subtotal: Decimal
+
+    @property
+    def carrinho_vazio(self):
+        return not self.itens
+
+    def __getitem__(self, chave):
+        try:
+            return getattr(self, chave)
+        except AttributeError:
+            raise KeyError(chave)
+
+    def get(self, chave, padrao=None):
+        return getattr(self, chave, padrao)
+
+    def __reduce__(self):
+        # MappingProxyType não é serializável: o cache guarda os itens como dicionários
+        return _restaurar, (_descongelar(self.itens), self.total_itens, self.subtotal)
+
+    def como_dict(self):
+        """Cópia serializável em JSON (valores em float)"""
+        itens = _descongelar(self.itens)
+        for item in itens:
+            item['preco_unitario'] = float(item['preco_unitario'])
+            item['subtotal'] = float(item['subtotal'])
+        return {
+            'itens': itens,
+            'total_itens': self.total_itens,
+            'subtotal': float(self.subtotal),
+            'carrinho_vazio': self.carrinho_vazio,
+        }
+
+
+def carregar_itens(carrinho):
+    """Itens atuais do carrinho com produto e categoria, numa consulta"""
+    if carrinho_armazenamento.obter():
+        try:
+            return carrinho_armazenamento.itens(carrinho)
+        except carrinho_armazenamento.ArmazenamentoIndisponivel:
+            pass  # Redis fora: segue pelo banco
+    return list(carrinho.itens.select_related('produto__categoria').order_by('created_at'))
+
+
+def _item(item):
+    dados = item.dados_personalizacao or {}
+    personalizacoes = dados.get('personalizacoes', [])
+    dados_meio_a_meio = dados.get('meio_a_meio') or {}
+
+    adicionais = sum(
+        (Decimal(str(perso.get('preco_adicional', '0.00'))) for perso in personalizacoes),
+        Decimal('0.00'),
+    )
+    subtotal = (item.preco_unitario + adicionais) * item.quantidade
+
+    # Para meio-a-meio, usar nome customizado se disponível
+    produto = item.produto
+    nome_produto = dados_meio_a_meio.get('nome_customizado') or produto.nome
+    return {
+        'id': str(item.id),
+        'nome': nome_produto,
+        'produto': {
+            'id': str(produto.id),
+            'nome': nome_produto,
+            'categoria': produto.categoria.nome if produto.categoria else '',
+            'imagem': produto.imagem_principal.url if produto.imagem_principal else None,
+        },
+        'quantidade': item.quantidade,
+        'preco_unitario': item.preco_unitario,
+        'subtotal': subtotal,
+        'observacoes': item.observacoes,
+        'eh_meio_a_meio': bool(dados_meio_a_meio),
+        'personalizacoes': personalizacoes,
+        'meio_a_meio_data': dados_meio_a_meio or None,
+    }
+
+
+def montar(carrinho):
+    """Monta o resumo sem passar pelo cache"""
+    itens = [_item(item) for item in carregar_itens(carrinho)]
+    return ResumoCarrinho(
+        itens=_congelar(itens),
+        total_itens=sum(item['quantidade'] for item in itens),
+        subtotal=sum((item['subtotal'] for item in itens), Decimal('0.00')),
+    )
+
+
+def _versao(carrinho):
+    if carrinho_armazenamento.obter():
+        try:
+            return carrinho_armazenamento.versao(carrinho)
+        except carrinho_armazenamento.ArmazenamentoIndisponivel:
+            pass  # Redis fora: segue pelo banco
+    return int(carrinho.updated_at.timestamp() * 1_000_000)
+
+
+def obter(carrinho):
+    """Resumo da versão atual do carrinho, do cache ou montado e guardado"""
+    chave = (
+        f"carrinho:{carrinho.pk}:resumo:v{_versao(carrinho)}"
+        f":c{cardapio_cache.geracao(carrinho.restaurante_id)}"
+    )
+    resumo = cache.get(chave)
+    if resumo is None:
+        resumo = montar(carrinho)
+        cache.set(chave, resumo, timeout=_ttl())
+    return resumo
@@ -0,0 +1,35 @@
+"""
+Verificações de configuração do core (``manage.py check``).
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends em que cada processo tem o próprio cache (ou nenhum)
+CACHES_LOCAIS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def verificar_cache_compartilhado(app_configs, **kwargs):
+    """
+    A geração do cardápio (snapshot, JSON, ETags da loja) e a invalidação do
+    cache de restaurantes dependem de um cache compartilhado entre workers:
+    com cache local, só o processo que gravou a alteração a enxerga.
+    """
+    if settings.DEBUG:
+        return []
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in CACHES_LOCAIS:
+        return []
+    return [Error(
+        'O cache padrão não é compartilhado entre processos.',
+        hint=(
+            'Defina CACHE_REDIS_URL em produção: as gerações do cardápio e a '
+            'invalidação de restaurantes precisam chegar a todos os workers.'
+        ),
+        obj=backend,
+        id='core.E001',
+    )]
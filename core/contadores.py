@@ -0,0 +1,119 @@
+"""
+Contadores diários acumulados em memória e gravados em lote.
+
+``registrar`` nas requisições só soma num dicionário do processo. Uma thread
+em segundo plano descarrega o buffer a cada ``intervalo`` segundos com um
+único upsert por lote (``INSERT ... ON DUPLICATE KEY UPDATE`` no MySQL,
+``ON CONFLICT ... DO UPDATE`` no PostgreSQL/SQLite) que soma os incrementos
+às linhas existentes. Usado por ``uso_apis`` e ``analise_busca``.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import DatabaseError, close_old_connections, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Linhas por comando INSERT
+_LINHAS_POR_COMANDO = 500
+
+
+class ContadorEmLote:
+    """
+    Buffer de incrementos para um model com chave única ``chaves`` e
+    contadores inteiros ``campos`` (e ``updated_at``).
+    """
+
+    def __init__(self, modelo, chaves, campos, intervalo):
+        self.modelo = modelo  # 'app_label.Model', resolvido só na gravação
+        self.chaves = tuple(chaves)
+        self.campos = tuple(campos)
+        self.intervalo = intervalo
+        self._reiniciar()
+        # O processo filho (gunicorn/celery) começa com buffer e thread próprios
+        os.register_at_fork(after_in_child=self._reiniciar)
+        atexit.register(self.descarregar)
+
+    def _reiniciar(self):
+        self._lock = threading.Lock()
+        self._buffer = defaultdict(lambda: dict.fromkeys(self.campos, 0))
+        self._thread = None
+
+    def somar(self, chave, **incrementos):
+        """Soma os incrementos na linha ``chave`` (tupla na ordem de ``chaves``); não acessa o banco"""
+        with self._lock:
+            contadores = self._buffer[chave]
+            for campo, valor in incrementos.items():
+                contadores[campo] += valor
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._executar, name=f"contador-{self.modelo}", daemon=True
+                )
+                self._thread.start()
+
+    def _executar(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                close_old_connections()
+                self.descarregar()
+            except Exception as e:
+                logger.error(f"Falha ao descarregar os contadores de {self.modelo}: {e}")
+
+    def descarregar(self):
+        """Grava no banco os incrementos acumulados neste processo"""
+        with self._lock:
+            pendentes = self._buffer
+            self._buffer = defaultdict(lambda: dict.fromkeys(self.campos, 0))
+
+        linhas = [
+            (*chave, *(contadores[campo] for campo in self.campos))
+            for chave, contadores in pendentes.items()
+            if any(contadores.values())
+        ]
+        if not linhas:
+            return
+        try:
+            for inicio in range(0, len(linhas), _LINHAS_POR_COMANDO):
+                self._gravar(linhas[inicio:inicio + _LINHAS_POR_COMANDO])
+        except DatabaseError as e:
+            logger.warning(f"Não foi possível gravar {len(linhas)} contadores de {self.modelo}: {e}")
+
+    def _gravar(self, linhas):
+        modelo = apps.get_model(self.modelo)
+        opcoes = modelo._meta
+        campos = [opcoes.get_field(nome) for nome in self.chaves + self.campos + ('updated_at',)]
+        nome = connection.ops.quote_name
+        tabela = nome(opcoes.db_table)
+        colunas = [nome(campo.column) for campo in campos]
+        contadores = colunas[len(self.chaves):-1]
+        chaves = colunas[:len(self.chaves)]
+        atualizado = colunas[-1]
+
+        agora = timezone.now()
+        parametros = []
+        for linha in linhas:
+            parametros.extend(
+                campo.get_db_prep_value(valor, connection)
+                for campo, valor in zip(campos, (*linha, agora))
+            )
+        marcadores = '(' + ', '.join(['%s'] * len(colunas)) + ')'
+        sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES {', '.join([marcadores] * len(linhas))} "
+        if connection.vendor == 'mysql':
+            somas = [f"{coluna} = {coluna} + VALUES({coluna})" for coluna in contadores]
+            sql += f"ON DUPLICATE KEY UPDATE {', '.join(somas)}, {atualizado} = VALUES({atualizado})"
+        else:
+            somas = [f"{coluna} = {tabela}.{coluna} + excluded.{coluna}" for coluna in contadores]
+            sql += (
+                f"ON CONFLICT ({', '.join(chaves)}) DO UPDATE SET "
+                f"{', '.join(somas)}, {atualizado} = excluded.{atualizado}"
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, parametros)
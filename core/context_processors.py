@@ -1,5 +1,6 @@
 from django.conf import settings
 from .models import Restaurante
+from .restaurante_cache import resolver_restaurante
 
 
 def site_context(request):
@@ -9,10 +10,16 @@ def site_context(request):
     """
     context = {}
     
-    # Por enquanto, vamos usar o primeiro restaurante ativo
-    # Futuramente isso será baseado no domínio ou slug da URL
+    # Nas páginas da loja usa o restaurante do slug da URL (resolvido pelo cache);
+    # nas demais, por enquanto, o primeiro restaurante ativo
     try:
-        restaurante = Restaurante.objects.filter(status='ativo').first()
+        restaurante = None
+        resolver_match = getattr(request, 'resolver_match', None)
+        restaurante_slug = resolver_match.kwargs.get('restaurante_slug') if resolver_match else None
+        if restaurante_slug:
+            restaurante = resolver_restaurante(restaurante_slug)
+        if restaurante is None:
+            restaurante = Restaurante.objects.filter(status='ativo').first()
         if restaurante:
             context['restaurante_atual'] = restaurante
             context['cores_tema'] = {
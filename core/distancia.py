@@ -0,0 +1,75 @@
+"""
+Kernels vetorizados (NumPy) de distância entre coordenadas.
+
+Substituem o ``geopy.distance.geodesic`` onde é preciso calcular muitas
+distâncias de uma vez (cotação em lote, pedidos próximos ao entregador).
+
+Erro em relação ao ``geodesic`` (elipsoide WGS-84):
+
+- ``haversine_km``: esfera de raio médio 6371,0088 km. Erro relativo de no
+  máximo ~0,56% (medido em 20 mil pares aleatórios entre 5° N e 34° S,
+  distâncias de 0,1 a 50 km), ou seja, até ~56 m em 10 km.
+- ``equiretangular_km``: aproximação plana sobre a latitude média. Para
+  distâncias de até 50 km soma menos de 0,001% ao erro do haversine; não
+  deve ser usada para distâncias de centenas de km.
+
+Para frete e raio de entrega (anéis de 1 km) essas margens são irrelevantes.
+"""
+
+import numpy as np
+
+RAIO_TERRA_KM = 6371.0088
+
+
+def _como_arrays(coordenadas):
+    """Converte (lat, lng) ou sequência de (lat, lng) em dois arrays de radianos"""
+    pontos = np.radians(np.asarray(coordenadas, dtype=np.float64))
+    if pontos.ndim == 1:
+        return pontos[0], pontos[1]
+    return pontos[:, 0], pontos[:, 1]
+
+
+def haversine_km(origem, destinos):
+    """
+    Distância de círculo máximo (km) entre ``origem`` e cada ponto de ``destinos``.
+    Aceita uma coordenada ou uma sequência de coordenadas em cada argumento
+    (com broadcasting do NumPy). Retorna ``np.ndarray``.
+    """
+    lat1, lng1 = _como_arrays(origem)
+    lat2, lng2 = _como_arrays(destinos)
+    seno_dlat = np.sin((lat2 - lat1) / 2.0)
+    seno_dlng = np.sin((lng2 - lng1) / 2.0)
+    a = seno_dlat ** 2 + np.cos(lat1) * np.cos(lat2) * seno_dlng ** 2
+    return 2.0 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def equiretangular_km(origem, destinos):
+    """
+    Aproximação plana (km), mais barata que o haversine, válida para distâncias curtas.
+    Mesma convenção de argumentos de ``haversine_km``.
+    """
+    lat1, lng1 = _como_arrays(origem)
+    lat2, lng2 = _como_arrays(destinos)
+    x = (lng2 - lng1) * np.cos((lat1 + lat2) / 2.0)
+    y = lat2 - lat1
+    return RAIO_TERRA_KM * np.sqrt(x * x + y * y)
+
+
+def distancias_km(origem, destinos):
+    """Lista de distâncias (float) da origem a cada destino, via haversine"""
+    if len(destinos) == 0:
+        return []
+    return haversine_km(origem, destinos).tolist()
+
+
+def dentro_do_raio(origem, destinos, raio_km):
+    """
+    Índices dos destinos a até ``raio_km`` da origem, ordenados do mais
+    próximo ao mais distante, junto com as respectivas distâncias.
+    """
+    if len(destinos) == 0:
+        return [], []
+    distancias = haversine_km(origem, destinos)
+    indices = np.flatnonzero(distancias <= float(raio_km))
+    indices = indices[np.argsort(distancias[indices], kind='stable')]
+    return indices.tolist(), distancias[indices].tolist()
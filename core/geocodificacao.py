@@ -0,0 +1,108 @@
+"""
+Geocodificação persistente de Restaurante e Endereco.
+
+As coordenadas são resolvidas uma única vez, fora do ciclo da requisição
+(task Celery disparada pelos signals), e gravadas no próprio registro.
+Os cálculos de distância passam a usar esses valores diretamente.
+"""
+
+import logging
+import re
+
+import requests
+from django.db import transaction
+from django.utils import timezone
+
+from . import restaurante_cache
+from .models import CAMPOS_ENDERECO_GEOCODIFICACAO, Endereco, Restaurante
+
+logger = logging.getLogger(__name__)
+
+MODELOS_GEOCODIFICAVEIS = {
+    'restaurante': Restaurante,
+    'endereco': Endereco,
+}
+
+
+def _apenas_digitos(cep):
+    return re.sub(r'\D', '', str(cep or ''))
+
+
+def resolver_coordenadas(instancia):
+    """
+    Resolve (lat, lng) do endereço da instância: primeiro o endereço completo
+    (OpenCage), depois o CEP (índice offline / ViaCEP + OpenCage).
+    Retorna None se nada foi encontrado.
+    """
+    from .utils_frete_cep import obter_coordenadas, resolver_coordenadas_cep
+
+    if instancia.logradouro and instancia.cidade:
+        try:
+            coordenadas = obter_coordenadas(instancia.endereco_geocodificacao)
+        except requests.RequestException as e:
+            logger.warning(f"Falha ao geocodificar endereço completo, tentando pelo CEP: {e}")
+            coordenadas = None
+        if isinstance(coordenadas, tuple):
+            return coordenadas
+
+    if instancia.cep:
+        coordenadas = resolver_coordenadas_cep(instancia.cep)
+        if isinstance(coordenadas, tuple):
+            return coordenadas
+
+    return None
+
+
+def geocodificar(instancia):
+    """
+    Geocodifica a instância e grava o resultado sem disparar signals.
+    A gravação só acontece se o endereço não mudou desde a leitura.
+    Retorna True se as coordenadas foram encontradas.
+    """
+    coordenadas = resolver_coordenadas(instancia)
+
+    campos = {'geocodificado_em': timezone.now()}
+    if coordenadas:
+        campos.update(latitude=coordenadas[0], longitude=coordenadas[1], geocode_status='ok')
+    else:
+        campos.update(latitude=None, longitude=None, geocode_status='falhou')
+
+    filtro = {campo: getattr(instancia, campo) for campo in CAMPOS_ENDERECO_GEOCODIFICACAO}
+    atualizados = type(instancia).objects.filter(pk=instancia.pk, **filtro).update(**campos)
+    if atualizados:
+        for campo, valor in campos.items():
+            setattr(instancia, campo, valor)
+        if isinstance(instancia, Restaurante):
+            restaurante_cache.invalidar(instancia.slug)
+    else:
+        logger.info(f"Endereço de {instancia.pk} mudou durante a geocodificação; resultado descartado")
+
+    return coordenadas is not None
+
+
+def agendar_geocodificacao(instancia):
+    """Enfileira a geocodificação após o commit da transação atual"""
+    modelo = type(instancia).__name__.lower()
+    pk = str(instancia.pk)
+
+    def _enfileirar():
+        from .tasks import geocodificar_endereco
+        try:
+            geocodificar_endereco.delay(modelo, pk)
+        except Exception as e:
+            # Broker indisponível: fica 'pendente' para o comando geocodificar_enderecos
+            logger.warning(f"Não foi possível agendar geocodificação de {modelo} {pk}: {e}")
+
+    transaction.on_commit(_enfileirar)
+
+
+def coordenadas_gravadas(instancia, cep=None):
+    """
+    Coordenadas já gravadas de um Restaurante/Endereco, desde que correspondam
+    ao CEP informado (quando houver). Retorna None se não puderem ser usadas.
+    """
+    if instancia is None or instancia.coordenadas is None:
+        return None
+    if cep and _apenas_digitos(cep) != _apenas_digitos(instancia.cep):
+        return None
+    return instancia.coordenadas
@@ -0,0 +1,193 @@
+"""
+Cliente HTTP compartilhado para chamadas a serviços externos (ViaCEP, OpenCage, impressora...).
+
+- Uma ``requests.Session`` por host, com pool de conexões keep-alive
+- Timeout por host (``HTTP_CLIENT_HOSTS``), nunca ilimitado
+- Novas tentativas limitadas, com backoff exponencial e jitter (apenas métodos idempotentes)
+- Circuit breaker por host: após falhas seguidas, falha imediatamente por um período
+- Contadores de requisições, erros e latência por host (``estatisticas()``)
+"""
+
+import logging
+import random
+import time
+from threading import Lock
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+METODOS_IDEMPOTENTES = {'GET', 'HEAD', 'OPTIONS'}
+STATUS_REPETIVEIS = {502, 503, 504}
+
+CONFIGURACAO_PADRAO = {
+    'timeout': (3, 5),          # (conexão, leitura) em segundos
+    'tentativas': 2,            # total de tentativas para métodos idempotentes
+    'backoff': 0.2,             # base do backoff exponencial, em segundos
+    'limite_falhas': 5,         # falhas seguidas que abrem o circuito
+    'tempo_aberto': 30,         # segundos com o circuito aberto
+    'pool': 10,                 # conexões mantidas por host
+}
+
+
+class ServicoExternoIndisponivel(requests.RequestException):
+    """Circuito aberto: o serviço externo falhou recentemente e não será chamado"""
+
+
+def _configuracao(host):
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'HTTP_CLIENT_HOSTS', {}).get(host, {}))
+    return configuracao
+
+
+class _Disjuntor:
+    """Circuit breaker simples: fechado -> aberto -> meio-aberto -> fechado"""
+
+    def __init__(self, limite_falhas, tempo_aberto):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.falhas_seguidas = 0
+        self.aberto_ate = 0.0
+        self._lock = Lock()
+
+    @property
+    def estado(self):
+        if self.falhas_seguidas < self.limite_falhas:
+            return 'fechado'
+        return 'aberto' if time.monotonic() < self.aberto_ate else 'meio_aberto'
+
+    def permitir(self):
+        with self._lock:
+            estado = self.estado
+            if estado == 'meio_aberto':
+                # Deixa passar uma única chamada de teste
+                self.aberto_ate = time.monotonic() + self.tempo_aberto
+                return True
+            return estado == 'fechado'
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self.falhas_seguidas = 0
+
+    def registrar_falha(self):
+        with self._lock:
+            self.falhas_seguidas += 1
+            if self.falhas_seguidas >= self.limite_falhas:
+                self.aberto_ate = time.monotonic() + self.tempo_aberto
+
+
+class _Host:
+    """Sessão, disjuntor e contadores de um host"""
+
+    def __init__(self, host):
+        self.host = host
+        self.configuracao = _configuracao(host)
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.configuracao['pool'],
+            max_retries=0,
+        )
+        self.sessao.mount('http://', adaptador)
+        self.sessao.mount('https://', adaptador)
+        self.disjuntor = _Disjuntor(self.configuracao['limite_falhas'], self.configuracao['tempo_aberto'])
+        self._lock = Lock()
+        self.requisicoes = 0
+        self.erros = 0
+        self.rejeitadas = 0
+        self.latencia_total_ms = 0.0
+        self.latencia_max_ms = 0.0
+
+    def registrar(self, latencia_ms, erro):
+        with self._lock:
+            self.requisicoes += 1
+            self.latencia_total_ms += latencia_ms
+            self.latencia_max_ms = max(self.latencia_max_ms, latencia_ms)
+            if erro:
+                self.erros += 1
+
+    def registrar_rejeicao(self):
+        with self._lock:
+            self.rejeitadas += 1
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'requisicoes': self.requisicoes,
+                'erros': self.erros,
+                'rejeitadas_circuito': self.rejeitadas,
+                'latencia_media_ms': round(self.latencia_total_ms / self.requisicoes, 1) if self.requisicoes else 0.0,
+                'latencia_max_ms': round(self.latencia_max_ms, 1),
+                'circuito': self.disjuntor.estado,
+            }
+
+
+_hosts = {}
+_hosts_lock = Lock()
+
+
+def _obter_host(url):
+    host = urlsplit(url).hostname or ''
+    with _hosts_lock:
+        if host not in _hosts:
+            _hosts[host] = _Host(host)
+        return _hosts[host]
+
+
+def requisitar(metodo, url, **kwargs):
+    """
+    Executa a requisição pelo pool do host.
+    Lança ``ServicoExternoIndisponivel`` com o circuito aberto e
+    ``requests.RequestException`` em erros de rede após as tentativas.
+    """
+    metodo = metodo.upper()
+    alvo = _obter_host(url)
+    configuracao = alvo.configuracao
+    kwargs.setdefault('timeout', configuracao['timeout'])
+    tentativas = configuracao['tentativas'] if metodo in METODOS_IDEMPOTENTES else 1
+
+    for tentativa in range(1, tentativas + 1):
+        if not alvo.disjuntor.permitir():
+            alvo.registrar_rejeicao()
+            raise ServicoExternoIndisponivel(f"Serviço {alvo.host} temporariamente indisponível")
+
+        inicio = time.monotonic()
+        try:
+            response = alvo.sessao.request(metodo, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            alvo.registrar((time.monotonic() - inicio) * 1000, erro=True)
+            alvo.disjuntor.registrar_falha()
+            logger.warning(f"Falha em {metodo} {alvo.host} (tentativa {tentativa}/{tentativas}): {e}")
+            if tentativa == tentativas:
+                raise
+        else:
+            falhou = response.status_code >= 500
+            alvo.registrar((time.monotonic() - inicio) * 1000, erro=falhou)
+            if falhou:
+                alvo.disjuntor.registrar_falha()
+            else:
+                alvo.disjuntor.registrar_sucesso()
+            if response.status_code not in STATUS_REPETIVEIS or tentativa == tentativas:
+                return response
+            logger.warning(f"{metodo} {alvo.host} retornou {response.status_code} (tentativa {tentativa}/{tentativas})")
+
+        # Backoff exponencial com jitter completo
+        time.sleep(random.uniform(0, configuracao['backoff'] * (2 ** (tentativa - 1))))
+
+
+def get(url, **kwargs):
+    return requisitar('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return requisitar('POST', url, **kwargs)
+
+
+def estatisticas():
+    """Contadores por host: requisições, erros, latência e estado do circuito"""
+    with _hosts_lock:
+        hosts = list(_hosts.values())
+    return {alvo.host: alvo.estatisticas() for alvo in hosts}
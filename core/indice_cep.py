@@ -0,0 +1,209 @@
+"""
+Índice offline CEP → coordenadas (centroide), gravado em disco e lido via mmap.
+
+O arquivo é gerado pelo comando ``importar_indice_cep`` a partir de um CSV com
+prefixos de CEP (5 a 8 dígitos) e seus centroides. A consulta é uma busca
+binária sobre registros de tamanho fixo, sem rede e sem banco.
+
+Formato do arquivo:
+    cabeçalho: ``MCEP`` + versão (uint8) + quantidade de registros (uint32)
+    registros: chave (uint32), latitude (float32), longitude (float32)
+
+A chave é ``int(prefixo completado com zeros até 8 dígitos) * 8 + (8 - len(prefixo))``,
+de modo que os registros ficam ordenados por CEP e, dentro do mesmo CEP,
+do prefixo mais específico para o mais genérico.
+
+Cada processo mantém o arquivo aberto e, a cada
+``CEP_INDICE_VERIFICACAO_SEGUNDOS``, confere inode, tamanho e mtime: um índice
+criado ou regravado (por outro processo) passa a valer sem reiniciar os workers.
+"""
+
+import logging
+import mmap
+import os
+import re
+import struct
+import time
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGICO = b'MCEP'
+VERSAO = 1
+_CABECALHO = struct.Struct('<4sBI')
+_REGISTRO = struct.Struct('<Iff')
+
+TAMANHO_MINIMO_PREFIXO = 5
+
+
+def caminho_indice() -> str:
+    """Caminho do arquivo de índice configurado em ``CEP_INDICE_PATH``"""
+    return str(getattr(
+        settings, 'CEP_INDICE_PATH',
+        os.path.join(settings.BASE_DIR, 'dados', 'indice_cep.bin'),
+    ))
+
+
+def _chave(prefixo: str) -> int:
+    return int(prefixo.ljust(8, '0')) * 8 + (8 - len(prefixo))
+
+
+class IndiceCEP:
+    """Leitor do índice em disco (somente leitura, seguro entre threads)"""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._arquivo = open(caminho, 'rb')
+        try:
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._arquivo.close()
+            raise ValueError(f"Índice de CEP vazio: {caminho}")
+
+        magico, versao, total = _CABECALHO.unpack_from(self._mapa, 0)
+        if magico != MAGICO or versao != VERSAO:
+            self.fechar()
+            raise ValueError(f"Arquivo de índice de CEP inválido: {caminho}")
+        if _CABECALHO.size + total * _REGISTRO.size > len(self._mapa):
+            self.fechar()
+            raise ValueError(f"Índice de CEP truncado: {caminho}")
+        self.total = total
+
+    def __len__(self):
+        return self.total
+
+    def _buscar_chave(self, chave: int) -> Optional[Tuple[float, float]]:
+        inicio, fim = 0, self.total
+        base, tamanho = _CABECALHO.size, _REGISTRO.size
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            chave_meio, latitude, longitude = _REGISTRO.unpack_from(self._mapa, base + meio * tamanho)
+            if chave_meio == chave:
+                return float(latitude), float(longitude)
+            if chave_meio < chave:
+                inicio = meio + 1
+            else:
+                fim = meio
+        return None
+
+    def buscar(self, cep: str) -> Optional[Tuple[float, float]]:
+        """Retorna (lat, lng) do prefixo mais específico conhecido para o CEP"""
+        digitos = re.sub(r'\D', '', str(cep or ''))
+        if len(digitos) != 8:
+            return None
+        for tamanho in range(8, TAMANHO_MINIMO_PREFIXO - 1, -1):
+            coordenadas = self._buscar_chave(_chave(digitos[:tamanho]))
+            if coordenadas is not None:
+                return coordenadas
+        return None
+
+    def fechar(self):
+        try:
+            self._mapa.close()
+        finally:
+            self._arquivo.close()
+
+
+def gravar_indice(caminho: str, centroides: Dict[str, Tuple[float, float]]) -> int:
+    """
+    Grava o índice de forma atômica (arquivo temporário + rename).
+    ``centroides`` mapeia prefixo de CEP (5 a 8 dígitos) para (lat, lng).
+    """
+    registros = sorted(
+        (_chave(prefixo), latitude, longitude)
+        for prefixo, (latitude, longitude) in centroides.items()
+    )
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(_CABECALHO.pack(MAGICO, VERSAO, len(registros)))
+        for registro in registros:
+            arquivo.write(_REGISTRO.pack(*registro))
+    os.replace(temporario, caminho)
+    recarregar()
+    return len(registros)
+
+
+def agregar_centroides(linhas: Iterable[Tuple[str, float, float]]) -> Dict[str, Tuple[float, float]]:
+    """Agrupa as linhas por prefixo, tirando a média quando o prefixo se repete"""
+    somas = {}
+    for prefixo, latitude, longitude in linhas:
+        prefixo = re.sub(r'\D', '', str(prefixo or ''))
+        if not TAMANHO_MINIMO_PREFIXO <= len(prefixo) <= 8:
+            continue
+        soma = somas.setdefault(prefixo, [0.0, 0.0, 0])
+        soma[0] += latitude
+        soma[1] += longitude
+        soma[2] += 1
+    return {
+        prefixo: (lat / total, lng / total)
+        for prefixo, (lat, lng, total) in somas.items()
+    }
+
+
+def _intervalo_verificacao() -> float:
+    return getattr(settings, 'CEP_INDICE_VERIFICACAO_SEGUNDOS', 30)
+
+
+def _identidade(caminho: str):
+    """(inode, tamanho, mtime) do arquivo, ou None se não existir"""
+    try:
+        estado = os.stat(caminho)
+    except OSError:
+        return None
+    return estado.st_ino, estado.st_size, estado.st_mtime_ns
+
+
+_indice = None
+_indice_identidade = None
+_indice_verificar_em = 0.0
+_indice_lock = Lock()
+
+
+def obter_indice() -> Optional[IndiceCEP]:
+    """
+    Índice aberto, reaberto se o arquivo mudou desde a última verificação
+    (no máximo uma por ``CEP_INDICE_VERIFICACAO_SEGUNDOS``); None se não houver arquivo.
+    """
+    global _indice, _indice_identidade, _indice_verificar_em
+    if time.monotonic() < _indice_verificar_em:
+        return _indice
+    with _indice_lock:
+        if time.monotonic() < _indice_verificar_em:
+            return _indice
+        caminho = caminho_indice()
+        identidade = _identidade(caminho)
+        if identidade != _indice_identidade:
+            # O índice anterior não é fechado: consultas em andamento ainda o usam
+            _indice = None
+            if identidade is not None:
+                try:
+                    _indice = IndiceCEP(caminho)
+                    logger.info(f"Índice de CEP carregado: {caminho} ({len(_indice)} prefixos)")
+                except (OSError, ValueError, struct.error) as e:
+                    logger.warning(f"Não foi possível abrir o índice de CEP: {e}")
+            _indice_identidade = identidade
+        _indice_verificar_em = time.monotonic() + _intervalo_verificacao()
+    return _indice
+
+
+def recarregar() -> None:
+    """Força a verificação do arquivo na próxima consulta"""
+    global _indice_identidade, _indice_verificar_em
+    with _indice_lock:
+        _indice_identidade = None
+        _indice_verificar_em = 0.0
+
+
+def buscar_coordenadas_cep(cep: str) -> Optional[Tuple[float, float]]:
+    """Coordenadas do CEP pelo índice offline, ou None se não houver índice/entrada"""
+    indice = obter_indice()
+    if indice is None:
+        return None
+    return indice.buscar(cep)
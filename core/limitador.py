@@ -0,0 +1,187 @@
+"""
+Limitador de cota (token bucket) compartilhado entre workers para APIs pagas.
+
+Cada chamada consome um token do balde por segundo e uma unidade da cota
+diária. O estado fica no Redis (script Lua atômico). Se o Redis configurado
+estiver indisponível, o limitador nega as chamadas (falha fechada) e quem
+chama segue com o cache ou o índice offline: cada processo com a cota inteira
+multiplicaria o gasto. Sem ``LIMITADOR_REDIS_URL`` (um único processo, ex.:
+desenvolvimento) o balde é local.
+
+``adquirir`` não espera por padrão; só tasks em segundo plano passam
+``espera_maxima`` para aguardar o limite por segundo.
+"""
+
+import logging
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Retorno: {1, 0} liberado | {0, espera_ms} limite por segundo | {-1, 0} cota diária esgotada
+_SCRIPT_LUA = """
+local capacidade = tonumber(ARGV[1])
+local taxa = tonumber(ARGV[2])
+local agora = tonumber(ARGV[3])
+local limite_diario = tonumber(ARGV[4])
+local ttl_diario = tonumber(ARGV[5])
+
+local usados = tonumber(redis.call('GET', KEYS[2]) or '0')
+if usados >= limite_diario then
+    return {-1, 0}
+end
+
+local balde = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(balde[1]) or capacidade
+local ts = tonumber(balde[2]) or agora
+tokens = math.min(capacidade, tokens + (agora - ts) / 1000 * taxa)
+
+if tokens < 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', agora)
+    return {0, math.ceil((1 - tokens) / taxa * 1000)}
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', agora)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacidade / taxa * 1000) + 1000)
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ttl_diario)
+return {1, 0}
+"""
+
+# Após uma falha do Redis, nega as chamadas por este tempo antes de tentar de novo
+_PAUSA_REDIS_SEGUNDOS = 30
+
+
+class CotaEsgotada(Exception):
+    """Cota diária da API esgotada"""
+
+
+class LimitadorCota:
+    """Token bucket por segundo + cota diária, identificado por ``nome``"""
+
+    def __init__(self, nome, limite_diario, limite_por_segundo):
+        self.nome = nome
+        self.limite_diario = int(limite_diario)
+        self.taxa = float(limite_por_segundo)
+        self.capacidade = max(1.0, self.taxa)
+        self._lock = Lock()
+        self._redis = None
+        self._redis_pausado_ate = 0.0
+        self._script = None
+        # Estado do balde local (sem Redis configurado)
+        self._tokens = self.capacidade
+        self._ts = time.monotonic()
+        self._dia = None
+        self._usados_local = 0
+
+    # ------------------------------------------------------------------ Redis
+    @staticmethod
+    def _redis_configurado():
+        return bool(getattr(settings, 'LIMITADOR_REDIS_URL', None))
+
+    def _cliente_redis(self):
+        if time.monotonic() < self._redis_pausado_ate:
+            return None
+        if self._redis is None:
+            url = getattr(settings, 'LIMITADOR_REDIS_URL', None)
+            if not url:
+                return None
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+                self._script = self._redis.register_script(_SCRIPT_LUA)
+            except Exception as e:
+                logger.warning(f"Limitador {self.nome}: Redis indisponível, negando chamadas ({e})")
+                self._redis_pausado_ate = time.monotonic() + _PAUSA_REDIS_SEGUNDOS
+                return None
+        return self._redis
+
+    def _chaves(self):
+        dia = timezone.localdate().isoformat()
+        return f"limitador:{self.nome}:balde", f"limitador:{self.nome}:dia:{dia}"
+
+    def _tentar_redis(self):
+        if self._cliente_redis() is None:
+            return None
+        try:
+            situacao, espera_ms = self._script(
+                keys=list(self._chaves()),
+                args=[self.capacidade, self.taxa, int(time.time() * 1000), self.limite_diario, 2 * 86400],
+            )
+            return int(situacao), int(espera_ms) / 1000.0
+        except Exception as e:
+            logger.warning(f"Limitador {self.nome}: falha no Redis, negando chamadas ({e})")
+            self._redis_pausado_ate = time.monotonic() + _PAUSA_REDIS_SEGUNDOS
+            return None
+
+    # ------------------------------------------------------------ balde local
+    def _tentar_local(self):
+        with self._lock:
+            hoje = timezone.localdate()
+            if hoje != self._dia:
+                self._dia, self._usados_local = hoje, 0
+            if self._usados_local >= self.limite_diario:
+                return -1, 0.0
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._ts) * self.taxa)
+            self._ts = agora
+            if self._tokens < 1:
+                return 0, (1 - self._tokens) / self.taxa
+            self._tokens -= 1
+            self._usados_local += 1
+            return 1, 0.0
+
+    # ---------------------------------------------------------------- público
+    def adquirir(self, espera_maxima=0.0):
+        """
+        Consome uma chamada da cota. Retorna True se liberado, False se deve
+        desistir (limite por segundo ou Redis indisponível). Só espera pelo
+        limite por segundo até ``espera_maxima`` segundos quando informado
+        (tasks); requisições web não devem esperar.
+        Lança ``CotaEsgotada`` quando a cota diária acabou.
+        """
+        prazo = time.monotonic() + espera_maxima
+        while True:
+            resultado = self._tentar_redis()
+            if resultado is None:
+                if self._redis_configurado():
+                    return False
+                resultado = self._tentar_local()
+            situacao, espera = resultado
+            if situacao == 1:
+                return True
+            if situacao == -1:
+                raise CotaEsgotada(f"Cota diária da API {self.nome} esgotada ({self.limite_diario})")
+            if time.monotonic() + espera > prazo:
+                return False
+            time.sleep(espera)
+
+    def uso_hoje(self):
+        """Chamadas consumidas hoje (Redis, ou o contador local no fallback)"""
+        cliente = self._cliente_redis()
+        if cliente is not None:
+            try:
+                return int(cliente.get(self._chaves()[1]) or 0)
+            except Exception:
+                pass
+        with self._lock:
+            return self._usados_local if self._dia == timezone.localdate() else 0
+
+
+_limitadores = {}
+_limitadores_lock = Lock()
+
+
+def limitador_opencage():
+    """Limitador compartilhado da API OpenCage, configurado pelos settings"""
+    with _limitadores_lock:
+        if 'opencage' not in _limitadores:
+            _limitadores['opencage'] = LimitadorCota(
+                'opencage',
+                limite_diario=getattr(settings, 'OPENCAGE_LIMITE_DIARIO', 2500),
+                limite_por_segundo=getattr(settings, 'OPENCAGE_LIMITE_POR_SEGUNDO', 1),
+            )
+        return _limitadores['opencage']
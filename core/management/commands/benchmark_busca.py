@@ -0,0 +1,120 @@
+import random
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from core.busca import IndiceBusca, termos
+
+# Vocabulário para montar cardápios sintéticos
+PRATOS = [
+    'pizza', 'hamburguer', 'pastel', 'esfiha', 'lanche', 'porcao', 'salada', 'marmita', 'sushi', 'temaki',
+    'yakisoba', 'crepe', 'tapioca', 'acai', 'sorvete', 'bolo', 'torta', 'suco', 'refrigerante', 'cerveja',
+]
+SABORES = [
+    'calabresa', 'mussarela', 'frango', 'catupiry', 'portuguesa', 'marguerita', 'bacon', 'cheddar', 'carne',
+    'costela', 'picanha', 'atum', 'palmito', 'milho', 'brocolis', 'chocolate', 'morango', 'banana', 'limao',
+    'laranja', 'abacaxi', 'coco', 'queijo', 'presunto', 'calabresa', 'salmao', 'camarao', 'lombo', 'tomate',
+]
+COMPLEMENTOS = ['especial', 'tradicional', 'grande', 'media', 'pequena', 'dupla', 'light', 'zero', 'gourmet', 'da casa']
+
+# Sílabas para gerar nomes próprios (marcas, receitas da casa): o vocabulário cresce com o cardápio
+CONSOANTES = ['b', 'c', 'd', 'f', 'g', 'j', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'z', 'ch', 'lh', 'nh', 'br', 'tr']
+VOGAIS = ['a', 'e', 'i', 'o', 'u', 'ao', 'ei', 'ou']
+
+# Consultas com erros de digitação e a consulta exata equivalente
+CONSULTAS = [
+    ('pizsa calabreza', 'pizza calabresa'),
+    ('hamburger chedar', 'hamburguer cheddar'),
+    ('sorvte chocolate', 'sorvete chocolate'),
+    ('refrigerate zero', 'refrigerante zero'),
+    ('mussarella', 'mussarela'),
+]
+
+
+def _palavras(quantidade, aleatorio):
+    """``quantidade`` palavras distintas com cara de português (2 a 4 sílabas)"""
+    palavras = set()
+    while len(palavras) < quantidade:
+        silabas = aleatorio.randint(2, 4)
+        palavras.add(''.join(aleatorio.choice(CONSOANTES) + aleatorio.choice(VOGAIS) for _ in range(silabas)))
+    return sorted(palavras)
+
+
+def _cardapio(tamanho, aleatorio):
+    categorias = [
+        SimpleNamespace(id=uuid.uuid4(), nome=prato.title(), slug=prato)
+        for prato in PRATOS
+    ]
+    # Cerca de um nome próprio novo a cada dois produtos
+    nomes_proprios = _palavras(max(1, tamanho // 2), aleatorio)
+    for _ in range(tamanho):
+        categoria = aleatorio.choice(categorias)
+        sabores = aleatorio.sample(SABORES, 2)
+        nome = f"{categoria.slug} {sabores[0]} {aleatorio.choice(COMPLEMENTOS)} {aleatorio.choice(nomes_proprios)}"
+        yield SimpleNamespace(
+            pk=uuid.uuid4(),
+            nome=nome,
+            categoria=categoria,
+            categoria_id=categoria.id,
+            descricao=f"{categoria.nome} de {sabores[0]} com {sabores[1]}",
+            ingredientes=', '.join(aleatorio.sample(SABORES, 3)),
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a latência da busca exata e da aproximada (com erros de digitação) para cardápios de vários '
+        'tamanhos. O vocabulário cresce com o cardápio (nomes próprios gerados), então a coluna de '
+        'correções mostra o custo real de vocabulários maiores.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanhos', type=int, nargs='+', default=[100, 1000, 5000, 10000],
+            help='Quantidade de produtos de cada cardápio sintético',
+        )
+        parser.add_argument('--repeticoes', type=int, default=200, help='Execuções de cada consulta')
+
+    def handle(self, *args, **options):
+        aleatorio = random.Random(42)
+        repeticoes = options['repeticoes']
+
+        self.stdout.write(
+            f"{'Produtos':>9}{'Termos':>9}{'Montagem (ms)':>15}{'Exata (µs)':>12}"
+            f"{'Aproximada (µs)':>17}{'Correções (µs)':>16}{'Acertos':>9}"
+        )
+        for tamanho in options['tamanhos']:
+            inicio = time.perf_counter()
+            indice = IndiceBusca()
+            for produto in _cardapio(tamanho, aleatorio):
+                indice.adicionar(produto)
+            montagem = (time.perf_counter() - inicio) * 1000
+
+            exata = self._medir(lambda consulta: indice.buscar(consulta[1]), repeticoes)
+            aproximada = self._medir(lambda consulta: indice.buscar_aproximado(consulta[0], limite=12), repeticoes)
+            # Só a busca dos termos corrigidos no índice de trigramas, sem pontuar produtos
+            correcoes = self._medir(
+                lambda consulta: [indice.correcoes(termo) for termo in termos(consulta[0])], repeticoes
+            )
+            # Consultas com erro que encontram algum produto da consulta exata
+            acertos = sum(
+                1 for com_erro, exata_consulta in CONSULTAS
+                if set(indice.buscar_aproximado(com_erro, limite=12)) & set(indice.buscar(exata_consulta))
+            )
+            self.stdout.write(
+                f"{tamanho:>9}{len(indice.postings):>9}{montagem:>15.1f}{exata:>12.1f}"
+                f"{aproximada:>17.1f}{correcoes:>16.1f}"
+                f"{f'{acertos}/{len(CONSULTAS)}':>9}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    def _medir(self, funcao, repeticoes):
+        """Média em microssegundos por consulta"""
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            for consulta in CONSULTAS:
+                funcao(consulta)
+        return (time.perf_counter() - inicio) * 1e6 / (repeticoes * len(CONSULTAS))
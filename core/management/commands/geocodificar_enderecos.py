@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from core.geocodificacao import MODELOS_GEOCODIFICAVEIS, geocodificar
+
+
+class Command(BaseCommand):
+    help = 'Geocodifica restaurantes e endereços ainda sem coordenadas (pendentes ou com falha)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modelo',
+            choices=list(MODELOS_GEOCODIFICAVEIS),
+            help='Processa apenas restaurantes ou apenas endereços'
+        )
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Refaz a geocodificação inclusive dos registros já geocodificados'
+        )
+
+    def handle(self, *args, **options):
+        modelos = [options['modelo']] if options['modelo'] else list(MODELOS_GEOCODIFICAVEIS)
+
+        for nome in modelos:
+            queryset = MODELOS_GEOCODIFICAVEIS[nome].objects.all()
+            if not options['todos']:
+                queryset = queryset.exclude(geocode_status='ok')
+
+            sucesso, falha = 0, 0
+            for instancia in queryset.iterator():
+                if geocodificar(instancia):
+                    sucesso += 1
+                else:
+                    falha += 1
+                    self.stdout.write(
+                        self.style.WARNING(f'Não foi possível geocodificar {nome} {instancia.pk}')
+                    )
+
+            self.stdout.write(
+                self.style.SUCCESS(f'{nome}: {sucesso} geocodificados, {falha} com falha')
+            )
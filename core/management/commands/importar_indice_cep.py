@@ -0,0 +1,64 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import indice_cep
+
+
+class Command(BaseCommand):
+    help = 'Importa um CSV de prefixos de CEP e centroides para o índice offline usado no cálculo de frete'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='CSV com as colunas cep, latitude e longitude')
+        parser.add_argument(
+            '--destino',
+            default=None,
+            help='Caminho do índice gerado (padrão: settings.CEP_INDICE_PATH)'
+        )
+        parser.add_argument('--coluna-cep', default='cep')
+        parser.add_argument('--coluna-latitude', default='latitude')
+        parser.add_argument('--coluna-longitude', default='longitude')
+
+    def handle(self, *args, **options):
+        destino = options['destino'] or indice_cep.caminho_indice()
+        colunas = (options['coluna_cep'], options['coluna_latitude'], options['coluna_longitude'])
+
+        try:
+            with open(options['arquivo'], newline='', encoding='utf-8-sig') as arquivo:
+                amostra = arquivo.read(4096)
+                arquivo.seek(0)
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+                leitor = csv.DictReader(arquivo, dialect=dialeto)
+
+                faltando = [c for c in colunas if c not in (leitor.fieldnames or [])]
+                if faltando:
+                    raise CommandError(f'Colunas ausentes no CSV: {", ".join(faltando)}')
+
+                linhas, ignoradas = [], 0
+                for linha in leitor:
+                    try:
+                        latitude = float(linha[colunas[1]].replace(',', '.'))
+                        longitude = float(linha[colunas[2]].replace(',', '.'))
+                    except (TypeError, ValueError, AttributeError):
+                        ignoradas += 1
+                        continue
+                    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                        ignoradas += 1
+                        continue
+                    linhas.append((linha[colunas[0]], latitude, longitude))
+        except OSError as e:
+            raise CommandError(f'Não foi possível ler o arquivo: {e}')
+        except csv.Error as e:
+            raise CommandError(f'CSV inválido: {e}')
+
+        centroides = indice_cep.agregar_centroides(linhas)
+        if not centroides:
+            raise CommandError('Nenhum prefixo de CEP válido (5 a 8 dígitos) encontrado no arquivo')
+
+        total = indice_cep.gravar_indice(destino, centroides)
+
+        if ignoradas:
+            self.stdout.write(self.style.WARNING(f'{ignoradas} linhas ignoradas por coordenadas inválidas'))
+        self.stdout.write(
+            self.style.SUCCESS(f'Índice de CEP gerado em {destino} com {total} prefixos')
+        )
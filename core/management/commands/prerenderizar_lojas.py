@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Restaurante
+from core.prerender import diretorio, prerenderizar_restaurante, remover_restaurante
+
+
+class Command(BaseCommand):
+    help = 'Pré-renderiza home, cardápio e categorias das lojas ativas em arquivos estáticos (com .gz/.br e manifest)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', help='Pré-renderiza apenas o restaurante informado')
+        parser.add_argument('--forcar', action='store_true', help='Regenera mesmo sem mudança no catálogo')
+
+    def handle(self, *args, **options):
+        restaurantes = Restaurante.objects.all()
+        if options['slug']:
+            restaurantes = restaurantes.filter(slug=options['slug'])
+
+        geradas = ignoradas = 0
+        for restaurante in restaurantes:
+            if restaurante.status != 'ativo':
+                remover_restaurante(restaurante.slug)
+                continue
+            paginas = prerenderizar_restaurante(restaurante, forcar=options['forcar'])
+            if paginas:
+                geradas += 1
+                self.stdout.write(f'{restaurante.nome}: {paginas} páginas')
+            else:
+                ignoradas += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Lojas pré-renderizadas em {diretorio()}: {geradas} atualizadas, {ignoradas} sem mudanças'
+        ))
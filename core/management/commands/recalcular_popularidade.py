@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Restaurante
+from core.popularidade import recalcular
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o ranking de produtos mais pedidos a partir do histórico de pedidos entregues'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', help='Recalcula apenas o restaurante informado')
+
+    def handle(self, *args, **options):
+        restaurante = None
+        if options['slug']:
+            restaurante = Restaurante.objects.filter(slug=options['slug']).first()
+            if restaurante is None:
+                raise CommandError(f"Restaurante '{options['slug']}' não encontrado")
+
+        total = recalcular(restaurante)
+        self.stdout.write(self.style.SUCCESS(f'Ranking de popularidade recalculado: {total} produtos'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Restaurante
+from core.zonas_entrega import reconstruir_zonas_automaticas
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os anéis automáticos de entrega a partir das regras de frete dos restaurantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', help='Reconstrói apenas o restaurante informado')
+
+    def handle(self, *args, **options):
+        restaurantes = Restaurante.objects.all()
+        if options['slug']:
+            restaurantes = restaurantes.filter(slug=options['slug'])
+
+        total = 0
+        for restaurante in restaurantes:
+            aneis = reconstruir_zonas_automaticas(restaurante)
+            total += 1
+            self.stdout.write(f'{restaurante.nome}: {aneis} anéis')
+
+        self.stdout.write(self.style.SUCCESS(f'Zonas de entrega reconstruídas para {total} restaurantes'))
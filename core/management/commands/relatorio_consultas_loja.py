@@ -0,0 +1,147 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.http import Http404
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+
+from core import cardapio_cache
+from core.models import Restaurante
+from loja.views import BaseLojaView
+
+# Páginas da loja medidas (nome da URL em ``loja`` e kwargs extras)
+PAGINAS = [
+    ('home', {}),
+    ('cardapio', {}),
+    ('categoria', {'categoria_slug': None}),
+    ('produto_detalhe', {'produto_slug': None}),
+    ('buscar', {}),
+    ('carrinho', {}),
+    ('checkout', {}),
+    ('acessar_pedidos', {}),
+    ('sobre', {}),
+    ('contato', {}),
+]
+
+# Sem cache, para medir o custo real de cada página no banco
+SEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class ContextoImediatoMixin:
+    """Avalia na hora o que ``BaseLojaView`` deixa preguiçoso (a referência da medição)"""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        snapshot = cardapio_cache.obter_snapshot(context['restaurante'])
+        for nome in self.dados_cardapio:
+            context[nome] = snapshot[nome]
+        context['carrinho_count'] = self.get_carrinho_count()
+        return context
+
+
+def _view(match, imediato):
+    """A view da URL, ou uma subclasse dela com ``ContextoImediatoMixin``"""
+    view_class = getattr(match.func, 'view_class', None)
+    if not imediato:
+        return match.func
+    if view_class is None or not issubclass(view_class, BaseLojaView):
+        return None
+    subclasse = type(f'{view_class.__name__}Imediata', (ContextoImediatoMixin, view_class), {})
+    return subclasse.as_view(**match.func.view_initkwargs)
+
+
+class Command(BaseCommand):
+    help = 'Mostra quantas consultas SQL cada página da loja faz, com contexto preguiçoso e com avaliação imediata'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug', help='Slug do restaurante')
+        parser.add_argument('--com-cache', action='store_true', help='Mede com o cache configurado (regime)')
+
+    def handle(self, *args, **options):
+        restaurante = Restaurante.objects.filter(slug=options['slug']).first()
+        if restaurante is None:
+            raise CommandError(f"Restaurante '{options['slug']}' não encontrado")
+
+        categoria = restaurante.categorias.filter(ativo=True).first()
+        produto = restaurante.produtos.filter(disponivel=True).first()
+        slugs_extras = {
+            'categoria_slug': categoria.slug if categoria else None,
+            'produto_slug': produto.slug if produto else None,
+        }
+
+        self.fabrica = RequestFactory()
+        if options['com_cache']:
+            linhas = self._medir_paginas(restaurante, slugs_extras)
+        else:
+            with override_settings(CACHES=SEM_CACHE):
+                linhas = self._medir_paginas(restaurante, slugs_extras)
+
+        self.stdout.write(f"{'Página':<18}{'Status':>8}{'Preguiçoso':>12}{'Imediato':>10}{'Economia':>10}")
+        total_preguicoso = total_imediato = 0
+        for nome, status, preguicoso, imediato in linhas:
+            total_preguicoso += preguicoso
+            total_imediato += imediato
+            self.stdout.write(f'{nome:<18}{status:>8}{preguicoso:>12}{imediato:>10}{imediato - preguicoso:>10}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {total_preguicoso} consultas com contexto preguiçoso, '
+            f'{total_imediato} com avaliação imediata ({total_imediato - total_preguicoso} a menos)'
+        ))
+
+    def _medir_paginas(self, restaurante, slugs_extras):
+        linhas = []
+        for nome, extras in PAGINAS:
+            kwargs = {'restaurante_slug': restaurante.slug}
+            for chave in extras:
+                kwargs[chave] = slugs_extras[chave]
+            if None in kwargs.values():
+                continue
+            url = reverse(f'loja:{nome}', kwargs=kwargs)
+            status, preguicoso = self._contar(url, False)
+            _, imediato = self._contar(url, True)
+            linhas.append((nome, status, preguicoso, imediato))
+        return linhas
+
+    def _requisicao(self, url, sessao):
+        requisicao = self.fabrica.get(url)
+        requisicao.session = sessao
+        requisicao.user = AnonymousUser()
+        requisicao._messages = default_storage(requisicao)
+        return requisicao
+
+    def _executar(self, view, match, requisicao):
+        try:
+            response = view(requisicao, *match.args, **match.kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            return response.status_code
+        except Http404:
+            return 404
+        except Exception:
+            return 500
+
+    def _contar(self, url, imediato):
+        match = resolve(url)
+        view = _view(match, imediato)
+        if view is None:
+            return 0, 0
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        # Sessão, carrinho e o que mais a página gravar são desfeitos ao final
+        with transaction.atomic():
+            try:
+                # Primeira requisição prepara a sessão (carrinho etc.); a medida é da segunda
+                sessao = SessionStore()
+                sessao.create()
+                self._executar(view, match, self._requisicao(url, sessao))
+                sessao.save()
+                requisicao = self._requisicao(url, SessionStore(sessao.session_key))
+                with CaptureQueriesContext(connection) as consultas:
+                    status = self._executar(view, match, requisicao)
+            finally:
+                transaction.set_rollback(True)
+        return status, len(consultas)
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-17 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_adicionar_campos_pagamento_entregador'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheGeocodificacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('cep', 'CEP (ViaCEP)'), ('endereco', 'Endereço (OpenCage)')], max_length=10)),
+                ('chave', models.CharField(help_text='CEP normalizado ou hash do endereço normalizado', max_length=64)),
+                ('consulta', models.CharField(blank=True, help_text='Texto original consultado', max_length=300)),
+                ('dados', models.JSONField(blank=True, default=dict, help_text='Payload retornado pela API')),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('expira_em', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cache de Geocodificação',
+                'verbose_name_plural': 'Cache de Geocodificação',
+                'db_table': 'cache_geocodificacao',
+                'unique_together': {('tipo', 'chave')},
+            },
+        ),
+    ]
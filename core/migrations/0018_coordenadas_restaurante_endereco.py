@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_cachegeocodificacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='endereco',
+            name='geocode_status',
+            field=models.CharField(choices=[('pendente', 'Pendente'), ('ok', 'Geocodificado'), ('falhou', 'Falhou')], default='pendente', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='endereco',
+            name='geocodificado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='endereco',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='endereco',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurante',
+            name='geocode_status',
+            field=models.CharField(choices=[('pendente', 'Pendente'), ('ok', 'Geocodificado'), ('falhou', 'Falhou')], default='pendente', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='restaurante',
+            name='geocodificado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurante',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurante',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
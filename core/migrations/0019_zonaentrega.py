@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:04
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_coordenadas_restaurante_endereco'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZonaEntrega',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('raio', 'Anel de distância'), ('bairro', 'Bairro')], max_length=10)),
+                ('distancia_max_km', models.DecimalField(blank=True, decimal_places=2, help_text='Limite superior do anel (apenas para tipo raio)', max_digits=6, null=True)),
+                ('bairro', models.CharField(blank=True, max_length=100)),
+                ('bairro_normalizado', models.CharField(blank=True, editable=False, max_length=100)),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('entrega_permitida', models.BooleanField(default=True)),
+                ('origem', models.CharField(choices=[('automatica', 'Automática (regras de frete)'), ('manual', 'Manual (lojista)')], default='manual', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zonas_entrega', to='core.restaurante')),
+            ],
+            options={
+                'verbose_name': 'Zona de Entrega',
+                'verbose_name_plural': 'Zonas de Entrega',
+                'db_table': 'zonas_entrega',
+                'ordering': ['restaurante', 'tipo', 'distancia_max_km', 'bairro'],
+                'indexes': [models.Index(fields=['restaurante', 'tipo', 'distancia_max_km'], name='zonas_entre_restaur_a7cd2a_idx'), models.Index(fields=['restaurante', 'tipo', 'bairro_normalizado'], name='zonas_entre_restaur_0d0a53_idx')],
+            },
+        ),
+    ]
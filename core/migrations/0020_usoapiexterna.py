@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_zonaentrega'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsoAPIExterna',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('api', models.CharField(choices=[('viacep', 'ViaCEP'), ('opencage', 'OpenCage'), ('indice_cep', 'Índice offline de CEP')], max_length=20)),
+                ('data', models.DateField()),
+                ('requisicoes', models.PositiveIntegerField(default=0, help_text='Chamadas feitas à API')),
+                ('acertos_cache', models.PositiveIntegerField(default=0, help_text='Consultas atendidas sem chamar a API')),
+                ('bloqueadas', models.PositiveIntegerField(default=0, help_text='Chamadas evitadas pelo limite de cota')),
+                ('erros', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Uso de API Externa',
+                'verbose_name_plural': 'Uso de APIs Externas',
+                'db_table': 'uso_apis_externas',
+                'ordering': ['-data', 'api'],
+                'unique_together': {('api', 'data')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:16
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_usoapiexterna'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularidadeProduto',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('pontuacao', models.FloatField(default=0, help_text='Quantidade vendida com decaimento exponencial')),
+                ('total_vendido', models.PositiveIntegerField(default=0, help_text='Quantidade total entregue')),
+                ('ultima_venda', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('produto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='popularidade', to='core.produto')),
+                ('restaurante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularidade_produtos', to='core.restaurante')),
+            ],
+            options={
+                'verbose_name': 'Popularidade do Produto',
+                'verbose_name_plural': 'Popularidade dos Produtos',
+                'db_table': 'popularidade_produtos',
+                'ordering': ['restaurante', '-pontuacao'],
+                'indexes': [models.Index(fields=['restaurante', '-pontuacao'], name='popularidad_restaur_b4ca4f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_popularidadeproduto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlteracaoCardapio',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('produto', 'Produto'), ('categoria', 'Categoria'), ('opcao', 'Opção de Personalização'), ('item', 'Item de Personalização')], max_length=20)),
+                ('objeto_id', models.UUIDField()),
+                ('removido', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('restaurante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alteracoes_cardapio', to='core.restaurante')),
+            ],
+            options={
+                'verbose_name': 'Alteração do Cardápio',
+                'verbose_name_plural': 'Alterações do Cardápio',
+                'db_table': 'alteracoes_cardapio',
+                'ordering': ['restaurante', 'id'],
+                'indexes': [models.Index(fields=['restaurante', 'id'], name='alteracoes__restaur_65f2c1_idx'), models.Index(fields=['restaurante', 'tipo', 'objeto_id'], name='alteracoes__restaur_142a5b_idx')],
+            },
+        ),
+    ]
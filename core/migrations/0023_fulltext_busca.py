@@ -0,0 +1,40 @@
+# Índices FULLTEXT usados pelo backend de busca ``fulltext`` (core/busca_fulltext.py)
+
+from django.db import migrations
+
+INDICES = [
+    ('produtos', 'ft_produtos_nome', ['nome']),
+    ('produtos', 'ft_produtos_texto', ['nome', 'descricao', 'ingredientes']),
+    ('categorias', 'ft_categorias_nome', ['nome']),
+]
+
+
+def criar_indices_fulltext(apps, schema_editor):
+    """Cria os índices FULLTEXT (apenas MySQL; nos demais bancos a busca fica em memória)"""
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    q = schema_editor.quote_name
+    for tabela, nome, colunas in INDICES:
+        schema_editor.execute(
+            f"ALTER TABLE {q(tabela)} ADD FULLTEXT INDEX {q(nome)} ({', '.join(q(coluna) for coluna in colunas)})"
+        )
+
+
+def remover_indices_fulltext(apps, schema_editor):
+    """Remove os índices FULLTEXT (rollback)"""
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    q = schema_editor.quote_name
+    for tabela, nome, _ in INDICES:
+        schema_editor.execute(f"ALTER TABLE {q(tabela)} DROP INDEX {q(nome)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_alteracaocardapio'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices_fulltext, remover_indices_fulltext),
+    ]
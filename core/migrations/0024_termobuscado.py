@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_fulltext_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermoBuscado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('termo', models.CharField(help_text='Consulta normalizada (minúsculas, sem acentos)', max_length=100)),
+                ('buscas', models.PositiveIntegerField(default=0)),
+                ('sem_resultado', models.PositiveIntegerField(default=0, help_text='Buscas que não encontraram nenhum produto')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termos_buscados', to='core.restaurante')),
+            ],
+            options={
+                'verbose_name': 'Termo Buscado',
+                'verbose_name_plural': 'Termos Buscados',
+                'db_table': 'termos_buscados',
+                'ordering': ['-data', '-buscas'],
+                'indexes': [models.Index(fields=['restaurante', 'data'], name='termos_busc_restaur_b3d5a1_idx')],
+                'unique_together': {('restaurante', 'data', 'termo')},
+            },
+        ),
+    ]
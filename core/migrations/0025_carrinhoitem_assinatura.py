@@ -0,0 +1,50 @@
+# Assinatura canônica dos itens do carrinho, única por carrinho (core/carrinho_assinatura.py)
+
+from django.db import migrations, models
+
+from core.carrinho_assinatura import assinatura_linha
+
+
+def preencher_assinaturas(apps, schema_editor):
+    """Calcula a assinatura dos itens existentes e junta as linhas repetidas de cada carrinho"""
+    CarrinhoItem = apps.get_model('core', 'CarrinhoItem')
+    linhas = {}
+    for item in CarrinhoItem.objects.order_by('created_at').iterator(chunk_size=2000):
+        item.assinatura = assinatura_linha(item.produto_id, item.dados_personalizacao)
+        chave = (item.carrinho_id, item.assinatura)
+        primeira = linhas.get(chave)
+        if primeira is None:
+            linhas[chave] = item
+            CarrinhoItem.objects.filter(pk=item.pk).update(assinatura=item.assinatura)
+        else:
+            primeira.quantidade += item.quantidade
+            CarrinhoItem.objects.filter(pk=primeira.pk).update(quantidade=primeira.quantidade)
+            item.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_termobuscado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carrinhoitem',
+            name='assinatura',
+            field=models.CharField(
+                default='',
+                editable=False,
+                help_text='Hash canônico de produto, personalizações e meio-a-meio (uma linha por assinatura)',
+                max_length=64,
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(preencher_assinaturas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='carrinhoitem',
+            constraint=models.UniqueConstraint(
+                fields=('carrinho', 'assinatura'), name='carrinho_item_assinatura_unica'
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Preços por bairro restritos à cidade/UF (core/zonas_entrega.py)
+
+from django.db import migrations, models
+
+from core.cache_geocodificacao import normalizar_endereco
+
+
+def preencher_cidade_uf(apps, schema_editor):
+    """Bairros já cadastrados passam a valer na cidade do restaurante"""
+    ZonaEntrega = apps.get_model('core', 'ZonaEntrega')
+    for zona in ZonaEntrega.objects.filter(tipo='bairro').select_related('restaurante'):
+        restaurante = zona.restaurante
+        ZonaEntrega.objects.filter(pk=zona.pk).update(
+            cidade=restaurante.cidade,
+            cidade_normalizada=normalizar_endereco(restaurante.cidade)[:100],
+            uf=(restaurante.estado or '').upper(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_carrinhoitem_assinatura'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zonaentrega',
+            name='cidade',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='zonaentrega',
+            name='cidade_normalizada',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='zonaentrega',
+            name='uf',
+            field=models.CharField(blank=True, max_length=2),
+        ),
+        migrations.RunPython(preencher_cidade_uf, migrations.RunPython.noop),
+    ]
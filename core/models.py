@@ -1,10 +1,15 @@
-def calcular_distancia_entre_ceps(cep_origem, cep_destino, api_url='http://localhost:5000/calcular-frete'):
+def calcular_distancia_entre_ceps(cep_origem, cep_destino, api_url='http://localhost:5000/calcular-frete',
+                                  coord_origem=None, coord_destino=None):
     """
     Calcula a distância entre dois CEPs usando o utilitário local (OpenCage/ViaCEP).
+    Coordenadas já geocodificadas, quando informadas, dispensam as consultas externas.
     Retorna a distância em km (float) ou None em caso de erro.
     """
     from core.utils_frete_cep import calcular_frete_cep
-    resultado = calcular_frete_cep(cep_destino=cep_destino, cep_referencia=cep_origem)
+    resultado = calcular_frete_cep(
+        cep_destino=cep_destino, cep_referencia=cep_origem,
+        coord_referencia=coord_origem, coord_destino=coord_destino
+    )
     if resultado and 'distancia_km' in resultado:
         return resultado['distancia_km']
     return None
@@ -27,6 +32,19 @@ from django.utils.text import slugify
 from django.utils import timezone
 import uuid
 
+from .carrinho_assinatura import assinatura_linha
+
+
+# Situação da geocodificação de endereços (Restaurante e Endereco)
+GEOCODE_STATUS_CHOICES = [
+    ('pendente', 'Pendente'),
+    ('ok', 'Geocodificado'),
+    ('falhou', 'Falhou'),
+]
+
+# Campos cuja alteração exige nova geocodificação
+CAMPOS_ENDERECO_GEOCODIFICACAO = ('cep', 'logradouro', 'numero', 'bairro', 'cidade', 'estado')
+
 
 class Usuario(AbstractUser):
     """Modelo customizado de usuário para o sistema multi-site"""
@@ -79,6 +97,11 @@ class Endereco(models.Model):
     estado = models.CharField(max_length=2)
     ponto_referencia = models.TextField(blank=True)
     principal = models.BooleanField(default=False)
+    # Geocodificação (preenchida em background quando o endereço muda)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geocode_status = models.CharField(max_length=10, choices=GEOCODE_STATUS_CHOICES, default='pendente')
+    geocodificado_em = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -89,6 +112,18 @@ class Endereco(models.Model):
     def __str__(self):
         return f"{self.nome} - {self.logradouro}, {self.numero}"
 
+    @property
+    def coordenadas(self):
+        """(lat, lng) já geocodificados ou None"""
+        if self.latitude is None or self.longitude is None:
+            return None
+        return (self.latitude, self.longitude)
+
+    @property
+    def endereco_geocodificacao(self):
+        """Texto usado na consulta de geocodificação"""
+        return f"{self.logradouro}, {self.numero}, {self.bairro}, {self.cidade}, {self.estado}"
+
 
 class Plano(models.Model):
     """Modelo para planos de assinatura dos lojistas"""
@@ -232,6 +267,11 @@ class Restaurante(models.Model):
     bairro = models.CharField(max_length=100)
     cidade = models.CharField(max_length=100)
     estado = models.CharField(max_length=2)
+    # Geocodificação (preenchida em background quando o endereço muda)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geocode_status = models.CharField(max_length=10, choices=GEOCODE_STATUS_CHOICES, default='pendente')
+    geocodificado_em = models.DateTimeField(null=True, blank=True)
     
     # Configurações operacionais
     tipo_servico = models.CharField(max_length=20, choices=TIPO_SERVICO_CHOICES, default='ambos')
@@ -264,13 +304,31 @@ class Restaurante(models.Model):
         verbose_name_plural = 'Restaurantes'
 
     def save(self, *args, **kwargs):
+        from .restaurante_cache import invalidar
+
         if not self.slug:
             self.slug = slugify(self.nome)
+        slug_anterior = None
+        if not self._state.adding:
+            slug_anterior = Restaurante.objects.filter(pk=self.pk).values_list('slug', flat=True).first()
         super().save(*args, **kwargs)
+        invalidar(self.slug, slug_anterior)
 
     def __str__(self):
         return self.nome
 
+    @property
+    def coordenadas(self):
+        """(lat, lng) já geocodificados ou None"""
+        if self.latitude is None or self.longitude is None:
+            return None
+        return (self.latitude, self.longitude)
+
+    @property
+    def endereco_geocodificacao(self):
+        """Texto usado na consulta de geocodificação"""
+        return f"{self.logradouro}, {self.numero}, {self.bairro}, {self.cidade}, {self.estado}"
+
     @property
     def esta_aberto(self):
         """Verifica se o restaurante está aberto com base no horário"""
@@ -557,28 +615,16 @@ class ItemPersonalizacao(models.Model):
 
 class Pedido(models.Model):
     def calcular_frete(self):
-        """Calcula o valor do frete para o pedido, usando utilitário local e respeitando o raio limite de entrega. Sempre retorna Decimal."""
-        from core.utils_frete_cep import calcular_frete_cep
-        from decimal import Decimal
-        restaurante = self.restaurante
-        if restaurante.frete_fixo and restaurante.valor_frete_fixo is not None:
-            return Decimal(str(restaurante.valor_frete_fixo))
-        if restaurante.valor_frete_padrao is not None:
-            valor = Decimal(str(restaurante.valor_frete_padrao))
-            if self.endereco_cep and restaurante.cep and restaurante.valor_adicional_km:
-                resultado = calcular_frete_cep(
-                    cep_destino=self.endereco_cep,
-                    cep_referencia=restaurante.cep,
-                    taxa_base=float(restaurante.valor_frete_padrao),
-                    taxa_km=float(restaurante.valor_adicional_km),
-                    raio_limite_km=float(restaurante.raio_limite_km) if restaurante.raio_limite_km else None
-                )
-                if resultado and 'erro' in resultado:
-                    raise Exception(resultado['erro'])
-                if resultado and 'custo_frete' in resultado:
-                    return Decimal(str(resultado['custo_frete']))
-            return valor
-        return Decimal('0.0')
+        """Calcula o valor do frete para o pedido com FreteService.cotar (o mesmo cálculo da prévia do checkout), respeitando o raio limite de entrega. Sempre retorna Decimal."""
+        from core.services import FreteService
+        cotacao = FreteService.cotar(
+            self.restaurante,
+            self.endereco_cep,
+            endereco=self.endereco_entrega
+        )
+        if cotacao['erro']:
+            raise Exception(cotacao['erro'])
+        return cotacao['valor']
     """Modelo para pedidos"""
     STATUS_CHOICES = [
         ('carrinho', 'No Carrinho'),
@@ -1067,6 +1113,11 @@ class CarrinhoItem(models.Model):
         blank=True,
         help_text="Dados de personalização incluindo meio-a-meio"
     )
+    assinatura = models.CharField(
+        max_length=64,
+        editable=False,
+        help_text="Hash canônico de produto, personalizações e meio-a-meio (uma linha por assinatura)"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1075,7 +1126,10 @@ class CarrinhoItem(models.Model):
         db_table = 'carrinho_itens'
         verbose_name = 'Item do Carrinho'
         verbose_name_plural = 'Itens do Carrinho'
-        # Removido unique_together com JSON por limitação do MySQL
+        # Unicidade pela assinatura em vez do JSON (não indexável no MySQL)
+        constraints = [
+            models.UniqueConstraint(fields=['carrinho', 'assinatura'], name='carrinho_item_assinatura_unica'),
+        ]
         indexes = [
             models.Index(fields=['carrinho', 'produto']),
         ]
@@ -1083,6 +1137,8 @@ class CarrinhoItem(models.Model):
     def save(self, *args, **kwargs):
         if not self.preco_unitario:
             self.preco_unitario = self.produto.preco_final
+        if not self.assinatura:
+            self.assinatura = assinatura_linha(self.produto_id, self.dados_personalizacao)
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -1136,3 +1192,215 @@ class CarrinhoItemPersonalizacao(models.Model):
     
     def __str__(self):
         return f"{self.opcao_nome}: {self.item_nome}"
+
+
+# ====================== ZONAS DE ENTREGA ======================
+
+class ZonaEntrega(models.Model):
+    """
+    Tabela pré-calculada de zonas de entrega por restaurante.
+    Anéis de distância são gerados a partir das regras de frete do restaurante
+    e servem para bloquear faixas de distância (o preço por km é contínuo);
+    bairros são preços fixos (ou bloqueios) definidos pelo lojista.
+    """
+    TIPO_CHOICES = [
+        ('raio', 'Anel de distância'),
+        ('bairro', 'Bairro'),
+    ]
+    ORIGEM_CHOICES = [
+        ('automatica', 'Automática (regras de frete)'),
+        ('manual', 'Manual (lojista)'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    restaurante = models.ForeignKey(Restaurante, on_delete=models.CASCADE, related_name='zonas_entrega')
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    distancia_max_km = models.DecimalField(
+        max_digits=6, decimal_places=2, null=True, blank=True,
+        help_text="Limite superior do anel (apenas para tipo raio)"
+    )
+    bairro = models.CharField(max_length=100, blank=True)
+    bairro_normalizado = models.CharField(max_length=100, blank=True, editable=False)
+    # Bairros valem só na cidade/UF indicadas (dados do CEP, não o texto do cliente)
+    cidade = models.CharField(max_length=100, blank=True)
+    cidade_normalizada = models.CharField(max_length=100, blank=True, editable=False)
+    uf = models.CharField(max_length=2, blank=True)
+    valor = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    entrega_permitida = models.BooleanField(default=True)
+    origem = models.CharField(max_length=10, choices=ORIGEM_CHOICES, default='manual')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'zonas_entrega'
+        verbose_name = 'Zona de Entrega'
+        verbose_name_plural = 'Zonas de Entrega'
+        ordering = ['restaurante', 'tipo', 'distancia_max_km', 'bairro']
+        indexes = [
+            models.Index(fields=['restaurante', 'tipo', 'distancia_max_km']),
+            models.Index(fields=['restaurante', 'tipo', 'bairro_normalizado']),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .cache_geocodificacao import normalizar_endereco
+        self.bairro_normalizado = normalizar_endereco(self.bairro)[:100]
+        self.cidade_normalizada = normalizar_endereco(self.cidade)[:100]
+        self.uf = self.uf.upper()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        if self.tipo == 'bairro':
+            return f"{self.restaurante.nome} - {self.bairro}: R$ {self.valor}"
+        return f"{self.restaurante.nome} - até {self.distancia_max_km} km: R$ {self.valor}"
+
+
+# ====================== CACHE DE GEOCODIFICAÇÃO ======================
+
+class CacheGeocodificacao(models.Model):
+    """Cache persistente das consultas ViaCEP (por CEP) e OpenCage (por endereço)"""
+    TIPO_CHOICES = [
+        ('cep', 'CEP (ViaCEP)'),
+        ('endereco', 'Endereço (OpenCage)'),
+    ]
+
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    chave = models.CharField(max_length=64, help_text="CEP normalizado ou hash do endereço normalizado")
+    consulta = models.CharField(max_length=300, blank=True, help_text="Texto original consultado")
+    dados = models.JSONField(default=dict, blank=True, help_text="Payload retornado pela API")
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    expira_em = models.DateTimeField(db_index=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'cache_geocodificacao'
+        verbose_name = 'Cache de Geocodificação'
+        verbose_name_plural = 'Cache de Geocodificação'
+        unique_together = ['tipo', 'chave']
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.consulta or self.chave}"
+
+    @property
+    def expirado(self):
+        return self.expira_em <= timezone.now()
+
+
+class UsoAPIExterna(models.Model):
+    """Uso diário das APIs externas de CEP/geocodificação (consumo e taxa de cache)"""
+    API_CHOICES = [
+        ('viacep', 'ViaCEP'),
+        ('opencage', 'OpenCage'),
+        ('indice_cep', 'Índice offline de CEP'),
+    ]
+    api = models.CharField(max_length=20, choices=API_CHOICES)
+    data = models.DateField()
+    requisicoes = models.PositiveIntegerField(default=0, help_text="Chamadas feitas à API")
+    acertos_cache = models.PositiveIntegerField(default=0, help_text="Consultas atendidas sem chamar a API")
+    bloqueadas = models.PositiveIntegerField(default=0, help_text="Chamadas evitadas pelo limite de cota")
+    erros = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'uso_apis_externas'
+        verbose_name = 'Uso de API Externa'
+        verbose_name_plural = 'Uso de APIs Externas'
+        unique_together = ['api', 'data']
+        ordering = ['-data', 'api']
+
+    def __str__(self):
+        return f"{self.get_api_display()} em {self.data:%d/%m/%Y}: {self.requisicoes} requisições"
+
+    @property
+    def taxa_acerto_cache(self):
+        """Percentual de consultas atendidas pelo cache"""
+        total = self.requisicoes + self.acertos_cache
+        return round(self.acertos_cache * 100 / total, 1) if total else 0.0
+
+
+class PopularidadeProduto(models.Model):
+    """
+    Ranking materializado de produtos mais pedidos por restaurante.
+    Incrementado quando um pedido é entregue e decaído periodicamente (Celery Beat),
+    para que vendas recentes pesem mais que as antigas.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    restaurante = models.ForeignKey(Restaurante, on_delete=models.CASCADE, related_name='popularidade_produtos')
+    produto = models.OneToOneField(Produto, on_delete=models.CASCADE, related_name='popularidade')
+    pontuacao = models.FloatField(default=0, help_text="Quantidade vendida com decaimento exponencial")
+    total_vendido = models.PositiveIntegerField(default=0, help_text="Quantidade total entregue")
+    ultima_venda = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'popularidade_produtos'
+        verbose_name = 'Popularidade do Produto'
+        verbose_name_plural = 'Popularidade dos Produtos'
+        ordering = ['restaurante', '-pontuacao']
+        indexes = [
+            models.Index(fields=['restaurante', '-pontuacao']),
+        ]
+
+    def __str__(self):
+        return f"{self.produto.nome}: {self.pontuacao:.1f}"
+
+
+
+class AlteracaoCardapio(models.Model):
+    """
+    Registro de alterações do cardápio para sincronização incremental.
+    O id é a versão: cada objeto alterado mantém apenas o registro mais recente,
+    e exclusões ficam como marcadores (``removido``) para os clientes.
+    """
+    TIPO_CHOICES = [
+        ('produto', 'Produto'),
+        ('categoria', 'Categoria'),
+        ('opcao', 'Opção de Personalização'),
+        ('item', 'Item de Personalização'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    restaurante = models.ForeignKey(Restaurante, on_delete=models.CASCADE, related_name='alteracoes_cardapio')
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    objeto_id = models.UUIDField()
+    removido = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'alteracoes_cardapio'
+        verbose_name = 'Alteração do Cardápio'
+        verbose_name_plural = 'Alterações do Cardápio'
+        ordering = ['restaurante', 'id']
+        indexes = [
+            models.Index(fields=['restaurante', 'id']),
+            models.Index(fields=['restaurante', 'tipo', 'objeto_id']),
+        ]
+
+    def __str__(self):
+        acao = 'removido' if self.removido else 'alterado'
+        return f"v{self.id}: {self.get_tipo_display()} {self.objeto_id} {acao}"
+
+
+class TermoBuscado(models.Model):
+    """Buscas feitas na loja, agregadas por dia e termo (gravadas em lotes)"""
+    restaurante = models.ForeignKey(Restaurante, on_delete=models.CASCADE, related_name='termos_buscados')
+    data = models.DateField()
+    termo = models.CharField(max_length=100, help_text="Consulta normalizada (minúsculas, sem acentos)")
+    buscas = models.PositiveIntegerField(default=0)
+    sem_resultado = models.PositiveIntegerField(default=0, help_text="Buscas que não encontraram nenhum produto")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'termos_buscados'
+        verbose_name = 'Termo Buscado'
+        verbose_name_plural = 'Termos Buscados'
+        unique_together = ['restaurante', 'data', 'termo']
+        ordering = ['-data', '-buscas']
+        indexes = [
+            models.Index(fields=['restaurante', 'data']),
+        ]
+
+    def __str__(self):
+        return f"{self.termo} ({self.buscas} buscas em {self.data:%d/%m/%Y})"
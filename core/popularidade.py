@@ -0,0 +1,161 @@
+"""
+Ranking de produtos mais pedidos por restaurante (``PopularidadeProduto``).
+
+A pontuação de cada produto soma as quantidades entregues e decai
+exponencialmente com meia-vida ``POPULARIDADE_MEIA_VIDA_DIAS``:
+
+- quando um pedido passa a ``entregue``, as quantidades dos itens são somadas
+  (incremento atômico, após o commit);
+- a task diária ``decair_popularidade`` multiplica todas as pontuações pelo
+  fator de um dia;
+- ``recalcular`` reconstrói o ranking a partir do histórico de ``ItemPedido``.
+
+As páginas da loja apenas ordenam pela pontuação já calculada.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ItemPedido, PopularidadeProduto
+
+logger = logging.getLogger(__name__)
+
+# Pontuações abaixo disso são zeradas no decaimento
+PONTUACAO_MINIMA = 0.01
+
+
+def _meia_vida_dias():
+    return float(getattr(settings, 'POPULARIDADE_MEIA_VIDA_DIAS', 30))
+
+
+def fator_decaimento(dias):
+    """Fator multiplicativo para ``dias`` de decaimento"""
+    return 0.5 ** (dias / _meia_vida_dias())
+
+
+def ordem_popularidade(*desempate):
+    """Ordenação de querysets de Produto pelo ranking (produtos sem vendas por último)"""
+    return (F('popularidade__pontuacao').desc(nulls_last=True), *desempate)
+
+
+def _incrementar_versao(chave):
+    try:
+        cache.incr(chave)
+    except ValueError:
+        cache.set(chave, 1, timeout=None)
+
+
+def versao_ranking(restaurante_id):
+    """Versão do ranking do restaurante (muda a cada pedido entregue e a cada decaimento)"""
+    chaves = [f"popularidade:{restaurante_id}:versao", 'popularidade:decaimento']
+    valores = cache.get_many(chaves)
+    return ':'.join(str(valores.get(chave, 0)) for chave in chaves)
+
+
+def _somar(restaurante_id, produto_id, quantidade, quando):
+    atualizados = PopularidadeProduto.objects.filter(produto_id=produto_id).update(
+        pontuacao=F('pontuacao') + quantidade,
+        total_vendido=F('total_vendido') + quantidade,
+        ultima_venda=quando,
+    )
+    if atualizados:
+        return
+    try:
+        with transaction.atomic():
+            PopularidadeProduto.objects.create(
+                restaurante_id=restaurante_id,
+                produto_id=produto_id,
+                pontuacao=quantidade,
+                total_vendido=quantidade,
+                ultima_venda=quando,
+            )
+    except IntegrityError:
+        # Criado em paralelo por outro worker: soma sobre o registro existente
+        _somar(restaurante_id, produto_id, quantidade, quando)
+
+
+def registrar_pedido_entregue(pedido):
+    """Soma ao ranking as quantidades dos itens do pedido entregue"""
+    quantidades = (
+        ItemPedido.objects.filter(pedido=pedido)
+        .values('produto_id')
+        .annotate(quantidade=Sum('quantidade'))
+    )
+    quando = pedido.data_entrega or timezone.now()
+    for linha in quantidades:
+        _somar(pedido.restaurante_id, linha['produto_id'], linha['quantidade'], quando)
+    _incrementar_versao(f"popularidade:{pedido.restaurante_id}:versao")
+    # A home da loja lista os mais pedidos
+    from .prerender import agendar
+    agendar(pedido.restaurante_id)
+    logger.debug(f"Popularidade atualizada com o pedido {pedido.numero}")
+
+
+def agendar_registro_pedido_entregue(pedido):
+    """Registra o pedido no ranking após o commit da transação atual"""
+    def _registrar():
+        try:
+            registrar_pedido_entregue(pedido)
+        except Exception as e:
+            logger.warning(f"Não foi possível atualizar a popularidade com o pedido {pedido.pk}: {e}")
+
+    transaction.on_commit(_registrar)
+
+
+def decair(dias=1):
+    """Aplica o decaimento de ``dias`` a todas as pontuações; retorna quantas mudaram"""
+    fator = fator_decaimento(dias)
+    atualizados = PopularidadeProduto.objects.filter(pontuacao__gt=0).update(pontuacao=F('pontuacao') * fator)
+    PopularidadeProduto.objects.filter(pontuacao__gt=0, pontuacao__lt=PONTUACAO_MINIMA).update(pontuacao=0)
+    _incrementar_versao('popularidade:decaimento')
+    return atualizados
+
+
+@transaction.atomic
+def recalcular(restaurante=None):
+    """
+    Reconstrói o ranking a partir dos itens de pedidos entregues, aplicando o
+    decaimento pela data de entrega. Retorna quantos produtos foram gravados.
+    """
+    itens = ItemPedido.objects.filter(pedido__status='entregue')
+    ranking = PopularidadeProduto.objects.all()
+    if restaurante is not None:
+        itens = itens.filter(pedido__restaurante=restaurante)
+        ranking = ranking.filter(restaurante=restaurante)
+
+    por_dia = (
+        itens.annotate(dia=TruncDate('pedido__data_entrega'))
+        .values('produto_id', 'pedido__restaurante_id', 'dia')
+        .annotate(quantidade=Sum('quantidade'), ultima=Max('pedido__data_entrega'))
+    )
+
+    hoje = timezone.localdate()
+    acumulado = defaultdict(lambda: {'pontuacao': 0.0, 'total': 0, 'ultima': None})
+    for linha in por_dia:
+        dados = acumulado[(linha['pedido__restaurante_id'], linha['produto_id'])]
+        dias = (hoje - linha['dia']).days if linha['dia'] else 0
+        dados['pontuacao'] += linha['quantidade'] * fator_decaimento(max(dias, 0))
+        dados['total'] += linha['quantidade']
+        if linha['ultima'] and (dados['ultima'] is None or linha['ultima'] > dados['ultima']):
+            dados['ultima'] = linha['ultima']
+
+    ranking.delete()
+    PopularidadeProduto.objects.bulk_create([
+        PopularidadeProduto(
+            restaurante_id=restaurante_id,
+            produto_id=produto_id,
+            pontuacao=dados['pontuacao'] if dados['pontuacao'] >= PONTUACAO_MINIMA else 0,
+            total_vendido=dados['total'],
+            ultima_venda=dados['ultima'],
+        )
+        for (restaurante_id, produto_id), dados in acumulado.items()
+    ])
+    _incrementar_versao('popularidade:decaimento')
+    return len(acumulado)
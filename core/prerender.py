@@ -0,0 +1,210 @@
+"""
+Pré-renderização das páginas públicas da loja (home, cardápio e categorias).
+
+Para visitantes anônimos essas páginas só mudam quando o catálogo muda. Elas
+são renderizadas pelas próprias views (como um visitante anônimo) em
+``PRERENDER_ROOT/<slug>/...``, com variantes ``.gz`` e ``.br``, e um
+``manifest.json`` por restaurante com a versão do catálogo usada. O Nginx serve
+os arquivos sem passar pelo Django, por exemplo::
+
+    location / {
+        if ($cookie_sessionid) { proxy_pass http://django; }
+        gzip_static on;
+        brotli_static on;
+        try_files /prerender$uri/index.html @django;
+    }
+
+As páginas são regeneradas em background (``PRERENDER_ATIVO``) quando o
+catálogo, os horários, o restaurante ou o ranking de mais pedidos mudam, e
+pelo comando ``prerenderizar_lojas`` (ex.: após o decaimento diário);
+restaurantes cuja versão do catálogo não mudou são ignorados.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from . import cardapio_delta
+from .models import HorarioFuncionamento, Restaurante
+from .popularidade import versao_ranking
+
+try:
+    import brotli
+except ImportError:  # Variantes .br são opcionais
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# O token CSRF é por visitante: não pode ir para um arquivo estático
+_CAMPO_CSRF = re.compile(r'<input type="hidden" name="csrfmiddlewaretoken" value="[^"]*">')
+
+
+def diretorio():
+    return Path(getattr(settings, 'PRERENDER_ROOT', Path(settings.BASE_DIR) / 'prerender'))
+
+
+def versao_catalogo(restaurante):
+    """
+    Impressão digital de tudo o que as páginas exibem: dados do restaurante,
+    registro de alterações do cardápio (qualquer campo de categorias, produtos
+    e personalizações), horários e ranking de mais pedidos.
+    """
+    horarios = HorarioFuncionamento.objects.filter(restaurante=restaurante).order_by('dia_semana').values_list(
+        'dia_semana', 'hora_abertura', 'hora_fechamento', 'ativo'
+    )
+    partes = [
+        restaurante.updated_at.isoformat() if restaurante.updated_at else '',
+        cardapio_delta.versao_atual(restaurante.pk),
+        cardapio_delta.ultima_versao(restaurante.pk),
+        list(horarios),
+        versao_ranking(restaurante.pk),
+    ]
+    return hashlib.sha256('|'.join(map(str, partes)).encode()).hexdigest()[:16]
+
+
+def _paginas(restaurante):
+    kwargs = {'restaurante_slug': restaurante.slug}
+    paginas = [reverse('loja:home', kwargs=kwargs), reverse('loja:cardapio', kwargs=kwargs)]
+    for slug in restaurante.categorias.filter(ativo=True).values_list('slug', flat=True):
+        paginas.append(reverse('loja:categoria', kwargs={**kwargs, 'categoria_slug': slug}))
+    return paginas
+
+
+def _renderizar(caminho):
+    """Renderiza a página como um visitante anônimo, sem sessão persistida"""
+    request = RequestFactory().get(caminho)
+    request.user = AnonymousUser()
+    request.session = SessionBase()
+    request.prerender = True
+    correspondencia = resolve(caminho)
+    request.resolver_match = correspondencia
+    response = correspondencia.func(request, *correspondencia.args, **correspondencia.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        return None
+    return _CAMPO_CSRF.sub('', response.content.decode(response.charset or 'utf-8')).encode('utf-8')
+
+
+def _gravar(destino, conteudo):
+    """Grava atomicamente (arquivo temporário + rename) o HTML e as variantes comprimidas"""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    variantes = {destino: conteudo, destino.with_name(destino.name + '.gz'): gzip.compress(conteudo, 9, mtime=0)}
+    if brotli is not None:
+        variantes[destino.with_name(destino.name + '.br')] = brotli.compress(conteudo)
+    for arquivo, dados in variantes.items():
+        with tempfile.NamedTemporaryFile(dir=arquivo.parent, delete=False) as temporario:
+            temporario.write(dados)
+        os.replace(temporario.name, arquivo)
+        os.chmod(arquivo, 0o644)
+    return {arquivo.suffix or '.html': len(dados) for arquivo, dados in variantes.items()}
+
+
+def _remover_pagina(relativo):
+    """Apaga o HTML e as variantes da página; a pasta só sai se ficar vazia"""
+    destino = diretorio() / relativo
+    for arquivo in (destino, destino.with_name(destino.name + '.gz'), destino.with_name(destino.name + '.br')):
+        arquivo.unlink(missing_ok=True)
+    try:
+        destino.parent.rmdir()
+    except OSError:
+        pass  # Ainda tem outras páginas (ex.: index.html da loja com as categorias dentro)
+
+
+def _ler_manifesto(base):
+    try:
+        return json.loads((base / 'manifest.json').read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def prerenderizar_restaurante(restaurante, forcar=False):
+    """
+    Gera as páginas estáticas do restaurante se a versão do catálogo mudou.
+    Retorna quantas páginas foram gravadas (0 se nada mudou).
+    """
+    base = diretorio() / restaurante.slug
+    versao = versao_catalogo(restaurante)
+    manifesto_anterior = _ler_manifesto(base)
+    if not forcar and manifesto_anterior.get('versao_catalogo') == versao:
+        return 0
+
+    paginas = {}
+    for caminho in _paginas(restaurante):
+        conteudo = _renderizar(caminho)
+        if conteudo is None:
+            logger.warning(f"Pré-renderização de {caminho} ignorada: página não retornou 200")
+            continue
+        relativo = caminho.strip('/') + '/index.html'
+        tamanhos = _gravar(diretorio() / relativo, conteudo)
+        paginas[caminho] = {
+            'arquivo': relativo,
+            'sha256': hashlib.sha256(conteudo).hexdigest(),
+            'bytes': tamanhos,
+        }
+
+    # Remove páginas que deixaram de existir (ex.: categoria desativada)
+    for caminho, pagina in manifesto_anterior.get('paginas', {}).items():
+        if caminho not in paginas:
+            _remover_pagina(pagina['arquivo'])
+
+    manifesto = {
+        'restaurante': restaurante.slug,
+        'versao_catalogo': versao,
+        'gerado_em': timezone.now().isoformat(),
+        'paginas': paginas,
+    }
+    _gravar(base / 'manifest.json', json.dumps(manifesto, indent=2, ensure_ascii=False).encode('utf-8'))
+    logger.info(f"Loja {restaurante.slug} pré-renderizada: {len(paginas)} páginas (catálogo {versao})")
+    return len(paginas)
+
+
+def remover_restaurante(slug):
+    """Apaga as páginas estáticas do restaurante (ex.: loja desativada)"""
+    shutil.rmtree(diretorio() / slug, ignore_errors=True)
+
+
+def agendar(restaurante_id):
+    """
+    Agenda a pré-renderização do restaurante após o commit, agrupando as
+    alterações feitas dentro de ``PRERENDER_ATRASO`` segundos numa única execução.
+    """
+    if not restaurante_id or not getattr(settings, 'PRERENDER_ATIVO', False):
+        return
+    atraso = getattr(settings, 'PRERENDER_ATRASO', 30)
+
+    def _enfileirar():
+        if not cache.add(f"prerender:agendado:{restaurante_id}", 1, timeout=atraso):
+            return
+        from .tasks import prerenderizar_loja
+        try:
+            prerenderizar_loja.apply_async(args=[str(restaurante_id)], countdown=atraso)
+        except Exception as e:
+            logger.warning(f"Não foi possível agendar a pré-renderização de {restaurante_id}: {e}")
+
+    transaction.on_commit(_enfileirar)
+
+
+def prerenderizar_por_id(restaurante_id, forcar=False):
+    restaurante = Restaurante.objects.filter(pk=restaurante_id).first()
+    if restaurante is None:
+        return 0
+    if restaurante.status != 'ativo':
+        remover_restaurante(restaurante.slug)
+        return 0
+    return prerenderizar_restaurante(restaurante, forcar=forcar)
@@ -0,0 +1,101 @@
+"""
+Resolução slug -> restaurante com cache em dois níveis.
+
+Quase toda requisição da loja resolve o restaurante pelo slug da URL. O
+resultado fica num cache local do processo (TTL curto) e, atrás dele, no
+cache compartilhado do Django. ``Restaurante.save`` (e a exclusão) invalidam
+as duas camadas; nos demais processos a cópia local expira em até
+``RESTAURANTE_CACHE_TTL_LOCAL`` segundos. Isso depende de um cache do Django
+de fato compartilhado (Redis): com ``LocMemCache`` a camada "compartilhada" é
+do processo e os outros workers podem servir dados antigos por até
+``RESTAURANTE_CACHE_TTL`` segundos, por isso o check ``core.E001`` recusa
+caches locais fora do DEBUG. Gravações por ``queryset.update`` não passam
+por ``save`` e precisam chamar ``invalidar``.
+
+Cada chamada recebe uma cópia da instância guardada, então alterações feitas
+pela view não vazam para outras requisições.
+"""
+
+import copy
+import logging
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from .models import Restaurante
+
+logger = logging.getLogger(__name__)
+
+_locais = {}
+_lock = Lock()
+
+
+def _ttl_local():
+    return getattr(settings, 'RESTAURANTE_CACHE_TTL_LOCAL', 30)
+
+
+def _ttl_compartilhado():
+    return getattr(settings, 'RESTAURANTE_CACHE_TTL', 300)
+
+
+def _chave(slug):
+    return f"restaurante:slug:{slug}"
+
+
+def _buscar(slug):
+    agora = time.monotonic()
+    with _lock:
+        entrada = _locais.get(slug)
+        if entrada is not None and entrada[0] > agora:
+            return entrada[1]
+
+    restaurante = cache.get(_chave(slug))
+    if restaurante is None:
+        restaurante = Restaurante.objects.filter(slug=slug).first()
+        if restaurante is None:
+            return None
+        cache.set(_chave(slug), restaurante, timeout=_ttl_compartilhado())
+
+    with _lock:
+        _locais[slug] = (agora + _ttl_local(), restaurante)
+    return restaurante
+
+
+def resolver_restaurante(slug, somente_ativo=True):
+    """Restaurante do slug (cópia da instância em cache) ou None"""
+    if not slug:
+        return None
+    restaurante = _buscar(slug)
+    if restaurante is None or (somente_ativo and restaurante.status != 'ativo'):
+        return None
+    return copy.copy(restaurante)
+
+
+def restaurante_ou_404(slug, somente_ativo=True):
+    """Como ``resolver_restaurante``, mas lança Http404 quando não encontrado"""
+    restaurante = resolver_restaurante(slug, somente_ativo=somente_ativo)
+    if restaurante is None:
+        raise Http404("Restaurante não encontrado.")
+    return restaurante
+
+
+def invalidar(*slugs):
+    """Remove os slugs dos dois níveis de cache, agora e após o commit corrente"""
+    slugs = [slug for slug in slugs if slug]
+    if not slugs:
+        return
+
+    def _remover():
+        with _lock:
+            for slug in slugs:
+                _locais.pop(slug, None)
+        cache.delete_many([_chave(slug) for slug in slugs])
+
+    # Remove já e de novo após o commit, para descartar o que for lido
+    # do banco antes da transação terminar
+    _remover()
+    transaction.on_commit(_remover)
@@ -440,9 +440,18 @@ class RegistrarOcorrenciaSerializer(serializers.Serializer):
 class PedidosDisponiveisSerializer(serializers.Serializer):
     """Serializer para filtrar pedidos disponíveis para entrega"""
     raio_km = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
-    apenas_sem_entregador = serializers.BooleanField(default=True)
+    apenas_sem_entregador = serializers.BooleanField(default=False)
+    latitude = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, min_value=-180, max_value=180)
     
     def validate_raio_km(self, value):
         if value and (value <= 0 or value > 50):
             raise serializers.ValidationError("Raio deve estar entre 0.1 e 50 km")
-        return value
\ No newline at end of file
+        return value
+    
+    def validate(self, data):
+        if ('latitude' in data) != ('longitude' in data):
+            raise serializers.ValidationError("Informe latitude e longitude juntas")
+        if data.get('raio_km') and 'latitude' not in data:
+            raise serializers.ValidationError("Filtro por raio exige latitude e longitude do entregador")
+        return data
@@ -4,9 +4,11 @@ Implementa o padrão Service Layer para separar a lógica de negócio das views.
 """
 
 from django.db import transaction
+from django.db.models import F
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.contrib.sessions.models import Session
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional, List, Dict, Any
 import logging
 
@@ -14,8 +16,12 @@ from .models import (
     Carrinho, CarrinhoItem, CarrinhoItemPersonalizacao,
     Produto, Usuario, Restaurante, Pedido, ItemPedido, 
     PersonalizacaoItemPedido, HistoricoStatusPedido,
-    ItemPersonalizacao
+    ItemPersonalizacao, Endereco
 )
+from .geocodificacao import coordenadas_gravadas
+from . import carrinho_armazenamento, carrinho_resumo
+from .carrinho_resumo import ResumoCarrinho
+from .carrinho_assinatura import assinatura_linha
 
 logger = logging.getLogger(__name__)
 
@@ -63,7 +69,6 @@ class CarrinhoService:
         return carrinho
     
     @staticmethod
-    @transaction.atomic
     def adicionar_item(carrinho: Carrinho, 
                       produto: Produto, 
                       quantidade: int = 1,
@@ -94,57 +99,115 @@ class CarrinhoService:
         if dados_meio_a_meio:
             dados_personalizacao['meio_a_meio'] = dados_meio_a_meio
         
-        # Verificar se já existe item idêntico no carrinho
-        try:
-            item_existente = CarrinhoItem.objects.get(
-                carrinho=carrinho,
-                produto=produto,
-                dados_personalizacao=dados_personalizacao
-            )
-            # Se existe, apenas incrementa a quantidade
-            item_existente.quantidade += quantidade
-            item_existente.save()
-            logger.info(f"Quantidade incrementada no item existente: {item_existente}")
-            return item_existente
-        
-        except CarrinhoItem.DoesNotExist:
-            # Se não existe, cria novo item
-            item = CarrinhoItem.objects.create(
-                carrinho=carrinho,
-                produto=produto,
-                quantidade=quantidade,
-                preco_unitario=produto.preco_final,
-                observacoes=observacoes,
-                dados_personalizacao=dados_personalizacao
+        if carrinho_armazenamento.obter():
+            try:
+                return CarrinhoService._adicionar_item_armazenamento(
+                    carrinho, produto, quantidade, observacoes, dados_personalizacao
+                )
+            except carrinho_armazenamento.ArmazenamentoIndisponivel:
+                pass  # Redis fora: segue pelo banco
+        return CarrinhoService._adicionar_item_banco(
+            carrinho, produto, quantidade, observacoes, personalizacoes, dados_personalizacao
+        )
+    
+    @staticmethod
+    def _adicionar_item_armazenamento(carrinho, produto, quantidade, observacoes, dados_personalizacao):
+        """Soma a linha no armazenamento; o banco é atualizado depois (write-behind)"""
+        linha_id = carrinho_armazenamento.id_linha(carrinho.pk, produto.pk, dados_personalizacao)
+        total = carrinho_armazenamento.somar(carrinho, linha_id, carrinho_armazenamento.Linha(
+            produto.pk, produto.preco_final, observacoes, dados_personalizacao, quantidade
+        ))
+        carrinho_armazenamento.alterado(carrinho.pk)
+        
+        item = CarrinhoItem(
+            id=linha_id,
+            carrinho=carrinho,
+            produto=produto,
+            quantidade=total,
+            preco_unitario=produto.preco_final,
+            observacoes=observacoes,
+            dados_personalizacao=dados_personalizacao
+        )
+        logger.info(f"Item adicionado ao carrinho {carrinho.pk}: {item}")
+        return item
+    
+    @staticmethod
+    @transaction.atomic
+    def _adicionar_item_banco(carrinho, produto, quantidade, observacoes, personalizacoes, dados_personalizacao):
+        # Item idêntico (mesma assinatura) vira uma linha só: busca pelo índice único
+        # (carrinho, assinatura); com cliques simultâneos o get_or_create devolve a linha
+        # criada pelo outro request e o incremento é feito no banco
+        item, criado = CarrinhoItem.objects.get_or_create(
+            carrinho=carrinho,
+            assinatura=assinatura_linha(produto.pk, dados_personalizacao),
+            defaults={
+                # Mesmo id da linha no armazenamento: ids do cliente valem nos dois caminhos
+                'id': carrinho_armazenamento.id_linha(carrinho.pk, produto.pk, dados_personalizacao),
+                'produto': produto,
+                'quantidade': quantidade,
+                'preco_unitario': produto.preco_final,
+                'observacoes': observacoes,
+                'dados_personalizacao': dados_personalizacao,
+            }
+        )
+        if not criado:
+            CarrinhoItem.objects.filter(pk=item.pk).update(
+                quantidade=F('quantidade') + quantidade,
+                updated_at=timezone.now()
             )
-            
-            # Criar personalizações relacionadas se existirem
-            if personalizacoes:
-                for perso_data in personalizacoes:
-                    try:
-                        item_personalizacao = ItemPersonalizacao.objects.get(
-                            id=perso_data.get('item_id')
-                        )
-                        CarrinhoItemPersonalizacao.objects.create(
-                            carrinho_item=item,
-                            item_personalizacao=item_personalizacao
-                        )
-                    except ItemPersonalizacao.DoesNotExist:
-                        logger.warning(f"ItemPersonalizacao não encontrado: {perso_data.get('item_id')}")
-                        continue
-            
-            logger.info(f"Novo item adicionado ao carrinho: {item}")
+            item.refresh_from_db(fields=['quantidade', 'updated_at'])
+            CarrinhoService._tocar(carrinho)
+            logger.info(f"Quantidade incrementada no item existente: {item}")
             return item
+        
+        # Criar personalizações relacionadas se existirem
+        if personalizacoes:
+            for perso_data in personalizacoes:
+                try:
+                    item_personalizacao = ItemPersonalizacao.objects.get(
+                        id=perso_data.get('item_id')
+                    )
+                    CarrinhoItemPersonalizacao.objects.create(
+                        carrinho_item=item,
+                        item_personalizacao=item_personalizacao
+                    )
+                except ItemPersonalizacao.DoesNotExist:
+                    logger.warning(f"ItemPersonalizacao não encontrado: {perso_data.get('item_id')}")
+                    continue
+        
+        CarrinhoService._tocar(carrinho)
+        logger.info(f"Novo item adicionado ao carrinho: {item}")
+        return item
     
     @staticmethod
-    @transaction.atomic
     def remover_item(carrinho: Carrinho, item_id: str) -> bool:
         """
         Remove um item específico do carrinho
         """
+        if carrinho_armazenamento.obter():
+            try:
+                return CarrinhoService._remover_item_armazenamento(carrinho, item_id)
+            except carrinho_armazenamento.ArmazenamentoIndisponivel:
+                pass  # Redis fora: segue pelo banco
+        return CarrinhoService._remover_item_banco(carrinho, item_id)
+    
+    @staticmethod
+    def _remover_item_armazenamento(carrinho, item_id):
+        linha_id = carrinho_armazenamento.uuid_valido(item_id)
+        if linha_id is None or not carrinho_armazenamento.remover(carrinho, linha_id):
+            logger.warning(f"Tentativa de remover item inexistente: {item_id}")
+            return False
+        carrinho_armazenamento.alterado(carrinho.pk)
+        logger.info(f"Item {item_id} removido do carrinho {carrinho.pk}")
+        return True
+    
+    @staticmethod
+    @transaction.atomic
+    def _remover_item_banco(carrinho, item_id):
         try:
             item = CarrinhoItem.objects.get(id=item_id, carrinho=carrinho)
             item.delete()
+            CarrinhoService._tocar(carrinho)
             logger.info(f"Item removido do carrinho: {item}")
             return True
         except CarrinhoItem.DoesNotExist:
@@ -152,7 +215,6 @@ class CarrinhoService:
             return False
     
     @staticmethod
-    @transaction.atomic
     def alterar_quantidade(carrinho: Carrinho, item_id: str, nova_quantidade: int) -> bool:
         """
         Altera a quantidade de um item no carrinho
@@ -160,6 +222,16 @@ class CarrinhoService:
         if nova_quantidade <= 0:
             return CarrinhoService.remover_item(carrinho, item_id)
         
+        if carrinho_armazenamento.obter():
+            try:
+                return CarrinhoService._alterar_quantidade_armazenamento(carrinho, item_id, nova_quantidade)
+            except carrinho_armazenamento.ArmazenamentoIndisponivel:
+                pass  # Redis fora: segue pelo banco
+        return CarrinhoService._alterar_quantidade_banco(carrinho, item_id, nova_quantidade)
+    
+    @staticmethod
+    @transaction.atomic
+    def _alterar_quantidade_banco(carrinho, item_id, nova_quantidade):
         try:
             item = CarrinhoItem.objects.get(id=item_id, carrinho=carrinho)
             
@@ -169,6 +241,7 @@ class CarrinhoService:
             
             item.quantidade = nova_quantidade
             item.save()
+            CarrinhoService._tocar(carrinho)
             logger.info(f"Quantidade alterada no item: {item} para {nova_quantidade}")
             return True
             
@@ -177,54 +250,62 @@ class CarrinhoService:
             return False
     
     @staticmethod
-    def calcular_resumo(carrinho: Carrinho) -> Dict[str, Any]:
-        """
-        Calcula o resumo completo do carrinho
-        """
-        itens = carrinho.itens.select_related('produto').all()
-        
-        subtotal = Decimal('0.00')
-        total_itens = 0
+    def _alterar_quantidade_armazenamento(carrinho, item_id, nova_quantidade):
+        linha_id = carrinho_armazenamento.uuid_valido(item_id)
+        linha = carrinho_armazenamento.linhas(carrinho).get(linha_id)
+        if linha is None:
+            logger.warning(f"Tentativa de alterar quantidade de item inexistente: {item_id}")
+            return False
         
-        itens_detalhados = []
+        produto = Produto.objects.only('nome', 'controlar_estoque', 'estoque_atual').get(pk=linha.produto_id)
+        if produto.controlar_estoque and produto.estoque_atual < nova_quantidade:
+            raise ValidationError(f"Estoque insuficiente para '{produto.nome}'. Disponível: {produto.estoque_atual}")
         
-        for item in itens:
-            item_subtotal = item.subtotal
-            subtotal += item_subtotal
-            total_itens += item.quantidade
-            
-            # Para meio-a-meio, usar nome customizado se disponível
-            dados_meio_a_meio = item.dados_personalizacao.get('meio_a_meio', {})
-            nome_produto = dados_meio_a_meio.get('nome_customizado')
-            if not nome_produto and item.produto:
-                nome_produto = item.produto.nome
-            elif not nome_produto:
-                nome_produto = "Produto Indisponível"
-            
-            itens_detalhados.append({
-                'id': str(item.id),
-                'nome': nome_produto,  # Nome diretamente acessível para o JS
-                'produto': {
-                    'id': str(item.produto.id),
-                    'nome': nome_produto,
-                    'categoria': item.produto.categoria.nome if item.produto.categoria else '',
-                    'imagem': item.produto.imagem_principal.url if item.produto.imagem_principal else None,
-                },
-                'quantidade': item.quantidade,
-                'preco_unitario': item.preco_unitario,
-                'subtotal': item_subtotal,
-                'observacoes': item.observacoes,
-                'eh_meio_a_meio': item.eh_meio_a_meio,
-                'personalizacoes': item.dados_personalizacao.get('personalizacoes', []),
-                'meio_a_meio_data': dados_meio_a_meio if dados_meio_a_meio else None,
-            })
-        
-        return {
-            'itens': itens_detalhados,
-            'total_itens': total_itens,
-            'subtotal': subtotal,
-            'carrinho_vazio': carrinho.esta_vazio(),
-        }
+        if not carrinho_armazenamento.definir_quantidade(carrinho, linha_id, nova_quantidade):
+            return False
+        carrinho_armazenamento.alterado(carrinho.pk)
+        logger.info(f"Quantidade alterada no item {linha_id} para {nova_quantidade}")
+        return True
+    
+    @staticmethod
+    def _tocar(carrinho):
+        """Avança ``updated_at``, a versão do resumo em cache do carrinho no banco"""
+        carrinho.updated_at = timezone.now()
+        Carrinho.objects.filter(pk=carrinho.pk).update(updated_at=carrinho.updated_at)
+    
+    @staticmethod
+    def itens(carrinho: Carrinho) -> List[CarrinhoItem]:
+        """Itens atuais do carrinho (do armazenamento, quando configurado)"""
+        return carrinho_resumo.carregar_itens(carrinho)
+    
+    @staticmethod
+    def esta_vazio(carrinho: Carrinho) -> bool:
+        """Verifica se o carrinho está vazio (considerando o armazenamento)"""
+        if carrinho_armazenamento.obter():
+            try:
+                return not carrinho_armazenamento.linhas(carrinho)
+            except carrinho_armazenamento.ArmazenamentoIndisponivel:
+                pass  # Redis fora: segue pelo banco
+        return carrinho.esta_vazio()
+    
+    @staticmethod
+    def materializar(carrinho: Carrinho):
+        """
+        Grava no banco, na hora, as alterações do carrinho ainda pendentes.
+        Com o Redis fora, segue com o banco (sem as alterações ainda não gravadas).
+        """
+        try:
+            carrinho_armazenamento.materializar(carrinho)
+        except carrinho_armazenamento.ArmazenamentoIndisponivel:
+            logger.warning(f"Carrinho {carrinho.pk}: Redis indisponível, usando o estado do banco")
+    
+    @staticmethod
+    def calcular_resumo(carrinho: Carrinho) -> ResumoCarrinho:
+        """
+        Resumo completo do carrinho (imutável, em cache até a próxima alteração).
+        Aceita ``resumo['itens']``, ``resumo['subtotal']`` etc.
+        """
+        return carrinho_resumo.obter(carrinho)
     
     @staticmethod
     @transaction.atomic
@@ -233,13 +314,26 @@ class CarrinhoService:
         Remove todos os itens do carrinho
         """
         try:
-            carrinho.limpar()
+            if not CarrinhoService._limpar_armazenamento(carrinho):
+                carrinho.limpar()
+                CarrinhoService._tocar(carrinho)
             logger.info(f"Carrinho limpo: {carrinho}")
             return True
         except Exception as e:
             logger.error(f"Erro ao limpar carrinho {carrinho}: {e}")
             return False
     
+    @staticmethod
+    def _limpar_armazenamento(carrinho):
+        """Esvazia o carrinho no armazenamento; False sem armazenamento ou com o Redis fora"""
+        if not carrinho_armazenamento.obter():
+            return False
+        try:
+            carrinho_armazenamento.limpar(carrinho)
+            return True
+        except carrinho_armazenamento.ArmazenamentoIndisponivel:
+            return False
+    
     @staticmethod
     def migrar_carrinho_sessao_para_usuario(sessao_id: str, usuario: Usuario, restaurante: Restaurante):
         """
@@ -254,7 +348,10 @@ class CarrinhoService:
                     usuario=None
                 ).first()
                 
-                if not carrinho_sessao or carrinho_sessao.esta_vazio():
+                if not carrinho_sessao:
+                    return
+                CarrinhoService.materializar(carrinho_sessao)
+                if carrinho_sessao.esta_vazio():
                     return
                 
                 # Obter ou criar carrinho do usuário
@@ -276,6 +373,7 @@ class CarrinhoService:
                 
                 # Remover carrinho da sessão
                 carrinho_sessao.delete()
+                carrinho_armazenamento.descartar(carrinho_sessao.pk)
                 logger.info(f"Carrinho migrado da sessão {sessao_id} para usuário {usuario}")
                 
         except Exception as e:
@@ -299,6 +397,9 @@ class PedidoService:
         """
         from .services import FreteService  # Import local para evitar circular
         
+        # O pedido é criado a partir do banco: grava antes o estado do armazenamento
+        CarrinhoService.materializar(carrinho)
+        
         # Validações básicas
         if carrinho.esta_vazio():
             raise ValidationError("Carrinho está vazio")
@@ -359,9 +460,18 @@ class PedidoService:
         
         # Calcular frete
         if pedido.tipo_entrega == 'delivery':
+            # Endereço salvo do cliente já traz as coordenadas geocodificadas
+            endereco_salvo = pedido.endereco_entrega
+            if endereco_salvo is None and usuario is not None:
+                endereco_salvo = Endereco.objects.filter(
+                    usuario=usuario,
+                    cep=pedido.endereco_cep,
+                    numero=pedido.endereco_numero
+                ).first()
             pedido.taxa_entrega = FreteService.calcular_frete(
                 pedido.restaurante, 
-                dados_entrega.get('cep', '')
+                dados_entrega.get('cep', ''),
+                endereco=endereco_salvo
             )
         else:
             pedido.taxa_entrega = Decimal('0.00')
@@ -380,7 +490,10 @@ class PedidoService:
         )
         
         # Limpar carrinho
+        # O updated_at novo torna obsoleta a cópia do armazenamento, recarregada
+        # (vazia) no próximo acesso; se o pedido falhar, o rollback a mantém válida
         carrinho.limpar()
+        CarrinhoService._tocar(carrinho)
         
         logger.info(f"Pedido criado com sucesso: {pedido}")
         return pedido
@@ -443,90 +556,203 @@ class PedidoService:
 class FreteService:
     """Serviço para cálculo de frete"""
     
+    # Máximo de CEPs distintos por cotação em lote
+    LIMITE_COTACAO_LOTE = 500
+    
+    # Cotação em lote só com cache: CEP que ainda depende das APIs externas
+    ERRO_CEP_PENDENTE = 'CEP ainda não geocodificado'
+    
+    @staticmethod
+    def _dados_cep(cep_destino: str) -> Dict[str, Any]:
+        """Payload ViaCEP do destino (cache primeiro); vazio se o CEP não for encontrado"""
+        from .utils_frete_cep import validar_cep
+        dados = validar_cep(cep_destino) if cep_destino else {}
+        return {} if 'erro' in dados else dados
+    
     @staticmethod
-    def calcular_frete(restaurante: Restaurante, cep_destino: str) -> Decimal:
+    def cotar(restaurante: Restaurante, cep_destino: str, endereco: Endereco = None,
+              tabela=None, distancia: Dict[str, Any] = None, dados_cep: Dict[str, Any] = None) -> Dict[str, Any]:
         """
-        Calcula o valor do frete baseado nas configurações do restaurante
+        Consulta a tabela de zonas do restaurante e retorna
+        {'valor', 'entrega_permitida', 'distancia_km', 'erro'}.
+        O raio limite vale para qualquer regra de preço.
+        Ordem: preço por bairro > frete fixo > taxa base + km excedente.
+        A tabela de anéis só bloqueia a entrega; o preço por km é contínuo.
+        O bairro vem dos dados do CEP (``dados_cep`` ou ViaCEP), nunca do endereço digitado.
+        Em lote, ``tabela`` (TabelaZonas), ``distancia`` e ``dados_cep`` já carregados
+        evitam consultas por CEP.
         """
-        try:
-            # Se frete fixo está configurado
-            if restaurante.frete_fixo and restaurante.valor_frete_fixo is not None:
-                return Decimal(str(restaurante.valor_frete_fixo))
-            
-            # Se não tem configuração de frete, usar taxa padrão
-            if restaurante.valor_frete_padrao is None:
-                return Decimal('0.00')
-            
-            valor_base = Decimal(str(restaurante.valor_frete_padrao))
-            
-            # Se não tem configuração de distância, retornar valor base
-            if not restaurante.valor_adicional_km or not cep_destino or not restaurante.cep:
-                return valor_base
-            
-            # Calcular frete por distância usando utilitário existente
-            try:
-                from .utils_frete_cep import calcular_frete_cep
-                
-                resultado = calcular_frete_cep(
-                    cep_destino=cep_destino,
-                    cep_referencia=restaurante.cep,
-                    taxa_base=float(restaurante.valor_frete_padrao),
-                    taxa_km=float(restaurante.valor_adicional_km),
-                    raio_limite_km=float(restaurante.raio_limite_km) if restaurante.raio_limite_km else None
+        from .zonas_entrega import TabelaZonas, RAIO_TAXA_BASE_KM
+        from .utils_frete_cep import calcular_distancia_cep
+        
+        if tabela is None:
+            tabela = TabelaZonas(restaurante)
+        
+        cotacao = {'valor': Decimal('0.00'), 'entrega_permitida': True, 'distancia_km': None, 'erro': None}
+        
+        # Distância: necessária para o raio limite e para a cobrança por km
+        distancia_km = None
+        cobra_por_km = restaurante.valor_adicional_km and not restaurante.frete_fixo
+        if (restaurante.raio_limite_km or cobra_por_km) and cep_destino and restaurante.cep:
+            if distancia is None:
+                distancia = calcular_distancia_cep(
+                    cep_destino,
+                    restaurante.cep,
+                    coord_referencia=coordenadas_gravadas(restaurante, restaurante.cep),
+                    coord_destino=coordenadas_gravadas(endereco, cep_destino)
                 )
-                
-                if resultado and 'erro' not in resultado and 'custo_frete' in resultado:
-                    return Decimal(str(resultado['custo_frete']))
-                else:
-                    logger.warning(f"Erro no cálculo de frete: {resultado}")
-                    return valor_base
-                    
-            except ImportError:
-                logger.warning("utils_frete_cep não disponível, usando valor base")
-                return valor_base
-            except Exception as e:
-                logger.error(f"Erro ao calcular frete por distância: {e}")
-                return valor_base
+            if 'erro' in distancia:
+                # Sem distância não há como garantir o raio: quem valida recusa pelo erro
+                cotacao['erro'] = distancia['erro']
+            else:
+                distancia_km = distancia['distancia_km']
+                cotacao['distancia_km'] = round(distancia_km, 2)
+        
+        if distancia_km is not None and restaurante.raio_limite_km \
+                and distancia_km > float(restaurante.raio_limite_km):
+            cotacao['entrega_permitida'] = False
+            cotacao['erro'] = f'CEP fora da área de entrega. Máximo: {restaurante.raio_limite_km}km'
+            return cotacao
+        
+        # Preço fixo (ou bloqueio) por bairro definido pelo lojista
+        if tabela.tem_bairros:
+            if dados_cep is None:
+                dados_cep = FreteService._dados_cep(cep_destino)
+            zona = tabela.buscar_bairro(dados_cep)
+            if zona is not None:
+                cotacao['valor'] = zona.valor
+                cotacao['entrega_permitida'] = zona.entrega_permitida
+                if not zona.entrega_permitida:
+                    cotacao['erro'] = f'Não entregamos no bairro {zona.bairro}'
+                return cotacao
+        
+        # Se frete fixo está configurado
+        if restaurante.frete_fixo and restaurante.valor_frete_fixo is not None:
+            cotacao['valor'] = Decimal(str(restaurante.valor_frete_fixo))
+            return cotacao
+        
+        # Se não tem configuração de frete, usar taxa padrão
+        if restaurante.valor_frete_padrao is not None:
+            cotacao['valor'] = Decimal(str(restaurante.valor_frete_padrao))
+        
+        # Sem distância, fica o valor base
+        if distancia_km is None:
+            return cotacao
+        
+        # Anel bloqueado pelo lojista
+        zona = tabela.buscar_raio(distancia_km)
+        if zona is not None and not zona.entrega_permitida:
+            cotacao['entrega_permitida'] = False
+            cotacao['erro'] = f'Não entregamos a {cotacao["distancia_km"]}km'
+            return cotacao
+        
+        # Taxa base até RAIO_TAXA_BASE_KM, depois o valor por km excedente
+        if restaurante.valor_frete_padrao is not None and restaurante.valor_adicional_km:
+            excedente = max(Decimal(str(distancia_km)) - RAIO_TAXA_BASE_KM, Decimal('0'))
+            valor = cotacao['valor'] + excedente * Decimal(str(restaurante.valor_adicional_km))
+            cotacao['valor'] = valor.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return cotacao
+    
+    @staticmethod
+    def cotar_lote(restaurante: Restaurante, ceps: List[str], apenas_cache: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Cota vários CEPs de uma vez: remove repetidos, resolve as coordenadas
+        em paralelo (com cache), calcula todas as distâncias numa única passada
+        e aplica a tabela de zonas carregada uma só vez.
+        Com ``apenas_cache`` não há chamadas externas: CEPs ainda não resolvidos
+        voltam com o erro ``ERRO_CEP_PENDENTE`` (ver a task ``geocodificar_ceps``).
+        Retorna {cep normalizado: cotação}.
+        """
+        import re
+        from .cache_geocodificacao import buscar_cep
+        from .distancia import distancias_km
+        from .utils_frete_cep import coordenadas_em_cache, resolver_coordenadas_cep, resolver_coordenadas_ceps
+        from .zonas_entrega import TabelaZonas
+        
+        resultado = {}
+        validos = []
+        vistos = set()
+        for cep in ceps:
+            cep_limpo = re.sub(r'\D', '', str(cep or ''))
+            if cep_limpo in vistos:
+                continue
+            vistos.add(cep_limpo)
+            if len(cep_limpo) != 8:
+                resultado[cep_limpo or str(cep)] = {
+                    'valor': None, 'entrega_permitida': False, 'distancia_km': None, 'erro': 'CEP inválido'
+                }
+                continue
+            validos.append(cep_limpo)
+        validos = validos[:FreteService.LIMITE_COTACAO_LOTE]
+        
+        distancias = {}
+        cobra_por_km = restaurante.valor_adicional_km and not restaurante.frete_fixo
+        if validos and (restaurante.raio_limite_km or cobra_por_km) and restaurante.cep:
+            if apenas_cache:
+                pendente = {'erro': FreteService.ERRO_CEP_PENDENTE}
+                origem = coordenadas_gravadas(restaurante, restaurante.cep) or \
+                    coordenadas_em_cache(restaurante.cep) or pendente
+                destinos = {cep: coordenadas_em_cache(cep) or pendente for cep in validos}
+            else:
+                origem = coordenadas_gravadas(restaurante, restaurante.cep) or \
+                    resolver_coordenadas_cep(restaurante.cep, "referência")
+                destinos = resolver_coordenadas_ceps(validos)
+            if isinstance(origem, dict):
+                distancias = {cep: origem for cep in validos}
+            else:
+                distancias = {cep: coordenadas for cep, coordenadas in destinos.items()
+                              if isinstance(coordenadas, dict)}
+                resolvidos = [cep for cep, coordenadas in destinos.items() if not isinstance(coordenadas, dict)]
+                kms = distancias_km(origem, [destinos[cep] for cep in resolvidos])
+                distancias.update({cep: {'distancia_km': km} for cep, km in zip(resolvidos, kms)})
+        
+        tabela = TabelaZonas(restaurante)
+        for cep in validos:
+            resultado[cep] = FreteService.cotar(
+                restaurante, cep,
+                tabela=tabela,
+                distancia=distancias.get(cep),
+                # Só o cache: CEP sem payload guardado fica sem preço por bairro
+                dados_cep=buscar_cep(cep) or {}
+            )
+        return resultado
+    
+    @staticmethod
+    def calcular_frete(restaurante: Restaurante, cep_destino: str, endereco: Endereco = None) -> Decimal:
+        """
+        Calcula o valor do frete baseado nas zonas de entrega do restaurante.
+        Se um Endereco salvo for informado, usa as coordenadas já geocodificadas.
+        """
+        try:
+            cotacao = FreteService.cotar(restaurante, cep_destino, endereco)
+            if cotacao['erro']:
+                logger.warning(f"Erro no cálculo de frete: {cotacao['erro']}")
+            return cotacao['valor']
         
         except Exception as e:
             logger.error(f"Erro no cálculo de frete: {e}")
             return Decimal('0.00')
     
     @staticmethod
-    def validar_cep_entrega(restaurante: Restaurante, cep_destino: str) -> Dict[str, Any]:
+    def validar_cep_entrega(restaurante: Restaurante, cep_destino: str, endereco: Endereco = None) -> Dict[str, Any]:
         """
         Valida se o CEP está dentro da área de entrega
         """
         if not cep_destino or len(cep_destino.replace('-', '').replace(' ', '')) != 8:
             return {'valido': False, 'erro': 'CEP inválido'}
         
-        if not restaurante.raio_limite_km:
-            return {'valido': True, 'distancia_km': None}
-        
         try:
-            from .utils_frete_cep import calcular_frete_cep
-            
-            resultado = calcular_frete_cep(
-                cep_destino=cep_destino,
-                cep_referencia=restaurante.cep,
-                raio_limite_km=float(restaurante.raio_limite_km)
-            )
+            cotacao = FreteService.cotar(restaurante, cep_destino, endereco)
             
-            if resultado and 'erro' in resultado:
-                return {'valido': False, 'erro': resultado['erro']}
+            if not cotacao['entrega_permitida']:
+                return {'valido': False, 'erro': cotacao['erro']}
             
-            if resultado and 'distancia_km' in resultado:
-                distancia = resultado['distancia_km']
-                if distancia <= float(restaurante.raio_limite_km):
-                    return {'valido': True, 'distancia_km': distancia}
-                else:
-                    return {
-                        'valido': False, 
-                        'erro': f'CEP fora da área de entrega. Máximo: {restaurante.raio_limite_km}km'
-                    }
+            if cotacao['erro'] and restaurante.raio_limite_km:
+                # Sem distância não dá para garantir o raio limite
+                return {'valido': False, 'erro': cotacao['erro']}
             
-            return {'valido': True, 'distancia_km': None}
+            return {'valido': True, 'distancia_km': cotacao['distancia_km']}
             
         except Exception as e:
             logger.error(f"Erro na validação do CEP: {e}")
-            return {'valido': True, 'distancia_km': None}  # Em caso de erro, permite a entrega
\ No newline at end of file
+            return {'valido': True, 'distancia_km': None}  # Em caso de erro, permite a entrega
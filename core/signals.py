@@ -3,10 +3,18 @@ Signals para otimização automática de imagens
 Processa as imagens automaticamente quando os modelos são salvos.
 """
 
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.core.files.storage import default_storage
-from .models import Produto, Categoria, Restaurante, Usuario
+from .models import (
+    Produto, Categoria, Restaurante, Usuario, Endereco, OpcaoPersonalizacao, ItemPersonalizacao, Pedido,
+    HorarioFuncionamento,
+    CAMPOS_ENDERECO_GEOCODIFICACAO,
+)
+from . import cardapio_cache, cardapio_delta, prerender, restaurante_cache
+from .popularidade import agendar_registro_pedido_entregue
+from .geocodificacao import agendar_geocodificacao
+from .zonas_entrega import CAMPOS_FRETE, reconstruir_zonas_automaticas
 from .image_optimizer import ImageOptimizer
 import os
 
@@ -133,6 +141,8 @@ def optimize_restaurante_images(sender, instance, created, **kwargs):
                                 field: getattr(instance, field) 
                                 for field in update_fields
                             })
+                            # update() não passa pelo save: descarta o restaurante em cache
+                            restaurante_cache.invalidar(instance.slug)
                             
                 except Exception as e:
                     print(f"Erro ao otimizar {image_field} do restaurante {instance.id}: {e}")
@@ -219,4 +229,137 @@ def _cleanup_optimized_images(instance, base_field_name, image_type):
                         if default_storage.exists(image_field.name):
                             default_storage.delete(image_field.name)
                     except Exception as e:
-                        print(f"Erro ao remover imagem otimizada {field_name}: {e}")
\ No newline at end of file
+                        print(f"Erro ao remover imagem otimizada {field_name}: {e}")
+
+@receiver(pre_save, sender=Restaurante)
+@receiver(pre_save, sender=Endereco)
+def detectar_mudanca_endereco(sender, instance, update_fields=None, **kwargs):
+    """Marca o registro para geocodificação quando o endereço é criado ou alterado"""
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_ENDERECO_GEOCODIFICACAO):
+        return
+
+    if instance._state.adding:
+        instance._geocodificar = instance.coordenadas is None
+        return
+
+    anterior = sender.objects.filter(pk=instance.pk).values(*CAMPOS_ENDERECO_GEOCODIFICACAO).first()
+    if anterior is None:
+        instance._geocodificar = instance.coordenadas is None
+        return
+
+    if any(anterior[campo] != getattr(instance, campo) for campo in CAMPOS_ENDERECO_GEOCODIFICACAO):
+        # Coordenadas antigas não valem mais para o novo endereço
+        instance.latitude = None
+        instance.longitude = None
+        instance.geocode_status = 'pendente'
+        instance.geocodificado_em = None
+        instance._geocodificar = True
+        if update_fields is not None:
+            instance._campos_geocode_pendentes = ('latitude', 'longitude', 'geocode_status', 'geocodificado_em')
+
+
+@receiver(post_save, sender=Restaurante)
+@receiver(post_save, sender=Endereco)
+def agendar_geocodificacao_endereco(sender, instance, **kwargs):
+    """Agenda a geocodificação em background após salvar um endereço novo/alterado"""
+    campos_pendentes = getattr(instance, '_campos_geocode_pendentes', None)
+    if campos_pendentes:
+        # save(update_fields=...) não gravou a limpeza das coordenadas antigas
+        sender.objects.filter(pk=instance.pk).update(
+            **{campo: getattr(instance, campo) for campo in campos_pendentes}
+        )
+        del instance._campos_geocode_pendentes
+
+    if getattr(instance, '_geocodificar', False):
+        instance._geocodificar = False
+        agendar_geocodificacao(instance)
+
+
+@receiver(pre_save, sender=Restaurante)
+def detectar_mudanca_regras_frete(sender, instance, update_fields=None, **kwargs):
+    """Marca o restaurante para reconstruir as zonas quando as regras de frete mudam"""
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_FRETE):
+        return
+
+    anterior = None
+    if not instance._state.adding:
+        anterior = sender.objects.filter(pk=instance.pk).values(*CAMPOS_FRETE).first()
+    instance._reconstruir_zonas = anterior is None or any(
+        anterior[campo] != getattr(instance, campo) for campo in CAMPOS_FRETE
+    )
+
+
+@receiver(post_save, sender=Restaurante)
+def reconstruir_zonas_entrega(sender, instance, **kwargs):
+    """Reconstrói os anéis automáticos de entrega após mudança nas regras de frete"""
+    if getattr(instance, '_reconstruir_zonas', False):
+        instance._reconstruir_zonas = False
+        reconstruir_zonas_automaticas(instance)
+
+
+@receiver(post_save, sender=Produto)
+@receiver(post_delete, sender=Produto)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def invalidar_cardapio_catalogo(sender, instance, **kwargs):
+    """Invalida o snapshot do cardápio quando produtos ou categorias mudam"""
+    cardapio_delta.registrar(instance.restaurante_id, instance, removido=kwargs['signal'] is post_delete)
+    cardapio_cache.invalidar(instance.restaurante_id)
+    prerender.agendar(instance.restaurante_id)
+
+
+@receiver(post_save, sender=OpcaoPersonalizacao)
+@receiver(post_delete, sender=OpcaoPersonalizacao)
+@receiver(post_save, sender=ItemPersonalizacao)
+@receiver(post_delete, sender=ItemPersonalizacao)
+def invalidar_cardapio_personalizacao(sender, instance, **kwargs):
+    """Invalida o snapshot do cardápio quando opções de personalização mudam"""
+    if sender is OpcaoPersonalizacao:
+        produtos = Produto.objects.filter(pk=instance.produto_id)
+    else:
+        produtos = Produto.objects.filter(opcoes_personalizacao__pk=instance.opcao_id)
+    # Em exclusões em cascata o produto pode já não existir; o signal dele já invalidou
+    restaurante_id = produtos.values_list('restaurante_id', flat=True).first()
+    cardapio_delta.registrar(restaurante_id, instance, removido=kwargs['signal'] is post_delete)
+    cardapio_cache.invalidar(restaurante_id)
+    prerender.agendar(restaurante_id)
+
+
+@receiver(post_save, sender=HorarioFuncionamento)
+@receiver(post_delete, sender=HorarioFuncionamento)
+def invalidar_cardapio_horarios(sender, instance, **kwargs):
+    """Horários aparecem no rodapé e nas páginas sobre/contato: renova os validadores delas"""
+    cardapio_cache.invalidar(instance.restaurante_id)
+    prerender.agendar(instance.restaurante_id)
+
+
+@receiver(post_delete, sender=Restaurante)
+def invalidar_restaurante_excluido(sender, instance, **kwargs):
+    """Remove do cache de resolução por slug o restaurante excluído"""
+    restaurante_cache.invalidar(instance.slug)
+
+
+@receiver(pre_save, sender=Pedido)
+def detectar_pedido_entregue(sender, instance, update_fields=None, **kwargs):
+    """Marca o pedido para entrar no ranking de popularidade quando passa a 'entregue'"""
+    if instance.status != 'entregue' or (update_fields is not None and 'status' not in update_fields):
+        return
+    status_anterior = None
+    if not instance._state.adding:
+        status_anterior = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    instance._registrar_popularidade = status_anterior != 'entregue'
+
+
+@receiver(post_save, sender=Pedido)
+def atualizar_popularidade_produtos(sender, instance, **kwargs):
+    """Soma os itens do pedido entregue ao ranking de produtos mais pedidos"""
+    if getattr(instance, '_registrar_popularidade', False):
+        instance._registrar_popularidade = False
+        agendar_registro_pedido_entregue(instance)
+
+
+@receiver(post_save, sender=Restaurante)
+def prerenderizar_restaurante_alterado(sender, instance, **kwargs):
+    """Regenera as páginas estáticas da loja quando os dados do restaurante mudam"""
+    prerender.agendar(instance.pk)
+
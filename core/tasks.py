@@ -196,6 +196,107 @@ def desativar_trial_expirados(self):
         raise self.retry(exc=exc, countdown=300, max_retries=3)
 
 
+@shared_task(bind=True)
+def geocodificar_endereco(self, modelo, pk):
+    """
+    Geocodifica um Restaurante ou Endereco e grava latitude/longitude.
+    
+    Args:
+        modelo (str): 'restaurante' ou 'endereco'
+        pk (str): ID do registro
+    """
+    try:
+        from core.geocodificacao import MODELOS_GEOCODIFICAVEIS, geocodificar
+        
+        instancia = MODELOS_GEOCODIFICAVEIS[modelo].objects.filter(pk=pk).first()
+        if instancia is None:
+            return f"{modelo} {pk} não encontrado"
+        
+        sucesso = geocodificar(instancia)
+        logger.info(f"Geocodificação de {modelo} {pk}: {instancia.geocode_status}")
+        return f"{modelo} {pk}: {'ok' if sucesso else 'falhou'}"
+        
+    except Exception as exc:
+        logger.error(f"Erro ao geocodificar {modelo} {pk}: {exc}")
+        raise self.retry(exc=exc, countdown=120, max_retries=3)
+
+
+@shared_task
+def limpar_cache_geocodificacao():
+    """
+    Remove do banco os registros expirados do cache de geocodificação.
+    Esta task é executada diariamente pelo Celery Beat.
+    """
+    from core.cache_geocodificacao import remover_expirados
+
+    removidos = remover_expirados()
+    logger.info(f"Cache de geocodificação: {removidos} registros expirados removidos")
+    return f"Removidos {removidos} registros expirados"
+
+
+@shared_task
+def decair_popularidade():
+    """
+    Aplica o decaimento diário ao ranking de produtos mais pedidos.
+    Esta task é executada diariamente pelo Celery Beat.
+    """
+    from core.popularidade import decair
+
+    atualizados = decair(dias=1)
+    logger.info(f"Popularidade de produtos: decaimento aplicado a {atualizados} produtos")
+    return f"Decaimento aplicado a {atualizados} produtos"
+
+
+@shared_task(bind=True)
+def prerenderizar_loja(self, restaurante_id):
+    """
+    Regenera as páginas estáticas da loja após mudanças no catálogo
+    (ignorada se a versão do catálogo não mudou).
+    """
+    from core.prerender import prerenderizar_por_id
+
+    try:
+        paginas = prerenderizar_por_id(restaurante_id)
+        return f"{paginas} páginas pré-renderizadas"
+    except Exception as exc:
+        logger.error(f"Erro ao pré-renderizar a loja {restaurante_id}: {exc}")
+        raise self.retry(exc=exc, countdown=60, max_retries=3)
+
+
+@shared_task
+def persistir_carrinhos():
+    """
+    Grava no banco os carrinhos alterados no armazenamento (write-behind).
+    Esta task é executada a cada 15 segundos pelo Celery Beat.
+    """
+    from core.carrinho_armazenamento import persistir_pendentes
+
+    gravados = persistir_pendentes()
+    if gravados:
+        logger.info(f"Carrinhos: {gravados} gravados no banco")
+    return f"{gravados} carrinhos gravados"
+
+
+@shared_task
+def geocodificar_ceps(ceps):
+    """
+    Resolve (ViaCEP + OpenCage, respeitando a cota) os CEPs que a simulação de
+    frete em lote não encontrou no cache, um por vez, fora do pool das cotações
+    do checkout. A próxima simulação já os encontra no cache.
+    Fora da requisição, pode esperar pelo limite por segundo da OpenCage.
+    """
+    from django.conf import settings
+    from core.utils_frete_cep import resolver_coordenadas_cep
+
+    espera_maxima = getattr(settings, 'OPENCAGE_ESPERA_MAXIMA', 1.0)
+    resolvidos = 0
+    for cep in ceps:
+        if not isinstance(resolver_coordenadas_cep(cep, espera_maxima=espera_maxima), dict):
+            resolvidos += 1
+    logger.info(f"Geocodificação em lote: {resolvidos} de {len(ceps)} CEPs resolvidos")
+    return f"{resolvidos} de {len(ceps)} CEPs resolvidos"
+
+
 @shared_task
 def debug_celery():
     """Task de debug para testar se o Celery está funcionando"""
@@ -0,0 +1,27 @@
+"""
+Métricas diárias de uso das APIs externas (ViaCEP, OpenCage, índice offline).
+
+Os eventos vão para um ``ContadorEmLote`` e chegam a ``UsoAPIExterna`` a cada
+``_SEGUNDOS_POR_LOTE`` segundos; os totais do dia de todos os workers ficam
+somados no banco.
+"""
+
+from django.utils import timezone
+
+from .contadores import ContadorEmLote
+
+CAMPOS = ('requisicoes', 'acertos_cache', 'bloqueadas', 'erros')
+
+_SEGUNDOS_POR_LOTE = 30
+
+_contador = ContadorEmLote('core.UsoAPIExterna', ('api', 'data'), CAMPOS, _SEGUNDOS_POR_LOTE)
+
+
+def registrar(api, campo, quantidade=1):
+    """Conta um evento (``campo`` em CAMPOS) para a API no dia corrente"""
+    _contador.somar((api, timezone.localdate()), **{campo: quantidade})
+
+
+def descarregar():
+    """Grava no banco os contadores acumulados neste processo"""
+    _contador.descarregar()
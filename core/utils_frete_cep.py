@@ -1,47 +1,182 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from geopy.distance import geodesic
 from decouple import config
-from threading import Lock
+from django.conf import settings
+from django.db import connections
+
+from core import cache_geocodificacao, http_client, indice_cep, uso_apis
+from core.limitador import CotaEsgotada, limitador_opencage
 
 # Obter chave da API OpenCage do arquivo .env (usando python-decouple/config)
 OPENCAGE_API_KEY = config("OPENCAGE_API_KEY", default=None)
 
-# Contador thread-safe para requisições à OpenCage
-_opencage_request_count = 0
-_opencage_lock = Lock()
+# Pool compartilhado para resolver origem e destino em paralelo
+_executor_resolucao = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'FRETE_RESOLUCAO_THREADS', 8),
+    thread_name_prefix='frete-cep',
+)
 
 def get_opencage_request_count():
-    global _opencage_request_count
-    return _opencage_request_count
+    """Requisições à OpenCage consumidas hoje (compartilhado entre workers)"""
+    return limitador_opencage().uso_hoje()
 
 def validar_cep(cep):
+    dados_cache = cache_geocodificacao.buscar_cep(cep)
+    if dados_cache is not None:
+        uso_apis.registrar("viacep", "acertos_cache")
+        return dados_cache
+    cep = cache_geocodificacao.normalizar_cep(cep)
     url = f"https://viacep.com.br/ws/{cep}/json/"
-    response = requests.get(url)
+    uso_apis.registrar("viacep", "requisicoes")
+    try:
+        response = http_client.get(url)
+    except requests.RequestException:
+        uso_apis.registrar("viacep", "erros")
+        return {"erro": "Erro ao acessar a API ViaCEP."}
     if response.status_code == 200:
         dados = response.json()
         if "erro" in dados:
             return {"erro": "CEP inválido."}
+        cache_geocodificacao.guardar_cep(cep, dados)
         return dados
     else:
         return {"erro": "Erro ao acessar a API ViaCEP."}
 
-def obter_coordenadas(endereco):
-    global _opencage_request_count
-    url = f"https://api.opencagedata.com/geocode/v1/json?q={endereco}&key={OPENCAGE_API_KEY}"
-    with _opencage_lock:
-        _opencage_request_count += 1
-    response = requests.get(url)
+def obter_coordenadas(endereco, espera_maxima=0.0):
+    """
+    (lat, lng) do endereço: cache, depois OpenCage dentro da cota.
+    Requisições web não esperam pelo limite por segundo; tasks podem passar ``espera_maxima``.
+    """
+    coordenadas_cache = cache_geocodificacao.buscar_coordenadas(endereco)
+    if coordenadas_cache is not None:
+        uso_apis.registrar("opencage", "acertos_cache")
+        return coordenadas_cache
+    # Cota paga: sem orçamento, o chamador segue com cache/índice offline ou valor base
+    try:
+        liberado = limitador_opencage().adquirir(espera_maxima)
+    except CotaEsgotada:
+        uso_apis.registrar("opencage", "bloqueadas")
+        return {"erro": "Cota diária da API OpenCage esgotada."}
+    if not liberado:
+        uso_apis.registrar("opencage", "bloqueadas")
+        return {"erro": "Limite de requisições da API OpenCage atingido."}
+    url = "https://api.opencagedata.com/geocode/v1/json"
+    uso_apis.registrar("opencage", "requisicoes")
+    try:
+        response = http_client.get(url, params={"q": endereco, "key": OPENCAGE_API_KEY})
+    except requests.RequestException:
+        uso_apis.registrar("opencage", "erros")
+        return {"erro": "Erro ao acessar a API OpenCage."}
     if response.status_code == 200:
         dados = response.json()
         if dados['results']:
             coordenadas = dados['results'][0]['geometry']
+            cache_geocodificacao.guardar_coordenadas(endereco, coordenadas['lat'], coordenadas['lng'])
             return coordenadas['lat'], coordenadas['lng']
         else:
             return {"erro": "Coordenadas não encontradas para o endereço fornecido."}
     else:
         return {"erro": "Erro ao acessar a API OpenCage."}
 
-def calcular_frete_cep(cep_destino, cep_referencia="08750580", raio_km=5, taxa_base=5, taxa_km=1, raio_limite_km=None):
+def _buscar_no_indice(cep):
+    """Coordenadas do CEP no índice offline, contando o acerto no uso das APIs"""
+    coordenadas = indice_cep.buscar_coordenadas_cep(cep)
+    if coordenadas is not None:
+        uso_apis.registrar("indice_cep", "acertos_cache")
+    return coordenadas
+
+def resolver_coordenadas_cep(cep, descricao="destino", espera_maxima=0.0):
+    """
+    Resolve (lat, lng) de um CEP: primeiro no índice offline, depois ViaCEP + OpenCage.
+    ``espera_maxima`` é repassado ao limitador da OpenCage (só em tasks).
+    Retorna a tupla de coordenadas ou um dict com "erro".
+    """
+    coordenadas = _buscar_no_indice(cep)
+    if coordenadas is not None:
+        return coordenadas
+    dados = validar_cep(cep)
+    if "erro" in dados:
+        return {"erro": f"CEP de {descricao} inválido: {dados['erro']}"}
+    try:
+        endereco = f"{dados['logradouro']}, {dados['localidade']}, {dados['uf']}"
+    except KeyError:
+        return {"erro": "Dados insuficientes para obter coordenadas."}
+    return obter_coordenadas(endereco, espera_maxima)
+
+def coordenadas_em_cache(cep):
+    """
+    (lat, lng) do CEP sem chamar APIs externas: índice offline ou cache de
+    geocodificação. None se o CEP ainda não foi resolvido.
+    """
+    coordenadas = _buscar_no_indice(cep)
+    if coordenadas is not None:
+        return coordenadas
+    dados = cache_geocodificacao.buscar_cep(cep)
+    try:
+        endereco = f"{dados['logradouro']}, {dados['localidade']}, {dados['uf']}"
+    except (KeyError, TypeError):
+        return None
+    return cache_geocodificacao.buscar_coordenadas(endereco)
+
+def _resolver_em_thread(cep, descricao):
+    """Resolve o CEP numa thread do pool, liberando a conexão de banco da thread ao final"""
+    try:
+        return resolver_coordenadas_cep(cep, descricao)
+    finally:
+        connections.close_all()
+
+def resolver_coordenadas_ceps(ceps, descricao="destino"):
+    """
+    Resolve vários CEPs (já normalizados e sem repetição) em paralelo.
+    Retorna {cep: (lat, lng) ou {"erro": ...}}.
+    """
+    resultado = {}
+    pendentes = []
+    for cep in ceps:
+        coordenadas = _buscar_no_indice(cep)
+        if coordenadas is not None:
+            resultado[cep] = coordenadas
+        else:
+            pendentes.append(cep)
+    futuros = {cep: _executor_resolucao.submit(_resolver_em_thread, cep, descricao) for cep in pendentes}
+    for cep, futuro in futuros.items():
+        try:
+            resultado[cep] = futuro.result()
+        except Exception as e:
+            resultado[cep] = {"erro": f"Falha ao resolver o CEP {cep}: {e}"}
+    return resultado
+
+def calcular_distancia_cep(cep_destino, cep_referencia, coord_referencia=None, coord_destino=None):
+    """
+    Distância geodésica (km, sem arredondar) entre dois CEPs.
+    Coordenadas já conhecidas dispensam a resolução do respectivo CEP.
+    Quando as duas pontas dependem das APIs externas, são resolvidas em paralelo.
+    Retorna {"distancia_km": float} ou {"erro": ...}.
+    """
+    if coord_referencia is None and coord_destino is None:
+        coord_referencia = _buscar_no_indice(cep_referencia)
+        coord_destino = _buscar_no_indice(cep_destino)
+    if coord_referencia is None and coord_destino is None:
+        futuro_referencia = _executor_resolucao.submit(_resolver_em_thread, cep_referencia, "referência")
+        coord_destino = resolver_coordenadas_cep(cep_destino, "destino")
+        coord_referencia = futuro_referencia.result()
+        if isinstance(coord_referencia, dict):
+            return coord_referencia
+        if isinstance(coord_destino, dict):
+            return coord_destino
+    if coord_referencia is None:
+        coord_referencia = resolver_coordenadas_cep(cep_referencia, "referência")
+        if isinstance(coord_referencia, dict):
+            return coord_referencia
+    if coord_destino is None:
+        coord_destino = resolver_coordenadas_cep(cep_destino, "destino")
+        if isinstance(coord_destino, dict):
+            return coord_destino
+    return {"distancia_km": geodesic(coord_referencia, coord_destino).km}
+
+def calcular_frete_cep(cep_destino, cep_referencia="08750580", raio_km=5, taxa_base=5, taxa_km=1, raio_limite_km=None,
+                       coord_referencia=None, coord_destino=None):
     # Garantir que todos os argumentos numéricos sejam float para evitar erro de soma com Decimal
     try:
         raio_km = float(raio_km)
@@ -68,28 +203,14 @@ def calcular_frete_cep(cep_destino, cep_referencia="08750580", raio_km=5, taxa_b
     :param taxa_base: Valor base do frete (float, padrão: 5).
     :param taxa_km: Valor adicional por km acima do raio (float, padrão: 1).
     :param raio_limite_km: Raio máximo de entrega (float, opcional). Se informado, bloqueia entregas fora desse raio.
+    :param coord_referencia: (lat, lng) já geocodificados da origem (opcional, evita consultas externas).
+    :param coord_destino: (lat, lng) já geocodificados do destino (opcional, evita consultas externas).
     :return: dict com distancia_km, custo_frete, erro (se houver)
     """
-    import math
-    # raio_limite_km agora é argumento explícito
-    dados_referencia = validar_cep(cep_referencia)
-    dados_destino = validar_cep(cep_destino)
-    if "erro" in dados_referencia:
-        return {"erro": f"CEP de referência inválido: {dados_referencia['erro']}"}
-    if "erro" in dados_destino:
-        return {"erro": f"CEP de destino inválido: {dados_destino['erro']}"}
-    try:
-        endereco_referencia = f"{dados_referencia['logradouro']}, {dados_referencia['localidade']}, {dados_referencia['uf']}"
-        endereco_destino = f"{dados_destino['logradouro']}, {dados_destino['localidade']}, {dados_destino['uf']}"
-        coord_referencia = obter_coordenadas(endereco_referencia)
-        coord_destino = obter_coordenadas(endereco_destino)
-        if "erro" in coord_referencia:
-            return coord_referencia
-        if "erro" in coord_destino:
-            return coord_destino
-    except KeyError:
-        return {"erro": "Dados insuficientes para obter coordenadas."}
-    distancia_km = geodesic(coord_referencia, coord_destino).km
+    distancia = calcular_distancia_cep(cep_destino, cep_referencia, coord_referencia, coord_destino)
+    if "erro" in distancia:
+        return distancia
+    distancia_km = distancia["distancia_km"]
     if raio_limite_km is not None and distancia_km > float(raio_limite_km):
         return {"erro": f"Fora do raio de entrega: {round(distancia_km,2)} km (limite: {raio_limite_km} km)", "distancia_km": round(distancia_km,2)}
     if distancia_km <= raio_km:
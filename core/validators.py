@@ -296,8 +296,8 @@ class ValidadorCEP:
     def validar_cep_existe(cep: str) -> bool:
         """Valida se o CEP existe (usando API externa)"""
         try:
-            import requests
-            response = requests.get(f'https://viacep.com.br/ws/{cep}/json/', timeout=5)
+            from .http_client import get
+            response = get(f'https://viacep.com.br/ws/{cep}/json/')
             
             if response.status_code == 200:
                 data = response.json()
@@ -5,10 +5,11 @@ from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Prefetch
 from django.contrib.auth import get_user_model
 
 from .models import (
-    Pedido, Entregador, AceitePedido, AvaliacaoEntregador, 
+    Pedido, ItemPedido, Entregador, AceitePedido, AvaliacaoEntregador, 
     OcorrenciaEntrega, Restaurante
 )
 from .serializers import (
@@ -67,14 +68,44 @@ class PedidoViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[IsEntregadorOrReadOnly])
     def disponiveis(self, request):
-        """Lista pedidos disponíveis para aceite pelos entregadores"""
+        """
+        Lista pedidos disponíveis para aceite pelos entregadores.
+        Com latitude/longitude do entregador, retorna a distância até cada
+        restaurante (mais próximos primeiro) e aplica o filtro raio_km.
+        """
+        filtros = PedidosDisponiveisSerializer(data=request.query_params)
+        filtros.is_valid(raise_exception=True)
+        
         pedidos = Pedido.objects.filter(
             status='aguardando_entregador',
             tipo_entrega='delivery'
+        ).select_related('restaurante', 'endereco_entrega').prefetch_related(
+            Prefetch('itens', queryset=ItemPedido.objects.select_related('produto__categoria'))
         ).order_by('-created_at')
+        if filtros.validated_data['apenas_sem_entregador']:
+            pedidos = pedidos.filter(entregador__isnull=True)
+        
+        if 'latitude' not in filtros.validated_data:
+            serializer = PedidoSerializer(pedidos, many=True)
+            return Response(serializer.data)
+        
+        from .distancia import dentro_do_raio
+        
+        origem = (filtros.validated_data['latitude'], filtros.validated_data['longitude'])
+        raio_km = filtros.validated_data.get('raio_km')
+        pedidos = [pedido for pedido in pedidos if pedido.restaurante.coordenadas is not None]
+        indices, distancias = dentro_do_raio(
+            origem,
+            [pedido.restaurante.coordenadas for pedido in pedidos],
+            float(raio_km) if raio_km else float('inf')
+        )
         
-        serializer = PedidosDisponiveisSerializer(pedidos, many=True)
-        return Response(serializer.data)
+        dados = []
+        for indice, distancia in zip(indices, distancias):
+            item = PedidoSerializer(pedidos[indice]).data
+            item['distancia_km'] = round(distancia, 2)
+            dados.append(item)
+        return Response(dados)
 
     @action(detail=True, methods=['post'], permission_classes=[IsEntregadorOrReadOnly])
     def aceitar(self, request, pk=None):
@@ -0,0 +1,162 @@
+"""
+Tabela de zonas de entrega por restaurante.
+
+Os anéis de distância são derivados das regras de frete do restaurante
+(``valor_frete_padrao``, ``valor_adicional_km``, ``raio_limite_km``) e
+reconstruídos sempre que essas regras mudam, com largura
+``ZONA_ENTREGA_INTERVALO_KM``. Eles definem onde a entrega é permitida (o
+lojista pode bloquear um anel); o valor de cada anel é só referência (preço
+no limite superior). A cotação cobra pela distância exata, com a mesma
+fórmula de ``calcular_frete_cep``.
+
+Os preços por bairro são definidos pelo lojista e têm prioridade sobre os anéis.
+Valem só na cidade/UF do restaurante e são comparados com o bairro, a cidade
+e a UF do payload do CEP (ViaCEP), nunca com o texto digitado pelo cliente.
+O raio limite continua valendo para eles.
+"""
+
+import bisect
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache_geocodificacao import normalizar_endereco
+from .models import Restaurante, ZonaEntrega
+
+logger = logging.getLogger(__name__)
+
+# Campos do restaurante que definem as regras de frete
+CAMPOS_FRETE = ('frete_fixo', 'valor_frete_fixo', 'valor_frete_padrao', 'valor_adicional_km', 'raio_limite_km')
+
+# Distância coberta pela taxa base (mesmo padrão de calcular_frete_cep)
+RAIO_TAXA_BASE_KM = Decimal('5')
+
+CENTAVOS = Decimal('0.01')
+
+
+def _intervalo_km() -> Decimal:
+    return Decimal(str(getattr(settings, 'ZONA_ENTREGA_INTERVALO_KM', 1)))
+
+
+def _raio_maximo_tabela_km() -> Decimal:
+    return Decimal(str(getattr(settings, 'ZONA_ENTREGA_RAIO_MAXIMO_KM', 30)))
+
+
+def normalizar_bairro(bairro: str) -> str:
+    return normalizar_endereco(bairro)[:100]
+
+
+def chave_bairro(dados_cep: Optional[dict]) -> Optional[Tuple[str, str, str]]:
+    """(UF, cidade, bairro) normalizados do payload ViaCEP, ou None se incompleto"""
+    dados = dados_cep or {}
+    uf = (dados.get('uf') or '').upper()
+    cidade = normalizar_bairro(dados.get('localidade') or '')
+    bairro = normalizar_bairro(dados.get('bairro') or '')
+    if not (uf and cidade and bairro):
+        return None
+    return uf, cidade, bairro
+
+
+def gerar_aneis(restaurante: Restaurante):
+    """Gera (sem salvar) os anéis de distância a partir das regras de frete"""
+    if restaurante.frete_fixo or restaurante.valor_frete_padrao is None:
+        return []
+
+    base = Decimal(str(restaurante.valor_frete_padrao))
+    adicional = Decimal(str(restaurante.valor_adicional_km or 0))
+    limite = Decimal(str(restaurante.raio_limite_km)) if restaurante.raio_limite_km else None
+    alcance = limite if limite is not None else _raio_maximo_tabela_km()
+
+    def _anel(distancia_max, valor):
+        return ZonaEntrega(
+            restaurante=restaurante,
+            tipo='raio',
+            distancia_max_km=distancia_max,
+            valor=valor.quantize(CENTAVOS, rounding=ROUND_HALF_UP),
+            origem='automatica',
+        )
+
+    if not adicional:
+        # Preço único em toda a área atendida
+        return [_anel(alcance, base)] if limite is not None else []
+
+    aneis = [_anel(min(RAIO_TAXA_BASE_KM, alcance), base)]
+    distancia = RAIO_TAXA_BASE_KM
+    intervalo = _intervalo_km()
+    while distancia < alcance:
+        distancia = min(distancia + intervalo, alcance)
+        aneis.append(_anel(distancia, base + (distancia - RAIO_TAXA_BASE_KM) * adicional))
+    return aneis
+
+
+@transaction.atomic
+def reconstruir_zonas_automaticas(restaurante: Restaurante) -> int:
+    """Recria os anéis automáticos do restaurante; retorna quantos foram criados"""
+    ZonaEntrega.objects.filter(restaurante=restaurante, origem='automatica').delete()
+    aneis = gerar_aneis(restaurante)
+    ZonaEntrega.objects.bulk_create(aneis)
+    logger.info(f"Zonas de entrega de {restaurante.nome} reconstruídas: {len(aneis)} anéis")
+    return len(aneis)
+
+
+@transaction.atomic
+def definir_precos_bairro(restaurante: Restaurante, precos: Dict[str, Optional[Decimal]]) -> int:
+    """
+    Substitui os preços por bairro do restaurante.
+    ``precos`` mapeia nome do bairro para o valor; ``None`` bloqueia a entrega.
+    Os bairros valem na cidade/UF do restaurante.
+    """
+    ZonaEntrega.objects.filter(restaurante=restaurante, tipo='bairro').delete()
+    zonas = [
+        ZonaEntrega(
+            restaurante=restaurante,
+            tipo='bairro',
+            bairro=bairro,
+            bairro_normalizado=normalizar_bairro(bairro),
+            cidade=restaurante.cidade,
+            cidade_normalizada=normalizar_bairro(restaurante.cidade),
+            uf=(restaurante.estado or '').upper(),
+            valor=valor if valor is not None else Decimal('0.00'),
+            entrega_permitida=valor is not None,
+            origem='manual',
+        )
+        for bairro, valor in precos.items()
+    ]
+    ZonaEntrega.objects.bulk_create(zonas)
+    return len(zonas)
+
+
+class TabelaZonas:
+    """
+    Zonas de um restaurante carregadas em memória (uma única consulta),
+    para cotações em lote sem uma ida ao banco por CEP.
+    """
+
+    def __init__(self, restaurante: Restaurante):
+        zonas = list(ZonaEntrega.objects.filter(restaurante=restaurante))
+        self._bairros = {
+            (zona.uf, zona.cidade_normalizada, zona.bairro_normalizado): zona
+            for zona in zonas if zona.tipo == 'bairro'
+        }
+        self._aneis = sorted(
+            (zona for zona in zonas if zona.tipo == 'raio' and zona.distancia_max_km is not None),
+            key=lambda zona: zona.distancia_max_km,
+        )
+        self._limites = [zona.distancia_max_km for zona in self._aneis]
+
+    @property
+    def tem_bairros(self) -> bool:
+        return bool(self._bairros)
+
+    def buscar_bairro(self, dados_cep: Optional[dict]) -> Optional[ZonaEntrega]:
+        """Zona do bairro do CEP (payload ViaCEP), se o lojista tiver definido uma"""
+        chave = chave_bairro(dados_cep)
+        return self._bairros.get(chave) if chave else None
+
+    def buscar_raio(self, distancia_km: float) -> Optional[ZonaEntrega]:
+        """Anel que contém a distância (para bloqueios; o preço é calculado pela distância)"""
+        posicao = bisect.bisect_left(self._limites, Decimal(str(round(distancia_km, 2))))
+        return self._aneis[posicao] if posicao < len(self._aneis) else None
@@ -16,6 +16,8 @@ urlpatterns = [
     
     # Cardápio
     path('cardapio/', views.CardapioView.as_view(), name='cardapio'),
+    path('cardapio.json', views.CardapioJSONView.as_view(), name='cardapio_json'),
+    path('cardapio/alteracoes/', views.CardapioAlteracoesView.as_view(), name='cardapio_alteracoes'),
     path('categoria/<slug:categoria_slug>/', views.CategoriaView.as_view(), name='categoria'),
     path('produto/<slug:produto_slug>/', views.ProdutoDetalheView.as_view(), name='produto_detalhe'),
     
@@ -52,4 +54,5 @@ urlpatterns = [
     path('api/buscar-cep/', views.BuscarCEPView.as_view(), name='api_buscar_cep'),
     path('api/calcular-entrega/', views.CalcularEntregaView.as_view(), name='api_calcular_entrega'),
     path('api/buscar-sugestoes/', views.BuscarSugestoesView.as_view(), name='api_buscar_sugestoes'),
+    path('api/fragmento/', views.FragmentoUsuarioView.as_view(), name='api_fragmento'),
 ]
@@ -59,11 +59,7 @@ class LoginClienteView(View):
         restaurante_slug = kwargs.get('restaurante_slug')
         restaurante = None
         if restaurante_slug:
-            from core.models import Restaurante
-            try:
-                restaurante = Restaurante.objects.get(slug=restaurante_slug)
-            except Restaurante.DoesNotExist:
-                restaurante = None
+            restaurante = resolver_restaurante(restaurante_slug, somente_ativo=False)
         return render(request, 'loja/login.html', {'restaurante': restaurante})
 
     def post(self, request, *args, **kwargs):
@@ -72,11 +68,7 @@ class LoginClienteView(View):
         restaurante_slug = kwargs.get('restaurante_slug')
         restaurante = None
         if restaurante_slug:
-            from core.models import Restaurante
-            try:
-                restaurante = Restaurante.objects.get(slug=restaurante_slug)
-            except Restaurante.DoesNotExist:
-                restaurante = None
+            restaurante = resolver_restaurante(restaurante_slug, somente_ativo=False)
         user = authenticate(request, username=username, password=password)
         if user is not None:
             login(request, user)
@@ -97,11 +89,7 @@ class CadastroClienteView(View):
         restaurante_slug = kwargs.get('restaurante_slug')
         restaurante = None
         if restaurante_slug:
-            from core.models import Restaurante
-            try:
-                restaurante = Restaurante.objects.get(slug=restaurante_slug)
-            except Restaurante.DoesNotExist:
-                restaurante = None
+            restaurante = resolver_restaurante(restaurante_slug, somente_ativo=False)
         return render(request, 'loja/cadastro.html', {'restaurante': restaurante})
 
     def post(self, request, *args, **kwargs):
@@ -114,11 +102,7 @@ class CadastroClienteView(View):
         restaurante_slug = kwargs.get('restaurante_slug')
         restaurante = None
         if restaurante_slug:
-            from core.models import Restaurante
-            try:
-                restaurante = Restaurante.objects.get(slug=restaurante_slug)
-            except Restaurante.DoesNotExist:
-                restaurante = None
+            restaurante = resolver_restaurante(restaurante_slug, somente_ativo=False)
 
         if password != password2:
             from django.contrib import messages
@@ -149,15 +133,25 @@ from django.views import View
 from django.views.generic import TemplateView
 from django.contrib import messages
 from django.db import models, transaction
-from django.db.models import Q, Prefetch
 from django.core.paginator import Paginator
-from django.http import JsonResponse, Http404
+from django.http import JsonResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date, parse_etags
 from django.contrib.auth.mixins import LoginRequiredMixin
+import gzip
+import hashlib
 import json
-import requests
 import traceback
+from functools import partial
 from decimal import Decimal, InvalidOperation
 
+from core import analise_busca, busca, cardapio_cache, cardapio_delta, http_client
+from core.popularidade import ordem_popularidade, versao_ranking
+from core.restaurante_cache import restaurante_ou_404, resolver_restaurante
 from core.models import (
     Restaurante, Categoria, Produto, Pedido, ItemPedido, 
     PersonalizacaoItemPedido, ItemPersonalizacao, OpcaoPersonalizacao, Usuario, Endereco, HistoricoStatusPedido
@@ -166,6 +160,60 @@ from core.models import (
 
 class BaseLojaView(TemplateView):
     """View base para todas as páginas da loja"""
+
+    # Dados do cardápio que o template da página usa. Entram no contexto como
+    # objetos preguiçosos: só custam algo se o template (ou a view) os acessar.
+    dados_cardapio = ('categorias_menu', 'produtos_destaque')
+
+    # Páginas iguais para todos os visitantes: respondem 304 quando nada mudou e
+    # recebem as partes do usuário (login, mensagens, carrinho) pelo fragmento
+    cache_condicional = False
+
+    def get(self, request, *args, **kwargs):
+        if not self.cache_condicional:
+            return super().get(request, *args, **kwargs)
+
+        restaurante = restaurante_ou_404(kwargs.get('restaurante_slug'))
+        etag, ultima_modificacao = self.get_validadores(restaurante)
+        response = get_conditional_response(request, etag=etag, last_modified=ultima_modificacao)
+        if response is None:
+            # Nada em cache no cliente (ou desatualizado): renderiza normalmente.
+            # Na primeira visita a renderização cria o token CSRF; o ETag é
+            # recalculado para já corresponder ao cookie que o navegador receberá.
+            response = super().get(request, *args, **kwargs)
+            response.render()
+            etag, ultima_modificacao = self.get_validadores(restaurante)
+
+        response['ETag'] = etag
+        if ultima_modificacao:
+            response['Last-Modified'] = http_date(ultima_modificacao)
+        # A página traz o token CSRF do visitante: apenas o navegador pode guardá-la
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def get_validadores(self, restaurante):
+        """ETag e Last-Modified (timestamp) da página, sem renderizá-la"""
+        geracao, catalogo_modificado = cardapio_cache.versao(restaurante.pk)
+        partes = [
+            type(self).__name__,
+            self.request.get_full_path(),
+            restaurante.pk,
+            restaurante.updated_at.isoformat(),
+            geracao,
+            self.request.META.get('CSRF_COOKIE', ''),
+            *self.get_validadores_extras(restaurante),
+        ]
+        etag = '"%s"' % hashlib.sha1('|'.join(str(parte) for parte in partes).encode()).hexdigest()
+
+        # Sem a data da última mudança do catálogo, vale apenas o ETag
+        ultima_modificacao = None
+        if catalogo_modificado:
+            ultima_modificacao = max(int(restaurante.updated_at.timestamp()), int(catalogo_modificado))
+        return etag, ultima_modificacao
+
+    def get_validadores_extras(self, restaurante):
+        """Outros dados de que a página depende, além do restaurante e do cardápio"""
+        return []
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -178,24 +226,20 @@ class BaseLojaView(TemplateView):
             # Isso força a estrutura de URL correta.
             raise Http404("Restaurante não encontrado.")
 
-        restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+        restaurante = restaurante_ou_404(restaurante_slug)
             
         context['restaurante'] = restaurante
         context['restaurante_atual'] = restaurante  # Para compatibilidade com templates
+        context['fragmento_remoto'] = self.cache_condicional or getattr(self.request, 'prerender', False)
         
-        # Categorias para o menu, com produtos pré-carregados para eficiência
-        context['categorias_menu'] = restaurante.categorias.filter(ativo=True).prefetch_related(
-            Prefetch('produtos', queryset=Produto.objects.filter(disponivel=True).order_by('ordem', 'nome'))
-        ).order_by('ordem', 'nome')
-        
-        # Produtos em destaque
-        context['produtos_destaque'] = restaurante.produtos.filter(
-            destaque=True, 
-            disponivel=True
-        ).select_related('categoria')[:6]
+        # Categorias do menu (com produtos pré-carregados) e produtos em destaque,
+        # servidos do snapshot versionado do cardápio
+        snapshot = SimpleLazyObject(lambda: cardapio_cache.obter_snapshot(restaurante))
+        for nome in self.dados_cardapio:
+            context[nome] = SimpleLazyObject(partial(snapshot.__getitem__, nome))
         
         # Informações do carrinho
-        context['carrinho_count'] = self.get_carrinho_count()
+        context['carrinho_count'] = SimpleLazyObject(self.get_carrinho_count)
         
         return context
     
@@ -208,6 +252,12 @@ class BaseLojaView(TemplateView):
 class HomeView(BaseLojaView):
     """Página inicial da loja"""
     template_name = 'loja/home.html'
+    dados_cardapio = ('produtos_destaque',)
+    cache_condicional = True
+
+    def get_validadores_extras(self, restaurante):
+        # "Mais pedidos" muda a cada pedido entregue
+        return [versao_ranking(restaurante.pk)]
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -218,28 +268,12 @@ class HomeView(BaseLojaView):
                 ativo=True
             ).order_by('ordem', 'nome')[:8]
             
-            # Produtos mais pedidos/populares (simulando por enquanto)
+            # Produtos mais pedidos (ranking materializado; sem vendas, os mais recentes)
             produtos_populares = context['restaurante'].produtos.filter(
                 disponivel=True
-            ).select_related('categoria').order_by('-created_at')[:8]
+            ).select_related('categoria').order_by(*ordem_popularidade('-created_at'))[:8]
             
             context['produtos_populares'] = produtos_populares
-            
-            # Preparar dados dos produtos para JavaScript (carrinho)
-            produtos_js = {}
-            for produto in produtos_populares:
-                preco_final = produto.preco_promocional if produto.tem_promocao else produto.preco
-                produtos_js[str(produto.id)] = {
-                    'id': produto.id,
-                    'nome': produto.nome,
-                    'preco': float(preco_final),
-                    'categoria': produto.categoria.slug if produto.categoria else '',
-                    'imagem': produto.imagem_principal.url if produto.imagem_principal else '/static/img/placeholder.jpg',
-                    'disponivel': produto.disponivel
-                }
-            
-            context['produtos_js'] = produtos_js
-            print(f"HomeView: {len(produtos_populares)} produtos populares, dados JS preparados")
         
         return context
 
@@ -247,6 +281,8 @@ class HomeView(BaseLojaView):
 class CardapioView(BaseLojaView):
     """Página do cardápio completo"""
     template_name = 'loja/cardapio.html'
+    dados_cardapio = ('categorias_menu',)
+    cache_condicional = True
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -257,35 +293,96 @@ class CardapioView(BaseLojaView):
         # categoria sejam carregados de forma otimizada.
         categorias = context.get('categorias_menu', [])
         context['categorias_cardapio'] = categorias
-        
-        if categorias:
-            # Preparar dados de TODOS os produtos para JavaScript (carrinho)
-            produtos_js = {}
-            todos_produtos = []
-            for categoria in categorias:
-                # Usar .all() aqui é eficiente por causa do prefetch_related na view base
-                produtos_da_categoria = categoria.produtos.all()
-                todos_produtos.extend(produtos_da_categoria)
-                for produto in produtos_da_categoria:
-                    preco_final = produto.preco_promocional if produto.tem_promocao else produto.preco
-                    produtos_js[str(produto.id)] = {
-                        'id': str(produto.id),
-                        'nome': produto.nome,
-                        'preco': float(preco_final),
-                        'categoria': categoria.slug,
-                        'imagem': produto.imagem_principal.url if produto.imagem_principal else '/static/img/placeholder.jpg',
-                        'disponivel': produto.disponivel
-                    }
-            
-            context['produtos_js'] = json.dumps(produtos_js)
-            print(f"🍕 CardapioView (Otimizada): {len(categorias)} categorias, {len(todos_produtos)} produtos no total.")
+
+        # Os dados dos produtos para o carrinho (JS) vêm de CardapioJSONView,
+        # gerados uma vez por versão do cardápio e revalidados pelo navegador com ETag
 
         return context
 
 
+class CardapioJSONView(View):
+    """
+    JSON dos produtos disponíveis da loja (usado pelo carrinho no navegador).
+    Servido a partir do artefato comprimido da versão atual do cardápio, com
+    ETag forte para revalidação (304 Not Modified).
+    """
+
+    def get(self, request, restaurante_slug):
+        restaurante = restaurante_ou_404(restaurante_slug)
+        artefato = cardapio_cache.obter_artefato_json(restaurante)
+
+        usa_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        # Cada codificação é uma representação distinta, com ETag próprio
+        etag = f'"{artefato["etag"]}-gzip"' if usa_gzip else f'"{artefato["etag"]}"'
+
+        etags_cliente = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in etags_cliente or '*' in etags_cliente:
+            response = HttpResponseNotModified()
+        elif usa_gzip:
+            response = HttpResponse(artefato['gzip'], content_type='application/json; charset=utf-8')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(artefato['gzip']), content_type='application/json; charset=utf-8')
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+class CardapioAlteracoesView(View):
+    """
+    Alterações do cardápio desde a versão informada (``?desde=``), para
+    clientes que mantêm o cardápio localmente e aplicam apenas os deltas.
+    Sem ``desde``, retorna só a versão atual.
+    """
+
+    def get(self, request, restaurante_slug):
+        restaurante = restaurante_ou_404(restaurante_slug)
+        desde = request.GET.get('desde')
+        if desde is None:
+            dados = {'versao': cardapio_delta.versao_atual(restaurante.pk)}
+        else:
+            try:
+                desde = int(desde)
+                if desde < 0:
+                    raise ValueError
+            except ValueError:
+                return JsonResponse({'erro': 'Parâmetro "desde" deve ser um número inteiro não negativo.'}, status=400)
+            dados = cardapio_delta.alteracoes_desde(restaurante, desde)
+
+        response = JsonResponse(dados)
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+@method_decorator(ensure_csrf_cookie, name='dispatch')
+class FragmentoUsuarioView(View):
+    """
+    Partes da página que dependem do visitante (menu de login, mensagens,
+    quantidade no carrinho), buscadas pelas páginas com cache condicional ou
+    pré-renderizadas. Também entrega o cookie CSRF.
+    """
+
+    def get(self, request, restaurante_slug):
+        restaurante = restaurante_ou_404(restaurante_slug)
+        contexto = {'restaurante_atual': restaurante}
+        carrinho = request.session.get('carrinho', {})
+        response = JsonResponse({
+            'autenticado': request.user.is_authenticated,
+            'menu_usuario': render_to_string('loja/partials/menu_usuario.html', contexto, request=request),
+            'mensagens': render_to_string('loja/partials/mensagens.html', contexto, request=request),
+            'carrinho_count': sum(item['quantidade'] for item in carrinho.values()),
+        })
+        response['Cache-Control'] = 'private, no-store'
+        return response
+
+
 class CategoriaView(BaseLojaView):
     """Página de uma categoria específica"""
     template_name = 'loja/categoria.html'
+    dados_cardapio = ('categorias_menu',)
+    cache_condicional = True
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -315,6 +412,12 @@ class CategoriaView(BaseLojaView):
 class ProdutoDetalheView(BaseLojaView):
     """Página de detalhes do produto"""
     template_name = 'loja/produto_detalhe.html'
+    dados_cardapio = ()
+    cache_condicional = True
+
+    def get_validadores_extras(self, restaurante):
+        # Os relacionados são ordenados pelos mais pedidos
+        return [versao_ranking(restaurante.pk)]
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -333,10 +436,10 @@ class ProdutoDetalheView(BaseLojaView):
                 ativo=True
             ).prefetch_related('itens').order_by('ordem')
             
-            # Produtos relacionados (da mesma categoria)
+            # Produtos relacionados (da mesma categoria, os mais pedidos primeiro)
             produtos_relacionados = produto.categoria.produtos.filter(
                 disponivel=True
-            ).exclude(id=produto.id).order_by('ordem', 'nome')[:4]
+            ).exclude(id=produto.id).order_by(*ordem_popularidade('ordem', 'nome'))[:4]
             
             context['produto'] = produto
             context['opcoes_personalizacao'] = opcoes_personalizacao
@@ -348,6 +451,7 @@ class ProdutoDetalheView(BaseLojaView):
 class BuscarProdutosView(BaseLojaView):
     """Busca de produtos com filtros avançados"""
     template_name = 'loja/buscar.html'
+    dados_cardapio = ()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -359,83 +463,37 @@ class BuscarProdutosView(BaseLojaView):
         sugestoes = []
         
         if context['restaurante'] and query:
-            # Busca principal
-            produtos_query = context['restaurante'].produtos.filter(
-                disponivel=True
-            ).select_related('categoria')
-            
-            # Aplicar filtro de categoria se especificado
-            if categoria_filter:
-                produtos_query = produtos_query.filter(categoria__slug=categoria_filter)
-            
-            # Busca por relevância (nome tem prioridade)
-            produtos_nome = produtos_query.filter(
-                Q(nome__icontains=query)
-            ).order_by('nome')
-            
-            # Busca em descrição
-            produtos_descricao = produtos_query.filter(
-                Q(descricao__icontains=query)
-            ).exclude(
-                id__in=produtos_nome.values_list('id', flat=True)
-            ).order_by('nome')
-            
-            # Busca em categoria
-            produtos_categoria = produtos_query.filter(
-                Q(categoria__nome__icontains=query)
-            ).exclude(
-                id__in=produtos_nome.values_list('id', flat=True)
-            ).exclude(
-                id__in=produtos_descricao.values_list('id', flat=True)
-            ).order_by('nome')
-            
-            # Combinar resultados por relevância
-            produtos_list = list(produtos_nome) + list(produtos_descricao) + list(produtos_categoria)
+            # Ids ordenados por relevância (do cache ou do backend de busca configurado)
+            resultado = busca.resultado(context['restaurante'], query, categoria=categoria_filter or None)
+            produto_ids = resultado['produtos']
             
-            # Paginação
-            paginator = Paginator(produtos_list, 12)
+            # Paginação sobre os ids: só os produtos da página são carregados
+            paginator = Paginator(produto_ids, 12)
             page_number = self.request.GET.get('page')
             produtos = paginator.get_page(page_number)
+            produtos.object_list = busca.carregar_produtos(produtos.object_list)
+            
+            # Conta a busca uma vez, não a cada página de resultados
+            if produtos.number == 1:
+                analise_busca.registrar(context['restaurante'].pk, query, len(produto_ids))
             
             # Categorias que têm produtos nos resultados
-            if produtos_list:
+            if produto_ids:
                 categorias_com_resultados = context['restaurante'].categorias.filter(
-                    produtos__in=[p.id for p in produtos_list]
-                ).distinct().order_by('nome')
+                    pk__in=resultado['categorias']
+                ).order_by('nome')
             
             # Sugestões se não houver resultados ou poucos resultados
-            if len(produtos_list) < 3:
-                # Buscar produtos similares
-                palavras = query.split()
-                if palavras:
-                    sugestoes_query = context['restaurante'].produtos.filter(
-                        disponivel=True
-                    )
-                    
-                    for palavra in palavras:
-                        if len(palavra) > 2:  # Ignorar palavras muito pequenas
-                            sugestoes_query = sugestoes_query.filter(
-                                Q(nome__icontains=palavra) |
-                                Q(descricao__icontains=palavra) |
-                                Q(categoria__nome__icontains=palavra)
-                            )
-                    
-                    # Excluir produtos já nos resultados
-                    if produtos_list:
-                        sugestoes_query = sugestoes_query.exclude(
-                            id__in=[p.id for p in produtos_list]
-                        )
-                    
-                    sugestoes = list(sugestoes_query.order_by('nome')[:6])
+            sugestoes = busca.carregar_produtos(resultado['sugestoes'])
             
             context.update({
                 'produtos': produtos,
                 'query': query,
                 'categoria_filter': categoria_filter,
-                'total_resultados': len(produtos_list),
+                'total_resultados': len(produto_ids),
                 'categorias_com_resultados': categorias_com_resultados,
                 'sugestoes': sugestoes,
-                'tem_resultados': len(produtos_list) > 0,
+                'tem_resultados': len(produto_ids) > 0,
             })
         else:
             # Se não há query, mostrar categorias disponíveis
@@ -457,6 +515,7 @@ class BuscarProdutosView(BaseLojaView):
 class CarrinhoViewOriginal(BaseLojaView):
     """Página do carrinho"""
     template_name = 'loja/carrinho.html'
+    dados_cardapio = ()
     
     def get(self, request, *args, **kwargs):
         # Se for requisição AJAX, retornar JSON
@@ -512,8 +571,8 @@ class CarrinhoViewOriginal(BaseLojaView):
             restaurante_slug = kwargs.get('restaurante_slug') or self.request.resolver_match.kwargs.get('restaurante_slug')
             
             if restaurante_slug:
-                try:
-                    restaurante = Restaurante.objects.get(slug=restaurante_slug, status='ativo')
+                restaurante = resolver_restaurante(restaurante_slug)
+                if restaurante:
                     endereco_completo = f"{restaurante.logradouro}, {restaurante.numero}"
                     if restaurante.complemento:
                         endereco_completo += f", {restaurante.complemento}"
@@ -525,7 +584,7 @@ class CarrinhoViewOriginal(BaseLojaView):
                         'slug': restaurante.slug
                     }
                     print(f"DEBUG CarrinhoView: Restaurante encontrado = {restaurante.nome}")
-                except Restaurante.DoesNotExist:
+                else:
                     print(f"DEBUG CarrinhoView: Restaurante {restaurante_slug} não encontrado")
             else:
                 print("DEBUG CarrinhoView: Slug do restaurante não encontrado")
@@ -628,7 +687,7 @@ class AdicionarCarrinhoView(View):
                     'error': 'Restaurante não identificado'
                 }, status=400)
             
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+            restaurante = restaurante_ou_404(restaurante_slug)
             
             # Para pizzas meio-a-meio, usar produto base de pizza
             if is_meio_a_meio:
@@ -742,7 +801,7 @@ class RemoverCarrinhoView(View):
     
     def post(self, request, restaurante_slug, item_id):
         try:
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+            restaurante = restaurante_ou_404(restaurante_slug)
             
             # Obter carrinho
             # Garantir que existe sessão_id
@@ -770,7 +829,7 @@ class LimparCarrinhoView(View):
     
     def post(self, request, restaurante_slug):
         try:
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+            restaurante = restaurante_ou_404(restaurante_slug)
             
             # Obter carrinho
             carrinho = CarrinhoService.obter_carrinho(
@@ -792,6 +851,7 @@ class LimparCarrinhoView(View):
 class CheckoutView(BaseLojaView):
     """Página de checkout"""
     template_name = 'loja/checkout.html'
+    dados_cardapio = ()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -934,7 +994,7 @@ class CheckoutView(BaseLojaView):
                 messages.error(request, 'Restaurante não identificado.')
                 return redirect('landing_page')
                 
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+            restaurante = restaurante_ou_404(restaurante_slug)
             print(f"🏪 Restaurante encontrado: {restaurante.nome}")
 
             if not carrinho:
@@ -1168,6 +1228,7 @@ class CheckoutView(BaseLojaView):
 class ConfirmarPedidoView(BaseLojaView):
     """Exibe a página de confirmação do pedido."""
     template_name = 'loja/confirmacao_pedido.html'
+    dados_cardapio = ()
 
     def get(self, request, *args, **kwargs):
         ultimo_pedido_id = self.request.session.get('ultimo_pedido_id')
@@ -1217,6 +1278,7 @@ class ConfirmarPedidoView(BaseLojaView):
 class DetalhesPedidoView(BaseLojaView):
     """Página de detalhes do pedido"""
     template_name = 'loja/detalhes_pedido.html'
+    dados_cardapio = ()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1238,6 +1300,7 @@ class DetalhesPedidoView(BaseLojaView):
 class AcompanharPedidoView(BaseLojaView):
     """Acompanhar pedido por número"""
     template_name = 'loja/acompanhar_pedido.html'
+    dados_cardapio = ()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1256,6 +1319,7 @@ class AcompanharPedidoView(BaseLojaView):
 class MeusPedidosView(BaseLojaView):
     """Página de pedidos do usuário - permite busca por celular ou usuário logado"""
     template_name = 'loja/meus_pedidos.html'
+    dados_cardapio = ()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1314,11 +1378,15 @@ class PerfilView(LoginRequiredMixin, BaseLojaView):
 class SobreView(BaseLojaView):
     """Página sobre o restaurante"""
     template_name = 'loja/sobre.html'
+    dados_cardapio = ()
+    cache_condicional = True
 
 
 class ContatoView(BaseLojaView):
     """Página de contato"""
     template_name = 'loja/contato.html'
+    dados_cardapio = ()
+    cache_condicional = True
 
 
 class BuscarCEPView(View):
@@ -1332,7 +1400,7 @@ class BuscarCEPView(View):
         
         try:
             # Usar API dos Correios ou ViaCEP
-            response = requests.get(f'https://viacep.com.br/ws/{cep}/json/')
+            response = http_client.get(f'https://viacep.com.br/ws/{cep}/json/')
             data = response.json()
             
             if 'erro' in data:
@@ -1516,6 +1584,7 @@ class BuscarCEPView(View):
 class AcessarPedidosView(BaseLojaView):
     """Página para o cliente acessar seus pedidos com o número do celular."""
     template_name = 'loja/acessar_pedidos.html'
+    dados_cardapio = ()
 
     def get(self, request, *args, **kwargs):
         # Apenas renderiza a página com o formulário
@@ -1574,7 +1643,7 @@ class RemoverItemCarrinhoView(View):
                 restaurante_slug = request.session.get('restaurante_slug')
             
             if restaurante_slug:
-                restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+                restaurante = restaurante_ou_404(restaurante_slug)
                 
                 # Obter carrinho
                 carrinho = CarrinhoService.obter_carrinho(
@@ -1630,7 +1699,7 @@ class AlterarQuantidadeCarrinhoView(View):
                 restaurante_slug = request.session.get('restaurante_slug')
             
             if restaurante_slug:
-                restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+                restaurante = restaurante_ou_404(restaurante_slug)
                 
                 # Obter carrinho
                 carrinho = CarrinhoService.obter_carrinho(
@@ -1688,7 +1757,7 @@ class LimparCarrinhoAjaxView(View):
                 restaurante_slug = request.session.get('restaurante_slug')
             
             if restaurante_slug:
-                restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+                restaurante = restaurante_ou_404(restaurante_slug)
                 
                 # Obter carrinho
                 carrinho = CarrinhoService.obter_carrinho(
@@ -1732,6 +1801,7 @@ from rest_framework import status
 class CarrinhoView(BaseLojaView):
     """Versão refatorada da view do carrinho usando CarrinhoService"""
     template_name = 'loja/carrinho.html'
+    dados_cardapio = ()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1788,7 +1858,7 @@ class CarrinhoView(BaseLojaView):
         if request.headers.get('Accept') == 'application/json':
             try:
                 restaurante_slug = kwargs.get('restaurante_slug')
-                restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+                restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
                 
                 # Garantir que existe sessão_id
                 if not request.session.session_key:
@@ -1800,21 +1870,14 @@ class CarrinhoView(BaseLojaView):
                     restaurante=restaurante
                 )
                 
-                resumo = CarrinhoService.calcular_resumo(carrinho)
-                
-                # Converter Decimals para float para compatibilidade com JavaScript
-                items_formatados = []
-                for item in resumo['itens']:
-                    item_formatado = item.copy()
-                    item_formatado['preco_unitario'] = float(item['preco_unitario'])
-                    item_formatado['subtotal'] = float(item['subtotal'])
-                    items_formatados.append(item_formatado)
+                # Valores em float para compatibilidade com JavaScript
+                resumo = CarrinhoService.calcular_resumo(carrinho).como_dict()
                 
                 return JsonResponse({
                     'success': True,
                     'carrinho_count': resumo['total_itens'],
-                    'total_valor': float(resumo['subtotal']),
-                    'items': items_formatados
+                    'total_valor': resumo['subtotal'],
+                    'items': resumo['itens']
                 })
                 
             except Exception as e:
@@ -1846,7 +1909,7 @@ class AdicionarProdutoCarrinhoView(View):
             
             # Obter restaurante
             restaurante_slug = kwargs.get('restaurante_slug')
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+            restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
             
             # Obter produto
             produto_id = serializer.validated_data['produto_id']
@@ -1946,6 +2009,7 @@ class AdicionarProdutoCarrinhoView(View):
 class CheckoutView(BaseLojaView):
     """Versão refatorada da view do checkout"""
     template_name = 'loja/checkout.html'
+    dados_cardapio = ()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1958,7 +2022,7 @@ class CheckoutView(BaseLojaView):
                 restaurante=context['restaurante']
             )
             
-            if carrinho.esta_vazio():
+            if CarrinhoService.esta_vazio(carrinho):
                 messages.warning(self.request, 'Seu carrinho está vazio')
                 return context
             
@@ -2001,7 +2065,7 @@ class CheckoutView(BaseLojaView):
         try:
             # Obter restaurante
             restaurante_slug = kwargs.get('restaurante_slug')
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+            restaurante = restaurante_ou_404(restaurante_slug)
             
             # Obter carrinho
             carrinho = CarrinhoService.obter_carrinho(
@@ -2010,7 +2074,7 @@ class CheckoutView(BaseLojaView):
                 restaurante=restaurante
             )
             
-            if carrinho.esta_vazio():
+            if CarrinhoService.esta_vazio(carrinho):
                 messages.error(request, 'Seu carrinho está vazio')
                 return redirect('loja:carrinho', restaurante_slug=restaurante_slug)
             
@@ -2086,7 +2150,7 @@ class LimparCarrinhoView(View):
     def post(self, request, *args, **kwargs):
         try:
             restaurante_slug = kwargs.get('restaurante_slug')
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+            restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
             
             carrinho = CarrinhoService.obter_carrinho(
                 usuario=request.user if request.user.is_authenticated else None,
@@ -2113,49 +2177,19 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class BuscarSugestoesView(BaseLojaView):
-    """API para sugestões de busca em tempo real"""
+class BuscarSugestoesView(View):
+    """
+    API para sugestões de busca em tempo real. Chamada a cada tecla digitada:
+    responde da memória, sem montar o contexto da loja.
+    """
     
-    def get(self, request, *args, **kwargs):
-        context = self.get_context_data(**kwargs)
+    def get(self, request, restaurante_slug):
+        restaurante = restaurante_ou_404(restaurante_slug)
         query = request.GET.get('q', '').strip()
         
         sugestoes = []
-        
-        if context['restaurante'] and query and len(query) >= 2:
-            # Buscar produtos que começam com a query
-            produtos_nomes = list(
-                context['restaurante'].produtos.filter(
-                    nome__istartswith=query,
-                    disponivel=True
-                ).values_list('nome', flat=True)[:5]
-            )
-            
-            # Buscar produtos que contêm a query
-            produtos_contem = list(
-                context['restaurante'].produtos.filter(
-                    nome__icontains=query,
-                    disponivel=True
-                ).exclude(
-                    nome__istartswith=query
-                ).values_list('nome', flat=True)[:3]
-            )
-            
-            # Buscar categorias
-            categorias = list(
-                context['restaurante'].categorias.filter(
-                    nome__icontains=query
-                ).values_list('nome', flat=True)[:2]
-            )
-            
-            # Combinar sugestões
-            sugestoes = produtos_nomes + produtos_contem + categorias
-            
-            # Remover duplicatas mantendo ordem
-            sugestoes = list(dict.fromkeys(sugestoes))
-            
-            # Limitar a 8 sugestões
-            sugestoes = sugestoes[:8]
+        if len(query) >= 2:
+            sugestoes = busca.sugerir(restaurante, query)
         
         return JsonResponse({
             'sugestoes': sugestoes,
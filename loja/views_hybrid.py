@@ -3,7 +3,7 @@ Views Híbridas - Migração Gradual
 Permite coexistência entre sistema antigo e novo sem impacto no usuário
 """
 
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.views import View
 from django.contrib import messages
 from django.http import JsonResponse
@@ -11,8 +11,9 @@ from django.db import transaction
 import json
 import logging
 
-from core.models import Restaurante, Produto
+from core.models import Produto
 from core.carrinho_hybrid import CarrinhoHybridService
+from core.restaurante_cache import restaurante_ou_404
 from core.services import FreteService
 from .views import BaseLojaView
 
@@ -105,7 +106,7 @@ class AdicionarProdutoCarrinhoViewHybrid(View):
                     'error': 'Restaurante não identificado'
                 }, status=400)
             
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+            restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
             
             # Adicionar item usando sistema híbrido
             CarrinhoHybridService.adicionar_item_hybrid(
@@ -188,7 +189,7 @@ class CheckoutViewHybrid(BaseLojaView):
         Por enquanto usa a lógica original, mas preparado para usar PedidoService
         """
         restaurante_slug = kwargs.get('restaurante_slug')
-        restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+        restaurante = restaurante_ou_404(restaurante_slug)
         
         try:
             # Verificar se tem carrinho
@@ -210,7 +211,7 @@ class CheckoutViewHybrid(BaseLojaView):
                         'quantidade': item['quantidade'],
                         'preco': float(item['preco_unitario']),
                         'observacoes': item['observacoes'],
-                        'personalizacoes': item['personalizacoes'],
+                        'personalizacoes': [dict(perso) for perso in item['personalizacoes']],
                         'meio_a_meio': item.get('eh_meio_a_meio', False)
                     }
                     for item in resumo['itens']
@@ -242,7 +243,7 @@ class LimparCarrinhoViewHybrid(View):
     def post(self, request, *args, **kwargs):
         try:
             restaurante_slug = kwargs.get('restaurante_slug')
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+            restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
             
             # Obter carrinho ativo
             carrinho_info = CarrinhoHybridService.obter_carrinho_ativo(request, restaurante)
@@ -13,7 +13,8 @@ from rest_framework.response import Response
 from rest_framework import status
 import logging
 
-from core.models import Restaurante, Produto, Carrinho
+from core.models import Produto, Carrinho
+from core.restaurante_cache import restaurante_ou_404
 from core.services import CarrinhoService, PedidoService, FreteService
 from core.serializers import (
     CarrinhoSerializer, AdicionarItemCarrinhoSerializer,
@@ -87,7 +88,7 @@ class CheckoutViewRefatorada(BaseLojaView):
                 restaurante=context['restaurante']
             )
             
-            if carrinho.esta_vazio():
+            if CarrinhoService.esta_vazio(carrinho):
                 messages.warning(self.request, 'Seu carrinho está vazio')
                 return context
             
@@ -130,7 +131,7 @@ class CheckoutViewRefatorada(BaseLojaView):
         try:
             # Obter restaurante
             restaurante_slug = kwargs.get('restaurante_slug')
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug, status='ativo')
+            restaurante = restaurante_ou_404(restaurante_slug)
             
             # Obter carrinho
             carrinho = CarrinhoService.obter_carrinho(
@@ -139,7 +140,7 @@ class CheckoutViewRefatorada(BaseLojaView):
                 restaurante=restaurante
             )
             
-            if carrinho.esta_vazio():
+            if CarrinhoService.esta_vazio(carrinho):
                 messages.error(request, 'Seu carrinho está vazio')
                 return redirect('loja:carrinho', restaurante_slug=restaurante_slug)
             
@@ -217,7 +218,7 @@ class CarrinhoAPIView(APIView):
     def get(self, request, restaurante_slug):
         """Retorna o carrinho atual"""
         try:
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+            restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
             
             carrinho = CarrinhoService.obter_carrinho(
                 usuario=request.user if request.user.is_authenticated else None,
@@ -238,7 +239,7 @@ class CarrinhoAPIView(APIView):
     def post(self, request, restaurante_slug):
         """Adiciona item ao carrinho"""
         try:
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+            restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
             
             serializer = AdicionarItemCarrinhoSerializer(data=request.data)
             if not serializer.is_valid():
@@ -295,7 +296,7 @@ class CarrinhoAPIView(APIView):
     def delete(self, request, restaurante_slug):
         """Limpa o carrinho"""
         try:
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+            restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
             
             carrinho = CarrinhoService.obter_carrinho(
                 usuario=request.user if request.user.is_authenticated else None,
@@ -324,7 +325,7 @@ class CalcularFreteAPIView(APIView):
     def post(self, request, restaurante_slug):
         """Calcula o frete para um CEP"""
         try:
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+            restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
             
             serializer = CalcularFreteSerializer(data=request.data)
             if not serializer.is_valid():
@@ -373,7 +374,7 @@ class CriarPedidoAPIView(APIView):
     def post(self, request, restaurante_slug):
         """Cria um pedido a partir do carrinho"""
         try:
-            restaurante = get_object_or_404(Restaurante, slug=restaurante_slug)
+            restaurante = restaurante_ou_404(restaurante_slug, somente_ativo=False)
             
             serializer = CriarPedidoSerializer(data=request.data)
             if not serializer.is_valid():
@@ -389,7 +390,7 @@ class CriarPedidoAPIView(APIView):
                 restaurante=restaurante
             )
             
-            if carrinho.esta_vazio():
+            if CarrinhoService.esta_vazio(carrinho):
                 return Response(
                     {'erro': 'Carrinho está vazio'},
                     status=status.HTTP_400_BAD_REQUEST
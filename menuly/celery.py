@@ -52,6 +52,18 @@ app.conf.update(
             'task': 'core.tasks.desativar_trial_expirados',
             'schedule': 86400.0,  # A cada 24 horas (1 dia)
         },
+        'limpar-cache-geocodificacao': {
+            'task': 'core.tasks.limpar_cache_geocodificacao',
+            'schedule': 86400.0,  # A cada 24 horas (1 dia)
+        },
+        'decair-popularidade-produtos': {
+            'task': 'core.tasks.decair_popularidade',
+            'schedule': 86400.0,  # A cada 24 horas (1 dia)
+        },
+        'persistir-carrinhos': {
+            'task': 'core.tasks.persistir_carrinhos',
+            'schedule': 15.0,   # A cada 15 segundos
+        },
     },
 )
 
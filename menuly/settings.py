@@ -187,6 +187,38 @@ if not DEBUG:
 # Configurações específicas do sistema multi-site
 SITE_ID = 1
 
+# Cache de geocodificação (ViaCEP/OpenCage) usado no cálculo de frete
+GEOCODIFICACAO_CACHE_TTL_DIAS = config('GEOCODIFICACAO_CACHE_TTL_DIAS', default=90, cast=int)
+GEOCODIFICACAO_CACHE_LRU_TAMANHO = config('GEOCODIFICACAO_CACHE_LRU_TAMANHO', default=2048, cast=int)
+
+# Índice offline CEP -> coordenadas (gerado com `manage.py importar_indice_cep`)
+CEP_INDICE_PATH = config('CEP_INDICE_PATH', default=str(BASE_DIR / 'dados' / 'indice_cep.bin'))
+
+# Intervalo (segundos) entre verificações do arquivo do índice de CEP (novo ou regravado)
+CEP_INDICE_VERIFICACAO_SEGUNDOS = config('CEP_INDICE_VERIFICACAO_SEGUNDOS', default=30, cast=int)
+
+# Cota da API OpenCage (compartilhada entre workers via Redis; sem Redis, as chamadas são negadas)
+OPENCAGE_LIMITE_DIARIO = config('OPENCAGE_LIMITE_DIARIO', default=2500, cast=int)
+OPENCAGE_LIMITE_POR_SEGUNDO = config('OPENCAGE_LIMITE_POR_SEGUNDO', default=1, cast=float)
+# Espera máxima pelo limite por segundo, só em tasks (requisições web não esperam)
+OPENCAGE_ESPERA_MAXIMA = config('OPENCAGE_ESPERA_MAXIMA', default=1.0, cast=float)
+LIMITADOR_REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+
+# Threads usadas para resolver origem/destino do frete em paralelo
+FRETE_RESOLUCAO_THREADS = config('FRETE_RESOLUCAO_THREADS', default=8, cast=int)
+
+# Cliente HTTP para serviços externos (core.http_client)
+# timeout = (conexão, leitura) em segundos; tentativas só valem para GET
+HTTP_CLIENT_HOSTS = {
+    'viacep.com.br': {'timeout': (2, 4), 'tentativas': 2},
+    'api.opencagedata.com': {'timeout': (2, 5), 'tentativas': 2},
+    'localhost': {'timeout': (1, 5), 'tentativas': 1, 'limite_falhas': 3},
+}
+
+# Zonas de entrega pré-calculadas (anéis de distância por restaurante)
+ZONA_ENTREGA_INTERVALO_KM = config('ZONA_ENTREGA_INTERVALO_KM', default=1, cast=float)
+ZONA_ENTREGA_RAIO_MAXIMO_KM = config('ZONA_ENTREGA_RAIO_MAXIMO_KM', default=30, cast=float)
+
 # Configurações de sessão
 SESSION_COOKIE_AGE = 86400  # 24 horas
 SESSION_SAVE_EVERY_REQUEST = True
@@ -210,6 +242,70 @@ REST_FRAMEWORK = {
     'DATE_FORMAT': '%d/%m/%Y',
 }
 
+# =============================================================================
+# Cache
+# =============================================================================
+
+# Com CACHE_REDIS_URL definido o cache é compartilhado entre workers (django-redis);
+# sem ele, cada processo usa o cache em memória local, aceito só com DEBUG
+# (check core.E001): as gerações do cardápio e a invalidação de restaurantes
+# só chegam aos outros workers por um cache compartilhado.
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'IGNORE_EXCEPTIONS': True,
+            },
+            'KEY_PREFIX': 'menuly',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'menuly',
+        }
+    }
+
+# Pré-renderização das páginas públicas da loja (servidas pelo Nginx)
+PRERENDER_ATIVO = config('PRERENDER_ATIVO', default=False, cast=bool)
+PRERENDER_ROOT = config('PRERENDER_ROOT', default=str(BASE_DIR / 'prerender'))
+PRERENDER_ATRASO = config('PRERENDER_ATRASO', default=30, cast=int)
+
+# Meia-vida (dias) da pontuação do ranking de produtos mais pedidos
+POPULARIDADE_MEIA_VIDA_DIAS = config('POPULARIDADE_MEIA_VIDA_DIAS', default=30, cast=float)
+
+# Resolução slug -> restaurante: cache compartilhado e cópia local por processo (segundos)
+RESTAURANTE_CACHE_TTL = config('RESTAURANTE_CACHE_TTL', default=300, cast=int)
+RESTAURANTE_CACHE_TTL_LOCAL = config('RESTAURANTE_CACHE_TTL_LOCAL', default=30, cast=int)
+
+# Tempo (segundos) que um snapshot de cardápio permanece no cache
+CARDAPIO_CACHE_TTL = config('CARDAPIO_CACHE_TTL', default=60 * 60 * 24, cast=int)
+
+# Backend da busca de produtos: 'memoria' (índice por processo) ou 'fulltext'
+# (índices FULLTEXT do MySQL, para catálogos grandes)
+BUSCA_BACKEND = config('BUSCA_BACKEND', default='memoria')
+
+# Tempo (segundos) que o resultado de uma busca fica no cache (0 desliga)
+BUSCA_CACHE_TTL = config('BUSCA_CACHE_TTL', default=60, cast=int)
+
+# Quantos índices de busca (restaurantes) cada processo mantém na memória
+BUSCA_INDICES_MAXIMO = config('BUSCA_INDICES_MAXIMO', default=500, cast=int)
+
+# Estado do carrinho: 'banco' (só MySQL), 'redis' (hash por carrinho, gravado no
+# banco pela task persistir_carrinhos e no checkout) ou 'memoria' (testes)
+CARRINHO_ARMAZENAMENTO = config('CARRINHO_ARMAZENAMENTO', default='banco')
+CARRINHO_REDIS_URL = config('CARRINHO_REDIS_URL', default=config('REDIS_URL', default='redis://localhost:6379/0'))
+# Tempo (segundos) sem alterações até o carrinho sair do Redis (volta do banco no próximo acesso)
+CARRINHO_ARMAZENAMENTO_TTL = config('CARRINHO_ARMAZENAMENTO_TTL', default=60 * 60 * 24 * 7, cast=int)
+# Tempo (segundos) que o resumo de uma versão do carrinho fica no cache
+CARRINHO_RESUMO_CACHE_TTL = config('CARRINHO_RESUMO_CACHE_TTL', default=60 * 30, cast=int)
+
 # =============================================================================
 # Celery Configuration
 # =============================================================================
@@ -239,6 +335,18 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'core.tasks.verificar_entregas_demoradas',
         'schedule': 300.0,   # A cada 5 minutos (menos frequente)
     },
+    'limpar-cache-geocodificacao': {
+        'task': 'core.tasks.limpar_cache_geocodificacao',
+        'schedule': 86400.0,  # Uma vez por dia
+    },
+    'decair-popularidade-produtos': {
+        'task': 'core.tasks.decair_popularidade',
+        'schedule': 86400.0,  # Uma vez por dia
+    },
+    'persistir-carrinhos': {
+        'task': 'core.tasks.persistir_carrinhos',
+        'schedule': 15.0,  # A cada 15 segundos
+    },
     'debug-celery': {
         'task': 'core.tasks.debug_celery',
         'schedule': 3600.0,  # A cada 1 hora para verificar se está funcionando
@@ -45,8 +45,11 @@ class BuscaAvancada {
 
     // Buscar sugestões do servidor
     async buscarSugestoes(query, input) {
+        // Endpoint da loja atual, definido em base.html
+        if (!window.urlSugestoesBusca) return;
+
         try {
-            const response = await fetch(`/api/buscar-sugestoes/?q=${encodeURIComponent(query)}`);
+            const response = await fetch(`${window.urlSugestoesBusca}?q=${encodeURIComponent(query)}`);
             
             if (response.ok) {
                 const data = await response.json();